@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+from dotenv import load_dotenv
+
+import generate_iudx_metadata2
+from generate_iudx_metadata2 import (
+    TEMPERATURE,
+    plan_generation,
+    build_inputs,
+    stream_monitor,
+    schemas,
+)
+from generate_IUDX_metadata import detect_resource_type
+from llm_cache import cache_key, cache_bypassed, get_cache
+from llm_client import AsyncResilientClient
+from llm_backends import BACKENDS
+from geojson_stream import read_sample
+from dataset_profile import representative_sample
+from column_inference import infer_dataset_types
+from prompt_templates import prefix_metrics
+from llm_stream import DEFAULT_STREAM, astream_completion, stream_metrics
+from output_writer import JsonWriter, make_writer
+from build_manifest import BuildManifest, MANIFEST_NAME
+
+# Load environment variables
+load_dotenv()
+
+
+class TokenBucket:
+    """
+    Asyncio token-bucket rate limiter.
+
+    `rate` tokens are added per second up to `capacity`; each request takes one token.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def load_manifest(manifest_path):
+    """
+    Load batch jobs from a manifest file.
+
+    The manifest is either a JSON list or JSON Lines of objects with keys
+    `input`, `resource_type`, optional `kwargs` and optional `output`.
+    Relative paths are resolved against the manifest's directory.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r") as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    jobs = []
+    for entry in entries:
+        job = {
+            "input": os.path.join(base_dir, entry["input"]),
+            "resource_type": entry["resource_type"],
+            "kwargs": entry.get("kwargs", {}),
+        }
+        if entry.get("output"):
+            job["output"] = os.path.join(base_dir, entry["output"])
+        jobs.append(job)
+    return jobs
+
+
+def jobs_from_directory(input_dir, resource_type=None, kwargs=None):
+    """Build one job per *.json / *.geojson file in `input_dir`."""
+    jobs = []
+    for filename in sorted(os.listdir(input_dir)):
+        if not filename.endswith((".json", ".geojson")):
+            continue
+        path = os.path.join(input_dir, filename)
+        job_resource_type = resource_type
+        if job_resource_type is None:
+            job_resource_type = detect_resource_type(read_sample(path), filename=path)
+        jobs.append({"input": path, "resource_type": job_resource_type, "kwargs": dict(kwargs or {})})
+    return jobs
+
+
+def output_path_for(job, output_dir):
+    if "output" in job:
+        return job["output"]
+    stem = os.path.splitext(os.path.basename(job["input"]))[0]
+    return os.path.join(output_dir, f"output_{stem}.jsonld")
+
+
+async def complete(client, messages, semaphore, bucket, cache, monitor=None, validate=None):
+    """
+    Query the model for `messages`, consulting the response cache first when enabled.
+
+    With a `monitor` the response is streamed through it and may be aborted early
+    (llm_stream.StreamAborted). With `validate`, its result is returned instead of the
+    text and only responses it accepts are cached (see llm_cache.cached_completion).
+    """
+    # Looked up per call: --backend switches the generator's backend after import
+    model = generate_iudx_metadata2.MODEL
+    key = cache_key(model, TEMPERATURE, messages)
+    if cache is not None:
+        hit = await asyncio.to_thread(cache.get, key)
+        if hit is not None:
+            if validate is None:
+                return hit, True
+            try:
+                return validate(hit), True
+            except ValueError:
+                pass
+
+    async with semaphore:
+        if bucket is not None:
+            await bucket.acquire()
+        if monitor is not None:
+            content = await astream_completion(client, monitor, model=model, messages=messages, temperature=TEMPERATURE)
+        else:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=TEMPERATURE
+            )
+            content = response.choices[0].message.content
+    result = validate(content) if validate is not None else content
+    await asyncio.to_thread(get_cache().put, key, content, model)
+    return result, False
+
+
+async def run_job(client, job, output_dir, semaphore, bucket, cache, writer, deterministic=False, stream=False,
+                  manifest=None, force=False):
+    """
+    Generate and write the metadata for a single job. Returns a result record.
+
+    With a `manifest`, a job whose output is up to date with its inputs is skipped
+    (status "skipped") unless `force` is set.
+    """
+    output_file = output_path_for(job, output_dir)
+    started = time.monotonic()
+    cached = False
+    try:
+        changes = ["no build manifest"]
+        if manifest is not None:
+            input_digest = await asyncio.to_thread(manifest.file_digest, job["input"])
+            inputs = build_inputs(input_digest, job["resource_type"], deterministic, **job["kwargs"])
+            changes = ["forced"] if force else manifest.changes(output_file, inputs)
+
+        if not changes:
+            status, error = "skipped", None
+        else:
+            json_input = await asyncio.to_thread(representative_sample, job["input"])
+            # Deterministic mode types every column from the whole dataset, not just the sample
+            column_types = await asyncio.to_thread(infer_dataset_types, job["input"]) if deterministic else None
+            messages, finish = plan_generation(json_input, job["resource_type"], deterministic, column_types, **job["kwargs"])
+
+            def checked(raw_output):
+                metadata = finish(raw_output)
+                # Never write (or cache) an item that does not match the IUDX schema for its resource type
+                problems = schemas.validate_item(metadata, job["resource_type"])
+                if problems:
+                    raise ValueError("schema validation failed: " + "; ".join(problems))
+                return metadata
+
+            monitor = stream_monitor(deterministic) if stream else None
+            metadata, cached = await complete(client, messages, semaphore, bucket, cache, monitor, checked)
+            output_file = await asyncio.to_thread(writer.write_items, output_file, [metadata])
+            if manifest is not None:
+                manifest.record(output_file, inputs)
+            status, error = "ok", None
+    except Exception as e:
+        status, error, changes = "failed", f"{type(e).__name__}: {e}", None
+
+    return {
+        "input": job["input"],
+        "output": output_file if status != "failed" else None,
+        "resource_type": job["resource_type"],
+        "status": status,
+        "cached": cached,
+        "error": error,
+        "rebuilt_because": changes if status == "ok" else None,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+
+
+async def generate_batch(jobs, output_dir=".", concurrency=4, rate=None, burst=None, client=None, bypass_cache=None,
+                         deterministic=False, writer=None, stream=None, manifest=None, force=False, backend=None):
+    """
+    Run metadata generation for many jobs concurrently.
+
+    Args:
+        jobs (list[dict]): Jobs with `input`, `resource_type` and `kwargs` (and optionally `output`).
+        output_dir (str): Directory for outputs of jobs without an explicit `output`.
+        concurrency (int): Maximum number of in-flight LLM requests.
+        rate (float): Maximum requests per second (token bucket); None disables rate limiting.
+        burst (int): Token bucket capacity; defaults to the per-second rate.
+        client: Async client to use; defaults to a retrying async client for the generator's backend.
+        bypass_cache (bool): Always query the model (defaults to IUDX_LLM_CACHE_BYPASS).
+        deterministic (bool): Build structural fields locally and only ask the model for free text.
+        writer: output_writer JsonWriter or JsonLinesSink each item's urn:dx:cat:Success envelope
+            is written to; defaults to one pretty-printed file per job.
+        stream (bool): Stream responses and abort those that diverge from the expected item
+            early (defaults to IUDX_LLM_STREAM).
+        manifest (BuildManifest): Skip jobs whose outputs are up to date with their dataset,
+            template, resource config and model settings, and record what was built. Saved
+            when the batch finishes.
+        force (bool): Rebuild every job even if its output is up to date.
+        backend (str): llm_backends backend to generate with (groq, openai or llamacpp);
+            defaults to IUDX_LLM_BACKEND.
+
+    Yields:
+        dict: One result record per job, in completion order, after its output has been written.
+    """
+    if backend is not None:
+        generate_iudx_metadata2.use_backend(backend)
+    client = client or AsyncResilientClient(generate_iudx_metadata2.backend.async_client())
+    writer = writer or JsonWriter()
+    os.makedirs(output_dir, exist_ok=True)
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate, burst) if rate else None
+    if bypass_cache is None:
+        bypass_cache = cache_bypassed()
+    cache = None if bypass_cache else get_cache()
+    if stream is None:
+        stream = DEFAULT_STREAM
+
+    tasks = [asyncio.create_task(run_job(client, job, output_dir, semaphore, bucket, cache, writer, deterministic, stream,
+                                           manifest, force))
+             for job in jobs]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        if manifest is not None:
+            manifest.save()
+
+
+async def run_batch(jobs, **options):
+    results = []
+    async for result in generate_batch(jobs, **options):
+        if result["status"] == "ok":
+            source = "cache" if result["cached"] else f"{result['seconds']}s"
+            print(f"[OK] {result['input']} -> {result['output']} ({source}; {', '.join(result['rebuilt_because'])})")
+        elif result["status"] == "skipped":
+            print(f"[SKIP] {result['input']} -> {result['output']} (up to date)")
+        else:
+            print(f"[FAILED] {result['input']}: {result['error']}")
+        results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate IUDX JSON-LD metadata for many inputs concurrently.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input-dir", help="Directory of input JSON/GeoJSON files")
+    source.add_argument("--manifest", help="JSON/JSONL manifest of {input, resource_type, kwargs, output} entries")
+    parser.add_argument("--output-dir", default=".", help="Directory to write output_<name>.jsonld files to")
+    parser.add_argument("--resource-type", help="Resource type for every file in --input-dir (detected if omitted)")
+    parser.add_argument("--kwargs", default="{}", help="JSON object of extra parameters for every file in --input-dir")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent LLM requests")
+    parser.add_argument("--rate", type=float, help="Maximum LLM requests per second")
+    parser.add_argument("--burst", type=int, help="Burst size for the rate limiter")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the model instead of reusing cached responses")
+    parser.add_argument("--compact", action="store_true", help="Write outputs without indentation")
+    parser.add_argument("--jsonl", help="Append every output envelope to this JSON Lines file instead of one file per input")
+    parser.add_argument("--deterministic", action="store_true", help="Build types and fixed fields locally; only ask the model for free text")
+    parser.add_argument("--stream", action="store_true", help="Stream responses and abort bad generations early")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="LLM backend (default: IUDX_LLM_BACKEND or groq)")
+    parser.add_argument("--force", action="store_true", help="Regenerate every output, even those that are up to date")
+    parser.add_argument("--build-manifest", help=f"Build manifest used to skip up-to-date outputs "
+                                                 f"(default: <output-dir>/{MANIFEST_NAME}; not used with --jsonl)")
+    args = parser.parse_args()
+
+    if args.manifest:
+        jobs = load_manifest(args.manifest)
+    else:
+        jobs = jobs_from_directory(args.input_dir, args.resource_type, json.loads(args.kwargs))
+
+    started = time.monotonic()
+    # A JSONL sink is rewritten as a whole, so incremental builds only apply to per-file outputs
+    manifest = None
+    if not args.jsonl:
+        manifest = BuildManifest(args.build_manifest) if args.build_manifest else BuildManifest.for_directory(args.output_dir)
+    writer = make_writer(args.jsonl, compact=args.compact)
+    try:
+        results = asyncio.run(run_batch(
+            jobs,
+            output_dir=args.output_dir,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            burst=args.burst,
+            bypass_cache=args.no_cache or None,
+            deterministic=args.deterministic,
+            writer=writer,
+            stream=args.stream or None,
+            manifest=manifest,
+            force=args.force,
+            backend=args.backend,
+        ))
+    except BaseException:
+        # Keep a previous sink rather than replacing it with a partial one
+        writer.abort()
+        raise
+    writer.close()
+    failed = sum(1 for r in results if r["status"] == "failed")
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    print(f"Generated {len(results) - failed - skipped}/{len(results) - skipped} datasets in {time.monotonic() - started:.2f}s"
+          f" ({skipped} up to date)")
+    reuse = prefix_metrics.stats()
+    print(f"Prompt prefix reuse: {reuse['prefix_reuse_ratio']:.0%} of prompt text "
+          f"({reuse['reused_requests']}/{reuse['requests']} requests, {reuse['distinct_prefixes']} distinct prefixes)")
+    batching = generate_iudx_metadata2.backend.stats().get("batching")
+    if batching and batching["batches"]:
+        print(f"Batched {batching['requests']} requests into {batching['batches']} batches "
+              f"(mean size {batching['mean_batch_size']}, {batching['deduplicated']} duplicates)")
+    streamed = stream_metrics.stats()
+    if streamed["streams"]:
+        print(f"Streamed {streamed['streams']} responses, aborted {streamed['aborted']} early "
+              f"after {streamed['chars_before_abort']} characters")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
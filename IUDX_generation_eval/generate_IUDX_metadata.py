@@ -1,17 +1,33 @@
 import os
+import sys
 import json
-import uuid
-from groq import Groq
 from dotenv import load_dotenv
-from datetime import datetime
 import argparse
 import re
 
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_cache import cached_completion
+from llm_client import ResilientClient
+from llm_backends import BACKENDS, get_backend
+from dataset_profile import representative_sample
+from prompt_templates import TemplateRegistry, prefix_messages, prefix_metrics
+from generate_iudx_metadata2 import apply_fixed_fields, schemas, stream_monitor
+from json_extract import extract_json
+from output_writer import JsonWriter, success_envelope
+from build_manifest import BuildManifest, MANIFEST_NAME, digest, text_digest
+
 # Load environment variables
 load_dotenv()
 
-# Initialize Groq client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# LLM backend (Groq unless IUDX_LLM_BACKEND says otherwise) and its client
+backend = get_backend()
+client = ResilientClient(backend.client())
+
+# Model settings
+MODEL = backend.model
+TEMPERATURE = 0.2
+SYSTEM_MESSAGE = "You are a JSON-LD generator for IUDX metadata."
 
 def detect_resource_type(json_input, filename=None):
     """
@@ -37,69 +53,104 @@ def detect_resource_type(json_input, filename=None):
     # Fallback
     return "GeoJSON"  # Default to GeoJSON if unsure
 
+# Prompt template and data sample URL suffix per resource type
+PROMPT_TEMPLATES = {
+    "GeoJSON": {"prompt_file": "prompt_template_geojson.txt"},
+    "EmergencyVehicle": {"prompt_file": "prompt_template_emergency_vehicle.txt", "optional_params": ["city", "polygon", "url"], "url_suffix": "emergency-vehicles-ambulance-live.json"},
+    "EnvAQM": {"prompt_file": "prompt_template_env_aqm.txt", "optional_params": ["city", "polygon", "url"], "url_suffix": "env-aqm-info.json"},
+}
+
+# Templates are read and checked once, from this script's directory rather than the cwd
+templates = TemplateRegistry(PROMPT_TEMPLATES, os.path.dirname(os.path.abspath(__file__)), derived=("json_input", "geojson_input"))
+
 def build_prompt(json_input, resource_type, **kwargs):
     """
-    Build the prompt string for the LLM based on resource type and input.
+    Build the (static, payload) prompt for the LLM based on resource type and input.
+    The static template body is shared by every request of a resource type.
     """
-    if resource_type == "GeoJSON":
-        with open("prompt_template_geojson.txt", "r") as f:
-            template = f.read()
-        prompt = template.replace("{geojson_input}", json.dumps(json_input, indent=2))
-    elif resource_type == "EmergencyVehicle":
-        with open("prompt_template_emergency_vehicle.txt", "r") as f:
-            template = f.read()
-        city = kwargs.get("city", "")
-        polygon = kwargs.get("polygon", [])
-        url = f"[invalid url, do not cite]/{city.lower()}-emergency-vehicles-ambulance-live.json"
-        prompt = template.replace("{city}", city).replace("{polygon}", json.dumps(polygon)).replace("{url}", url).replace("{json_input}", json.dumps(json_input, indent=2))
-    elif resource_type == "EnvAQM":
-        with open("prompt_template_env_aqm.txt", "r") as f:
-            template = f.read()
-        city = kwargs.get("city", "")
-        polygon = kwargs.get("polygon", [])
-        url = f"[invalid url, do not cite]/{city.lower()}-env-aqm-info.json"
-        prompt = template.replace("{city}", city).replace("{polygon}", json.dumps(polygon)).replace("{url}", url).replace("{json_input}", json.dumps(json_input, indent=2))
-    else:
+    if resource_type not in PROMPT_TEMPLATES:
         raise ValueError(f"Unknown resource_type: {resource_type}")
-    return prompt
+    payload = json.dumps(json_input, indent=2)
+    city = kwargs.get("city", "")
+    values = {
+        "json_input": payload,
+        "geojson_input": payload,
+        "city": city,
+        "polygon": json.dumps(kwargs.get("polygon", [])),
+        "url": f"[invalid url, do not cite]/{city.lower()}-{PROMPT_TEMPLATES[resource_type].get('url_suffix', '')}",
+    }
+    return templates.render_split(resource_type, values)
 
-def generate_metadata(json_input, resource_type, prompt):
+def generate_metadata(resource_type, prompt, bypass_cache=None, stream=None, validate=True):
     """
-    Generate IUDX-compliant JSON-LD metadata for the given input JSON and resource type.
+    Generate IUDX-compliant JSON-LD metadata from a prompt built for `resource_type`.
+
+    With `validate` the item must pass the IUDX schema for `resource_type`; a response
+    that does not is neither cached nor returned. With `stream` the response is streamed
+    and abandoned as soon as it stops looking like a valid item (see
+    generate_iudx_metadata2.stream_monitor).
+
+    Raises:
+        ValueError: When the response cannot be parsed or fails validation.
     """
-    # Query the model
-    response = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[
-            {"role": "system", "content": "You are a JSON-LD generator for IUDX metadata."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.2
+    # Static prefix first, dataset payload last
+    messages = prefix_messages(SYSTEM_MESSAGE, prompt)
+    prefix_metrics.record(messages)
+
+    def checked(raw_output):
+        # id, timestamp, blank database fields and the resource type's fixed fields
+        # (apdURL, crs, datum, ogcResourceInfo, ...), the same ones generate_iudx_metadata2 sets
+        parsed_metadata = apply_fixed_fields(extract_json(raw_output), resource_type)
+        if validate:
+            problems = schemas.validate_item(parsed_metadata, resource_type)
+            if problems:
+                raise ValueError("schema validation failed: " + "; ".join(problems))
+        return parsed_metadata
+
+    # Query the model (or reuse a cached response for an identical prompt); only responses
+    # that parse (and with `validate` pass the schema) are cached or replayed
+    return cached_completion(
+        client,
+        model=MODEL,
+        messages=messages,
+        temperature=TEMPERATURE,
+        bypass=bypass_cache,
+        stream=stream,
+        monitor=stream_monitor(validate=validate),
+        validate=checked
     )
-    raw_output = response.choices[0].message.content.strip()
-    # Extract and clean JSON block
-    start = raw_output.find("{")
-    end = raw_output.rfind("}") + 1
-    if start == -1 or end == -1:
-        raise ValueError("No valid JSON object found in model output.")
-    clean_json_str = raw_output[start:end]
-    parsed_metadata = json.loads(clean_json_str)
-    # Add UUID as `id`
-    parsed_metadata["id"] = str(uuid.uuid4())
-    # Set itemCreatedAt to current datetime in IST
-    parsed_metadata["itemCreatedAt"] = datetime.now().isoformat() + "+0530"
-    # Ensure database-retrieved fields are blank
-    parsed_metadata["provider"] = ""
-    parsed_metadata["resourceServer"] = ""
-    parsed_metadata["resourceGroup"] = ""
-    return parsed_metadata
+
+def use_backend(name):
+    """Switch this script's requests to another llm_backends backend."""
+    global backend, client, MODEL
+    backend = get_backend(name)
+    client = ResilientClient(backend.client())
+    MODEL = backend.model
+
+def build_inputs(input_digest, resource_type, **kwargs):
+    """Digests of the dataset, template, template config, parameters and model settings behind an output."""
+    return {
+        "input": input_digest,
+        "template": text_digest(templates.get(resource_type).text),
+        "resource_config": digest(PROMPT_TEMPLATES[resource_type]),
+        "parameters": digest(kwargs),
+        "model": digest({"model": MODEL, "temperature": TEMPERATURE, "system": SYSTEM_MESSAGE}),
+    }
 
 def main():
     parser = argparse.ArgumentParser(description="Generate IUDX-compliant JSON-LD metadata for a given input fileN.json, outputting output_fileN.jsonld.")
     parser.add_argument("input_file", help="Path to the input JSON file (fileN.json)")
     parser.add_argument("--city", help="City name (for EmergencyVehicle/EnvAQM)")
     parser.add_argument("--polygon", help="Polygon coordinates as JSON string (for EmergencyVehicle/EnvAQM)")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the model instead of reusing a cached response")
+    parser.add_argument("--compact", action="store_true", help="Write the output without indentation")
+    parser.add_argument("--stream", action="store_true", help="Stream the response and stop early if it goes off the rails")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="LLM backend (default: IUDX_LLM_BACKEND or groq)")
+    parser.add_argument("--force", action="store_true", help=f"Regenerate even if {MANIFEST_NAME} says the output is up to date")
+    parser.add_argument("--no-validate", action="store_true", help="Write the output even if it fails IUDX schema validation")
     args = parser.parse_args()
+    if args.backend:
+        use_backend(args.backend)
 
     input_file = args.input_file
     match = re.match(r"file(\d+)\.json", os.path.basename(input_file))
@@ -109,8 +160,7 @@ def main():
     output_file = f"output_file{file_num}.jsonld"
     prompt_file = f"prompt_file{file_num}.txt"
 
-    with open(input_file, "r") as f:
-        json_input = json.load(f)
+    json_input = representative_sample(input_file)
 
     # Heuristically detect resource type
     resource_type = detect_resource_type(json_input, filename=input_file)
@@ -125,24 +175,41 @@ def main():
     # City
     city = args.city or ""
 
+    # Skip the LLM call (and leave both files alone) when nothing the output depends on has changed
+    manifest = BuildManifest(MANIFEST_NAME)
+    inputs = build_inputs(manifest.file_digest(input_file), resource_type, city=city, polygon=polygon)
+    changes = ["forced"] if args.force else manifest.changes(output_file, inputs)
+    if not changes and os.path.exists(prompt_file):
+        print(f"{output_file} is up to date")
+        return
+    print(f"Building {output_file} ({', '.join(changes)})")
+
     # Build prompt
     prompt = build_prompt(json_input, resource_type, city=city, polygon=polygon)
     with open(prompt_file, "w") as pf:
-        pf.write(prompt)
+        pf.write("\n\n".join(prompt))
 
-    # Generate metadata
-    metadata = generate_metadata(json_input, resource_type, prompt)
+    # Generate metadata; an item that fails the schema is never written (nor cached)
+    try:
+        metadata = generate_metadata(resource_type, prompt, bypass_cache=args.no_cache or None,
+                                     stream=args.stream or None, validate=not args.no_validate)
+    except ValueError as e:
+        raise SystemExit(f"Not writing {output_file}: {e} (use --no-validate to write it anyway)")
 
     # Output in the required structure
-    output_json = {
-        "type": "urn:dx:cat:Success",
-        "title": "Success",
-        "totalHits": 1,
-        "results": [metadata],
-        "detail": "Success: Item generated Successfully"
-    }
-    with open(output_file, "w") as f:
-        json.dump(output_json, f, indent=2)
+    output_json = success_envelope([metadata])
+
+    # The item was checked before caching; gate the file on the envelope around it too
+    problems = schemas.validate_envelope(output_json, resource_type)
+    if problems:
+        print(f"Generated metadata does not match the IUDX {resource_type} schema:")
+        for problem in problems:
+            print(f"  - {problem}")
+        if not args.no_validate:
+            raise SystemExit(f"Not writing {output_file} (use --no-validate to write it anyway)")
+    JsonWriter(compact=args.compact).write(output_file, output_json)
+    manifest.record(output_file, inputs)
+    manifest.save()
     print(f"Output written to {output_file}\nPrompt saved to {prompt_file}")
 
 if __name__ == "__main__":
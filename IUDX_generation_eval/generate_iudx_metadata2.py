@@ -1,16 +1,40 @@
 import os
+import sys
+import copy
 import json
 import uuid
 import re
-from groq import Groq
 from dotenv import load_dotenv
 from datetime import datetime
 
+# Shared helpers live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_cache import cached_completion
+from llm_client import ResilientClient
+from llm_backends import get_backend
+from prompt_templates import TemplateRegistry, prefix_messages, prefix_metrics
+from resource_validation import ResourceSchemaRegistry
+from json_extract import extract_json
+from llm_stream import JsonStreamMonitor
+from descriptor_validation import validate_descriptor
+from descriptor_synthesis import build_structure, free_text_prompt, parse_free_text, merge_free_text, sample_column_types
+from descriptor_synthesis import FREE_TEXT_INSTRUCTIONS
+from build_manifest import digest, text_digest
+
 # Load environment variables
 load_dotenv()
 
-# Initialize Groq client
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# LLM backend (Groq unless IUDX_LLM_BACKEND says otherwise) and its client
+backend = get_backend()
+client = ResilientClient(backend.client())
+
+# Model settings shared by the single-shot and batch entry points
+MODEL = backend.model
+TEMPERATURE = 0.2
+SYSTEM_MESSAGE = "You are a JSON-LD generator for IUDX metadata."
+
+# Prompt templates live next to this script
+TEMPLATE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Configuration for resource types
 resource_config = {
@@ -30,11 +54,19 @@ resource_config = {
                     "geometryType": "Point"
                 }
             }
+        },
+        # Fixed trailing fields; resource types that have them support deterministic synthesis
+        "static_fields": {
+            "itemStatus": "ACTIVE",
+            "cos": "887cc637-2939-4f2f-ad5a-2c224b561497",
+            "ownerUserId": "938d8b1f-e25c-4042-99de-f7349f7af6e7",
+            "instance": "surveyofindia"
         }
     },
     "EmergencyVehicle": {
         "prompt_file": "prompt_template_emergency_vehicle.txt",
         "required_params": ["city", "polygon"],
+        "optional_params": ["url"],
         "metadata": {
             "resourceType": "MESSAGESTREAM",
             "iudxResourceAPIs": ["ATTR", "TEMPORAL", "SPATIAL"],
@@ -45,6 +77,7 @@ resource_config = {
     "EnvAQM": {
         "prompt_file": "prompt_template_env_aqm.txt",
         "required_params": ["city", "polygon"],
+        "optional_params": ["url"],
         "metadata": {
             "resourceType": "MESSAGESTREAM",
             "iudxResourceAPIs": ["ATTR", "TEMPORAL"],
@@ -104,6 +137,12 @@ resource_config = {
     }
 }
 
+# Templates are read and checked once; "json_input"/"geojson_input" are always filled from the input
+templates = TemplateRegistry(resource_config, TEMPLATE_DIR, derived=("json_input", "geojson_input"))
+
+# Full item/envelope validators, compiled per resource type on first use
+schemas = ResourceSchemaRegistry(resource_config)
+
 def generate_filename(resource_type, city=None, name=None):
     """Generate a descriptive filename based on resource type and parameters."""
     city = city.lower().replace(" ", "_") if city else "unknown"
@@ -125,61 +164,69 @@ def generate_filename(resource_type, city=None, name=None):
         return f"{city}_bike_docking_stations.json"
     return f"{city}_{resource_type.lower()}.json"
 
-def generate_metadata(json_input, resource_type, **kwargs):
+def build_prompt(json_input, resource_type, **kwargs):
     """
-    Generate IUDX-compliant JSON-LD metadata for the given input JSON and resource type.
-    
+    Render the prompt for the given input JSON and resource type.
+
     Args:
         json_input (dict): The input JSON data.
         resource_type (str): The type of resource (e.g., "GeoJSON", "EnergyMeter").
         **kwargs: Additional parameters like location_address, city, polygon, name, etc.
-    
+
     Returns:
-        dict: The generated IUDX-compliant JSON-LD metadata.
+        tuple: (static, payload) - the template body, identical for every request of this
+        resource type, and the per-dataset values that are sent after it.
     """
     if resource_type not in resource_config:
         raise ValueError(f"Unknown resource_type: {resource_type}")
 
     config = resource_config[resource_type]
-    prompt_file = config["prompt_file"]
-
-    # Load prompt template
-    with open(prompt_file, "r") as f:
-        template = f.read()
 
     # Validate required parameters
     for param in config["required_params"]:
         if param not in kwargs:
             raise ValueError(f"Missing required parameter: {param} for {resource_type}")
 
-    # Replace placeholders
-    prompt = template
-    replacements = {"json_input": json.dumps(json_input, indent=2)}
+    # Values for the compiled template's slots
+    payload = json.dumps(json_input, indent=2)
+    values = {"json_input": payload, "geojson_input": payload}
+    for param in config.get("optional_params", []):
+        values[param] = ""
+    if "url" in values:
+        # Data sample link; defaults to the sample's filename when no url is given
+        sample_name = json_input.get("filename") if isinstance(json_input, dict) else None
+        values["url"] = sample_name or generate_filename(resource_type, kwargs.get("city"), kwargs.get("name"))
     for key, value in kwargs.items():
-        replacements[key] = json.dumps(value) if key == "polygon" else str(value)
-    for placeholder, value in replacements.items():
-        prompt = prompt.replace(f"{{{placeholder}}}", value)
-
-    # Query the model
-    response = client.chat.completions.create(
-        model="llama3-70b-8192",
-        messages=[
-            {"role": "system", "content": "You are a JSON-LD generator for IUDX metadata."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.2
-    )
+        values[key] = json.dumps(value) if key == "polygon" else str(value)
+    return templates.render_split(resource_type, values)
+
+def build_messages(prompt):
+    """
+    Wrap a (static, payload) prompt in the chat messages sent to the model.
+
+    The system message and static template body form a stable prefix; the payload goes last.
+    """
+    messages = prefix_messages(SYSTEM_MESSAGE, prompt)
+    prefix_metrics.record(messages)
+    return messages
+
+def finalize_metadata(raw_output, resource_type):
+    """
+    Parse the raw model output and fill in the fields that are not left to the model.
 
-    raw_output = response.choices[0].message.content.strip()
+    Args:
+        raw_output (str): The model response text.
+        resource_type (str): The type of resource the output was generated for.
 
-    # Extract and clean JSON block
-    start = raw_output.find("{")
-    end = raw_output.rfind("}") + 1
-    if start == -1 or end == -1:
-        raise ValueError("No valid JSON object found in model output.")
+    Returns:
+        dict: The generated IUDX-compliant JSON-LD metadata.
+    """
+    parsed_metadata = extract_json(raw_output)
+    return apply_fixed_fields(parsed_metadata, resource_type)
 
-    clean_json_str = raw_output[start:end]
-    parsed_metadata = json.loads(clean_json_str)
+def apply_fixed_fields(parsed_metadata, resource_type):
+    """Set the id, timestamp, blank database fields and the resource type's fixed metadata."""
+    config = resource_config[resource_type]
 
     # Add UUID as `id`
     parsed_metadata["id"] = str(uuid.uuid4())
@@ -192,14 +239,133 @@ def generate_metadata(json_input, resource_type, **kwargs):
     parsed_metadata["resourceServer"] = ""
     parsed_metadata["resourceGroup"] = ""
 
-    # Add metadata from config
+    # Add metadata from config; copied, so editing one item never changes the config or other items
     for key, value in config["metadata"].items():
-        parsed_metadata[key] = value
+        if key != "additional_fields":
+            parsed_metadata[key] = copy.deepcopy(value)
     if "additional_fields" in config["metadata"]:
-        parsed_metadata.update(config["metadata"]["additional_fields"])
+        parsed_metadata.update(copy.deepcopy(config["metadata"]["additional_fields"]))
 
     return parsed_metadata
 
+def plan_generation(json_input, resource_type, deterministic=False, column_types=None, **kwargs):
+    """
+    The chat messages for one dataset and the function that turns the model's answer into metadata.
+
+    Args:
+        deterministic (bool): Build the structure (types, geometry, crs/datum, ogcResourceInfo,
+            location.type, fixed fields) locally and only ask the model for free text.
+        column_types (dict): dataSchema per property for deterministic mode; defaults to the
+            types inferred from `json_input` alone.
+
+    Returns:
+        tuple: (messages, finish) where finish(raw_output) returns the metadata dict.
+    """
+    if not deterministic:
+        messages = build_messages(build_prompt(json_input, resource_type, **kwargs))
+        return messages, lambda raw_output: finalize_metadata(raw_output, resource_type)
+
+    config = resource_config.get(resource_type, {})
+    if "static_fields" not in config:
+        raise ValueError(f"Deterministic synthesis is not available for {resource_type}")
+    column_types = column_types or sample_column_types(json_input)
+    structure = build_structure(json_input, column_types, config["metadata"], config["static_fields"])
+    ogc_info = structure.get("ogcResourceInfo")
+
+    def finish(raw_output):
+        metadata = apply_fixed_fields(merge_free_text(structure, parse_free_text(raw_output)), resource_type)
+        if ogc_info is not None:
+            # Keep the geometry type seen in the data rather than the configured default
+            metadata["ogcResourceInfo"] = ogc_info
+        return metadata
+
+    return build_messages(free_text_prompt(json_input, column_types)), finish
+
+def build_inputs(input_digest, resource_type, deterministic=False, **kwargs):
+    """
+    Digests of everything a generated item depends on, for build_manifest.BuildManifest:
+    the dataset, the prompt template (or the free-text instructions in deterministic mode),
+    the resource type's config, the template parameters and the model settings.
+    """
+    prompt = FREE_TEXT_INSTRUCTIONS if deterministic else templates.get(resource_type).text
+    settings = {"model": MODEL, "temperature": TEMPERATURE, "system": SYSTEM_MESSAGE, "deterministic": deterministic}
+    return {
+        "input": input_digest,
+        "template": text_digest(prompt),
+        "resource_config": digest(resource_config[resource_type]),
+        "parameters": digest(kwargs),
+        "model": digest(settings),
+    }
+
+def use_backend(name, **options):
+    """Send this module's requests to another llm_backends backend for the rest of the run."""
+    global backend, client, MODEL
+    backend = get_backend(name, **options)
+    client = ResilientClient(backend.client())
+    MODEL = backend.model
+
+def descriptor_problems(descriptor):
+    """
+    validate_descriptor's errors as a flat list of messages. Fields inside groups such as
+    deviceInfo are checked individually, so a well-formed nested descriptor passes.
+    """
+    return [f"{key}: {', '.join(problems)}" for key, problems in validate_descriptor(descriptor).items()]
+
+def stream_monitor(deterministic=False, validate=True):
+    """
+    Early-abort checks for a streamed answer. Items must open with "@context" (as every
+    template does) and, with `validate`, their dataDescriptor is checked as soon as it
+    has streamed in; free-text answers only have to be a JSON object.
+    """
+    if deterministic:
+        return JsonStreamMonitor()
+    validators = {"dataDescriptor": descriptor_problems} if validate else None
+    return JsonStreamMonitor(first_key="@context", validators=validators)
+
+def generate_metadata(json_input, resource_type, bypass_cache=None, deterministic=False, column_types=None,
+                      stream=None, **kwargs):
+    """
+    Generate IUDX-compliant JSON-LD metadata for the given input JSON and resource type.
+    
+    Args:
+        json_input (dict): The input JSON data.
+        resource_type (str): The type of resource (e.g., "GeoJSON", "EnergyMeter").
+        bypass_cache (bool): Skip the response cache lookup (defaults to IUDX_LLM_CACHE_BYPASS).
+        deterministic (bool): Only ask the model for free-text fields (see plan_generation).
+        column_types (dict): Dataset-wide dataSchema per property for deterministic mode.
+        stream (bool): Stream the response and abort it as soon as it diverges from the
+            expected output (defaults to IUDX_LLM_STREAM).
+        **kwargs: Additional parameters like location_address, city, polygon, name, etc.
+    
+    Returns:
+        dict: The generated IUDX-compliant JSON-LD metadata.
+
+    Raises:
+        ValueError: When the response cannot be parsed or fails schema validation.
+    """
+    messages, finish = plan_generation(json_input, resource_type, deterministic, column_types, **kwargs)
+
+    def checked(raw_output):
+        metadata = finish(raw_output)
+        # Never return (or cache) an item that does not match the IUDX schema for its resource type
+        problems = schemas.validate_item(metadata, resource_type)
+        if problems:
+            raise ValueError("schema validation failed: " + "; ".join(problems))
+        return metadata
+
+    # Query the model (or reuse a cached response for an identical prompt); only items
+    # that parse and pass schema validation are cached
+    return cached_completion(
+        client,
+        model=MODEL,
+        messages=messages,
+        temperature=TEMPERATURE,
+        bypass=bypass_cache,
+        stream=stream,
+        monitor=stream_monitor(deterministic),
+        validate=checked
+    )
+
 # Example usage for all resource types
 if __name__ == "__main__":
     # GeoJSON
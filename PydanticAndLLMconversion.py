@@ -1,11 +1,14 @@
 import os
 import json
-import re
 from pydantic import BaseModel, Field, ValidationError
 from typing import Literal, Union
 from groq import Groq
+from llm_client import ResilientClient
+from json_extract import extract_json
 from dotenv import load_dotenv
-import re
+from dataset_profile import prompt_payload
+from geojson_stream import iter_features
+from prompt_templates import prefix_messages
 
 load_dotenv()
 
@@ -31,49 +34,61 @@ class JsonLdEntity(BaseModel):
 
 
 
-def extract_json(text):
-    text = re.sub(r"```(?:json)?", "", text).strip("`\n ")
-    match = re.search(r"(\[.*\])", text, re.DOTALL)
-    return match.group(1) if match else text
+client = ResilientClient(Groq(api_key=os.getenv("GROQ_API_KEY")))
 
-with open("Museums 2021.geojson", "r") as f:
-    geojson = json.load(f)
+SOURCE = "Museums 2021.geojson"
+# Features converted per request; every request repeats the same instructions and profile
+CHUNK_SIZE = int(os.getenv("IUDX_CONVERT_CHUNK", "25"))
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Profile the dataset in one streaming pass; it only informs the prompt, every feature is converted
+payload = prompt_payload(SOURCE)
 
-prompt = f"""
-Convert the following GeoJSON into JSON-LD format using schema.org vocabulary.
+instructions = f"""
+Convert the GeoJSON features you are given into JSON-LD format using schema.org vocabulary.
 
-GeoJSON:
-{json.dumps(geojson, indent=2)}
+Dataset profile (statistics for every property over all {payload["profile"]["featureCount"]} features):
+{json.dumps(payload["profile"])}
 
-Make sure the output has:
+Representative feature:
+{json.dumps(payload["profileFeature"])}
+
+Make sure each entity has:
 - @context
 - @id
 - @type
 - name
 - location with Place and GeoCoordinates types
 
-Respond with only a valid JSON list of entities.
+Respond with only a valid JSON list of entities, one per feature, in the order given.
 """
 
-chat_completion = client.chat.completions.create(
-    model="llama3-70b-8192",
-    messages=[
-        {"role": "system", "content": "You are a helpful assistant that converts GeoJSON to JSON-LD"},
-        {"role": "user", "content": prompt},
-    ],
-    temperature=0.2,
-)
-
-raw = chat_completion.choices[0].message.content
-try:
-    cleaned = extract_json(raw)
-    jsonld_output = json.loads(cleaned)
-except json.JSONDecodeError:
-    print("LLM output is not valid JSON.")
-    print(raw)
-    exit()
+
+def convert(features):
+    """JSON-LD entities for one chunk of features."""
+    messages = prefix_messages(
+        "You are a helpful assistant that converts GeoJSON to JSON-LD",
+        (instructions, "GeoJSON features (one per line):\n" + "\n".join(json.dumps(feature) for feature in features)),
+    )
+    chat_completion = client.chat.completions.create(model="llama3-70b-8192", messages=messages, temperature=0.2)
+    raw = chat_completion.choices[0].message.content
+    try:
+        return extract_json(raw, expect=list)
+    except ValueError:
+        print("LLM output is not valid JSON.")
+        print(raw)
+        exit()
+
+
+# Features are streamed from disk and converted a chunk at a time
+jsonld_output = []
+chunk = []
+for feature in iter_features(SOURCE):
+    chunk.append(feature)
+    if len(chunk) == CHUNK_SIZE:
+        jsonld_output.extend(convert(chunk))
+        chunk = []
+if chunk:
+    jsonld_output.extend(convert(chunk))
 
 with open("output.jsonld", "w") as f:
     json.dump(jsonld_output, f, indent=2)
@@ -89,4 +104,4 @@ for i, entity in enumerate(jsonld_output):
     except ValidationError as e:
         print(f"Entity {i+1} failed:\n{e}\n")
 
-print(f"\n {valid_count}/{len(jsonld_output)} entities validated.")
+print(f"\n {valid_count}/{len(jsonld_output)} entities validated ({payload['profile']['featureCount']} features).")
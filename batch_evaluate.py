@@ -0,0 +1,191 @@
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from type_inference import MODEL_PATH
+
+CATALOGUE_SUFFIXES = (".jsonld", ".json", ".jsonl")
+
+# Per-process evaluator, set up once by _init_worker
+_evaluator = None
+
+
+def iter_items(path):
+    """
+    Catalogue items in a file: JSONL (one item per line), a `urn:dx:cat:Success`
+    envelope with a `results` list, a plain list of items, or a single item.
+    """
+    with open(path) as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        document = json.load(f)
+    if isinstance(document, dict) and isinstance(document.get("results"), list):
+        yield from document["results"]
+    elif isinstance(document, list):
+        yield from document
+    else:
+        yield document
+
+
+def find_catalogue_files(paths):
+    """Expand directories into the catalogue files they contain."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith(CATALOGUE_SUFFIXES))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_work_units(files, chunk_size):
+    """Chunks of (source, index, item) records; chunking keeps per-task IPC overhead small."""
+    chunk = []
+    for path in files:
+        for index, item in enumerate(iter_items(path)):
+            chunk.append((path, index, item))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_worker(model_path=MODEL_PATH):
+    """Import the evaluator and load the type model once per worker process."""
+    global _evaluator
+    import evaluate_descriptor2
+    from type_inference import get_type_service
+
+    evaluate_descriptor2.type_service = get_type_service(model_path)
+    try:
+        evaluate_descriptor2.type_service.model
+    except Exception as e:
+        print(f"[WARN] Could not load type model {model_path}: {e}", file=sys.stderr)
+    _evaluator = evaluate_descriptor2
+
+
+def _flat_sample(item):
+    if not isinstance(item, dict) or not isinstance(item.get("dataSample"), dict):
+        return None
+    sample = item["dataSample"]
+    return _evaluator.flatten_geojson_feature(sample) if sample.get("type") == "Feature" else sample
+
+
+def _predict_chunk_types(samples):
+    """Type every field of every sample in the chunk with one classifier call."""
+    rows = [(key, value) for sample in samples if sample for key, value in sample.items()]
+    try:
+        predictions = iter(_evaluator.type_service.predict(rows))
+    except Exception as e:
+        print(f"[WARN] Type inference failed: {e}", file=sys.stderr)
+        return [None] * len(samples)
+    return [{key: next(predictions)[0] for key in sample} if sample else None for sample in samples]
+
+
+def evaluate_item(source, index, item, inferred_types=None):
+    """Check one catalogue item's dataDescriptor against its dataSample."""
+    if _evaluator is None:
+        _init_worker()
+    record = {
+        "source": source,
+        "index": index,
+        "id": item.get("id") if isinstance(item, dict) else None,
+        "name": item.get("name") if isinstance(item, dict) else None,
+    }
+    flat_sample = _flat_sample(item)
+    if flat_sample is None:
+        return dict(record, status="REJECTED", errors=[["dataSample", "CRITICAL: item has no dataSample to check against"]])
+
+    status, _, errors = _evaluator.check_descriptor(item.get("dataDescriptor") or {}, flat_sample, inferred_types)
+    return dict(record, status=status, errors=[list(e) for e in errors])
+
+
+def evaluate_chunk(chunk):
+    if _evaluator is None:
+        _init_worker()
+    types = _predict_chunk_types([_flat_sample(item) for _, _, item in chunk])
+    return [evaluate_item(source, index, item, inferred) for (source, index, item), inferred in zip(chunk, types)]
+
+
+def evaluate_catalogue(files, workers=None, chunk_size=64, model_path=MODEL_PATH):
+    """
+    Evaluate every item of the given catalogue files in parallel.
+
+    Args:
+        files (list[str]): Catalogue files (see iter_items).
+        workers (int): Worker processes; defaults to the CPU count. 1 runs in-process.
+        chunk_size (int): Items per work unit sent to a worker.
+
+    Returns:
+        list[dict]: One result per item, in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    units = iter_work_units(files, chunk_size)
+    if workers == 1:
+        _init_worker(model_path)
+        results = [result for chunk in units for result in evaluate_chunk(chunk)]
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+            futures = [pool.submit(evaluate_chunk, chunk) for chunk in units]
+            for future in as_completed(futures):
+                results.extend(future.result())
+    return sorted(results, key=lambda r: (r["source"], r["index"]))
+
+
+def build_report(results, seconds, workers):
+    accepted = sum(1 for r in results if r["status"] == "ACCEPTED")
+    return {
+        "summary": {
+            "items": len(results),
+            "accepted": accepted,
+            "rejected": len(results) - accepted,
+            "workers": workers,
+            "seconds": round(seconds, 3),
+            "items_per_s": round(len(results) / seconds, 1) if seconds else None,
+        },
+        "datasets": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate the dataDescriptors of many catalogue items in parallel.")
+    parser.add_argument("paths", nargs="+", help="Catalogue files (.jsonld/.json/.jsonl) or directories of them")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (1 runs in-process)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Items per work unit")
+    parser.add_argument("--model", default=MODEL_PATH, help="RandomForest type model")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = evaluate_catalogue(find_catalogue_files(args.paths), args.workers, args.chunk_size, args.model)
+    report = build_report(results, time.perf_counter() - started, args.workers)
+
+    if not args.quiet:
+        for r in results:
+            label = r["name"] or r["id"] or f"item {r['index']}"
+            print(f"[{r['status']}] {label} ({r['source']}#{r['index']})")
+            for field, msg in r["errors"]:
+                print(f"  - {field}: {msg}")
+    summary = report["summary"]
+    print(f"Evaluated {summary['items']} items with {summary['workers']} workers in {summary['seconds']}s: "
+          f"{summary['accepted']} ACCEPTED, {summary['rejected']} REJECTED")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if summary["rejected"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
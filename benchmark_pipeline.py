@@ -0,0 +1,304 @@
+import os
+import sys
+import json
+import time
+import glob
+import resource
+import argparse
+import tempfile
+import platform
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+EVAL_DIR = os.path.join(ROOT_DIR, "IUDX_generation_eval")
+
+DEFAULT_DATASETS = [
+    "tubewells.geojson",
+    "Zebra Crossings.geojson",
+    "schools-list (1).geojson",
+] + sorted(os.path.relpath(p, ROOT_DIR) for p in glob.glob(os.path.join(EVAL_DIR, "file*.json")))
+
+# Extra parameters the prompt templates need for each detected resource type
+BENCHMARK_KWARGS = {
+    "EmergencyVehicle": {"city": "Benchmark", "polygon": [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]]},
+    "EnvAQM": {"city": "Benchmark", "polygon": [[[0.0, 0.0], [1.0, 0.0], [1.0, 1.0], [0.0, 0.0]]]},
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def scale_dataset(path, factor, out_dir):
+    """Write a copy of a GeoJSON dataset with every feature repeated `factor` times."""
+    from geojson_stream import FeatureStream
+
+    stream = FeatureStream(path)
+    target = os.path.join(out_dir, f"x{factor}_{os.path.basename(path)}")
+    with open(target, "w") as f:
+        f.write('{"type": "FeatureCollection", "features": [\n')
+        first = True
+        for feature in stream:
+            line = json.dumps(feature)
+            for _ in range(factor):
+                f.write(line if first else ",\n" + line)
+                first = False
+        f.write("\n]}\n")
+    return target
+
+
+class UsageRecorder:
+    """Client shim that forwards requests and accumulates token usage and time spent waiting on the LLM."""
+
+    def __init__(self, client):
+        self.client = client
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.requests = 0
+        self.seconds = 0.0
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        started = time.perf_counter()
+        response = self.client.chat.completions.create(**kwargs)
+        self.seconds += time.perf_counter() - started
+        self.requests += 1
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.prompt_tokens += usage.prompt_tokens or 0
+            self.completion_tokens += usage.completion_tokens or 0
+        return response
+
+    def reset(self):
+        self.prompt_tokens = self.completion_tokens = self.requests = 0
+        self.seconds = 0.0
+
+
+def mock_metadata(sample, dataset_types, static_fields=None):
+    """
+    Plausible generated JSON-LD whose dataDescriptor matches the sample's fields, plus
+    the trailing fields (itemStatus, cos, ...) the resource type's template asks for.
+    """
+    descriptor = {
+        "@context": "https://voc.iudx.org.in/",
+        "type": ["iudx:DataDescriptor"],
+        "dataDescriptorLabel": "Data Descriptor for benchmark dataset",
+        "description": "Describes the data structure of the benchmark dataset.",
+    }
+    for key in sample:
+        descriptor[key] = {
+            "type": ["ValueDescriptor"],
+            "description": f"{key} of the benchmark dataset.",
+            "dataSchema": dataset_types.get(key, "iudx:Text"),
+        }
+    return {
+        "@context": "https://voc.iudx.org.in/",
+        "type": ["iudx:Resource"],
+        "name": "benchmark-dataset",
+        "label": "Benchmark Dataset",
+        "description": "Synthetic response from the benchmark mock LLM.",
+        "tags": ["benchmark"],
+        "location": {"address": "India", "type": "Place"},
+        "dataDescriptor": descriptor,
+        **(static_fields or {}),
+    }
+
+
+def mock_free_text(dataset_types):
+    """Plausible answer to the free-text request of deterministic mode."""
+    return {
+        "name": "benchmark_dataset",
+        "label": "Benchmark Dataset",
+        "description": "Synthetic response from the benchmark mock LLM.",
+        "tags": ["benchmark"],
+        "address": "India",
+        "fields": {key: f"{key} of the benchmark dataset." for key in dataset_types},
+    }
+
+
+def run_dataset(path, modules, recorder, state, out_dir, deterministic=False, writer=None):
+    """Run every pipeline stage for one dataset and return its timings."""
+    from geojson_stream import FeatureStream
+    from dataset_profile import representative_sample
+    from column_inference import infer_dataset_types
+    from output_writer import JsonWriter
+
+    writer = writer or JsonWriter()
+
+    generator, detect_resource_type, evaluator = modules
+    timings = {}
+
+    started = time.perf_counter()
+    sample = representative_sample(path)
+    timings["sample"] = time.perf_counter() - started
+    is_feature = sample.get("type") == "Feature"
+
+    # The mock LLM answers with a descriptor for this dataset's fields
+    fields = evaluator.flatten_geojson_feature(sample) if is_feature else sample
+    dataset_types = infer_dataset_types(path)
+    resource_type = detect_resource_type(sample, filename=path)
+    config = generator.resource_config[resource_type]
+    deterministic = deterministic and "static_fields" in config
+    response = mock_free_text(dataset_types) if deterministic else mock_metadata(fields, dataset_types, config.get("static_fields"))
+    state["response"] = json.dumps(response)
+    recorder.reset()
+
+    started = time.perf_counter()
+    options = dict(BENCHMARK_KWARGS.get(resource_type, {}))
+    if deterministic:
+        options.update(deterministic=True, column_types=dataset_types)
+    try:
+        metadata = generator.generate_metadata(sample, resource_type, **options)
+    except ValueError as e:
+        # An item that fails the IUDX schema is never returned; there is nothing to evaluate or write
+        metadata, schema_error = None, str(e)
+    timings["generate_metadata"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    features = 0
+    for feature in FeatureStream(path):
+        evaluator.flatten_geojson_feature(feature)
+        features += 1
+    flat_sample = evaluator.flatten_geojson_feature(sample) if is_feature else dict(sample)
+    timings["flatten_geojson_feature"] = time.perf_counter() - started
+
+    if metadata is None:
+        status, errors = "SCHEMA_REJECTED", [schema_error]
+        print(f"[bench] {path}: {schema_error}", file=sys.stderr)
+    else:
+        started = time.perf_counter()
+        status, fixed_descriptor, errors = evaluator.check_descriptor(metadata.get("dataDescriptor", {}), flat_sample)
+        timings["evaluate_descriptor"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        metadata["dataDescriptor"] = fixed_descriptor
+        output_file = os.path.join(out_dir, f"output_{os.path.splitext(os.path.basename(path))[0]}.jsonld")
+        writer.write_items(output_file, [metadata])
+        timings["write_jsonld"] = time.perf_counter() - started
+
+    total = sum(timings.values())
+    return {
+        "dataset": os.path.relpath(path, ROOT_DIR) if path.startswith(ROOT_DIR) else os.path.basename(path),
+        "bytes": os.path.getsize(path),
+        "features": max(features, 1),
+        "resource_type": resource_type,
+        "deterministic": deterministic,
+        "status": status,
+        "errors": len(errors),
+        "stages_s": {k: round(v, 6) for k, v in timings.items()},
+        "total_s": round(total, 6),
+        "features_per_s": round(max(features, 1) / total, 1) if total else None,
+        "prompt_tokens": recorder.prompt_tokens,
+        "completion_tokens": recorder.completion_tokens,
+        "llm_requests": recorder.requests,
+        "llm_s": round(recorder.seconds, 6),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generate -> flatten -> evaluate -> write pipeline against a mock LLM.")
+    parser.add_argument("datasets", nargs="*", help="Datasets to run (defaults to the bundled ones)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mock LLM latency per request, in seconds")
+    parser.add_argument("--scale", type=int, nargs="*", default=[10], help="Also run GeoJSON datasets scaled up by these factors")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per dataset; the fastest is reported")
+    parser.add_argument("--deterministic", action="store_true", help="Build structural fields locally and only ask the LLM for free text")
+    parser.add_argument("--json-backend", default="auto", help="Output encoder: auto, orjson, ujson or json")
+    parser.add_argument("--compact", action="store_true", help="Write outputs without indentation")
+    parser.add_argument("--backends", nargs="+", default=["groq"], choices=["groq", "openai", "llamacpp"],
+                        help="LLM backends to benchmark in turn; groq and openai are pointed at the mock server")
+    parser.add_argument("--local-url", help="Benchmark the openai backend against this server instead of the mock")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    import mock_groq_server
+
+    state = {"response": "{}"}
+    server = mock_groq_server.start_server(responder=lambda messages: state["response"], latency=args.latency)
+    work_dir = tempfile.mkdtemp(prefix="iudx_bench_")
+
+    # Point every client at the mock and keep the response cache out of the measurement
+    os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY") or "benchmark"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["IUDX_LLM_CACHE"] = os.path.join(work_dir, "cache.sqlite")
+    os.environ["IUDX_LLM_CACHE_BYPASS"] = "1"
+
+    started = time.perf_counter()
+    sys.path.insert(0, EVAL_DIR)
+    import generate_iudx_metadata2
+    from generate_IUDX_metadata import detect_resource_type
+    import evaluate_descriptor2
+    from prompt_templates import prefix_metrics
+    import_seconds = time.perf_counter() - started
+
+    # Load the type classifier up front so its cold start is reported on its own
+    started = time.perf_counter()
+    evaluate_descriptor2.type_service.model
+    model_load_seconds = time.perf_counter() - started
+
+    modules = (generate_iudx_metadata2, detect_resource_type, evaluate_descriptor2)
+
+    datasets = [os.path.join(ROOT_DIR, d) for d in (args.datasets or DEFAULT_DATASETS)]
+    for path in list(datasets):
+        if path.endswith(".geojson"):
+            datasets.extend(scale_dataset(path, factor, work_dir) for factor in args.scale if factor > 1)
+
+    from output_writer import JsonWriter
+    writer = JsonWriter(compact=args.compact, backend=args.json_backend)
+
+    results = []
+    backends = {}
+    for backend_name in args.backends:
+        options = {}
+        if backend_name == "openai":
+            options["base_url"] = args.local_url or f"http://127.0.0.1:{server.server_address[1]}/v1"
+        generate_iudx_metadata2.use_backend(backend_name, **options)
+        recorder = UsageRecorder(generate_iudx_metadata2.client)
+        generate_iudx_metadata2.client = recorder
+
+        backend_results = []
+        for path in datasets:
+            runs = [run_dataset(path, modules, recorder, state, work_dir, args.deterministic, writer) for _ in range(args.repeat)]
+            best = dict(min(runs, key=lambda r: r["total_s"]), backend=backend_name)
+            backend_results.append(best)
+            print(f"[bench] {backend_name} {best['dataset']}: {best['total_s']:.3f}s, {best['features_per_s']} features/s", file=sys.stderr)
+        results.extend(backend_results)
+
+        llm_seconds = sum(r["llm_s"] for r in backend_results)
+        completion_tokens = sum(r["completion_tokens"] for r in backend_results)
+        backends[backend_name] = dict(
+            generate_iudx_metadata2.backend.stats(),
+            requests=sum(r["llm_requests"] for r in backend_results),
+            prompt_tokens=sum(r["prompt_tokens"] for r in backend_results),
+            completion_tokens=completion_tokens,
+            llm_s=round(llm_seconds, 6),
+            completion_tokens_per_s=round(completion_tokens / llm_seconds, 1) if llm_seconds else None,
+        )
+
+    server.shutdown()
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "mock_latency_s": args.latency,
+        "json_backend": writer.backend,
+        "import_s": round(import_seconds, 6),
+        "model_load_s": round(model_load_seconds, 6),
+        "prompt_prefix": prefix_metrics.stats(),
+        "backends": backends,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
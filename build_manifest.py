@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+MANIFEST_NAME = ".iudx_build.json"
+MANIFEST_VERSION = 1
+
+
+def digest(value):
+    """sha256 of a JSON-serialisable value (key order does not matter)."""
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BuildManifest:
+    """
+    Make-style record of what every generated output was built from.
+
+    Each output maps to the digests of its inputs (dataset, prompt template, resource
+    config, model settings, ...). An output is up to date when it still exists and all of
+    those digests are unchanged, so editing one template only rebuilds the datasets of
+    that resource type.
+
+    Dataset hashes are cached by (size, mtime) so unchanged inputs are not re-read on
+    every run. Paths are stored relative to the manifest's directory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.base_dir = os.path.dirname(os.path.abspath(path))
+        self.lock = threading.Lock()
+        self.outputs = {}
+        self.files = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.outputs = data.get("outputs", {})
+                self.files = data.get("files", {})
+
+    @classmethod
+    def for_directory(cls, directory):
+        return cls(os.path.join(directory, MANIFEST_NAME))
+
+    def _key(self, path):
+        return os.path.relpath(os.path.abspath(path), self.base_dir)
+
+    def file_digest(self, path):
+        """sha256 of a file's contents, reusing the stored hash while its size and mtime match."""
+        stat = os.stat(path)
+        key = self._key(path)
+        with self.lock:
+            cached = self.files.get(key)
+        if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["sha256"]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        with self.lock:
+            self.files[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha.hexdigest()}
+        return sha.hexdigest()
+
+    def changes(self, output, inputs):
+        """
+        Why `output` needs rebuilding: the names of the inputs whose digests differ from
+        the recorded build, or ["missing output"] / ["never built"]. Empty when up to date.
+        """
+        with self.lock:
+            entry = self.outputs.get(self._key(output))
+        if entry is None:
+            return ["never built"]
+        if not os.path.exists(output):
+            return ["missing output"]
+        recorded = entry["inputs"]
+        return sorted(name for name in set(recorded) | set(inputs) if recorded.get(name) != inputs.get(name))
+
+    def is_current(self, output, inputs):
+        return not self.changes(output, inputs)
+
+    def record(self, output, inputs):
+        with self.lock:
+            self.outputs[self._key(output)] = {"inputs": dict(inputs), "built_at": time.time()}
+
+    def forget(self, output):
+        with self.lock:
+            self.outputs.pop(self._key(output), None)
+
+    def save(self):
+        with self.lock:
+            data = {"version": MANIFEST_VERSION, "outputs": self.outputs, "files": self.files}
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.path)
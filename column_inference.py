@@ -0,0 +1,144 @@
+import numpy as np
+from geojson_stream import FeatureStream
+
+# Patterns applied to whole string columns at once
+INTEGER_PATTERN = r"[+-]?\d+"
+NUMBER_PATTERN = r"[+-]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?"
+BOOLEAN_PATTERN = r"(?i:true|false)"
+DATETIME_PATTERN = (
+    r"\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\d{1,2}[-/ ](?:[A-Za-z]{3,9}|\d{1,2})[-/ ]\d{2,4}"
+    r"|\d{2}:\d{2}:\d{2}"
+)
+
+
+def collect_columns(features):
+    """
+    Pivot features into columns: {property: [value for every feature]}.
+
+    Missing properties become None so that every column has one entry per feature.
+    GeoJSON geometries are collected into a "geometry" column.
+    """
+    columns = {}
+    count = 0
+    for feature in features:
+        is_feature = isinstance(feature, dict) and feature.get("type") == "Feature"
+        record = dict(feature.get("properties") or {}) if is_feature else dict(feature)
+        if is_feature:
+            record["geometry"] = feature.get("geometry")
+        for key, value in record.items():
+            column = columns.get(key)
+            if column is None:
+                column = columns[key] = [None] * count
+            column.append(value)
+        count += 1
+        for column in columns.values():
+            if len(column) < count:
+                column.append(None)
+    return columns
+
+
+def _geometry_kind(value, is_geometry):
+    """GeoJSON geometry type of a value ("LineString", ...); a bare [lon, lat] pair is a Point."""
+    if isinstance(value, dict):
+        return value["type"] if is_geometry(value) else None
+    if isinstance(value, list) and len(value) == 2 and all(isinstance(x, float) for x in value):
+        return "Point"
+    return None
+
+
+def infer_column_type(values, tolerance=0.0):
+    """
+    Classify a whole column of values in bulk.
+
+    A type is chosen when at most `tolerance` (fraction) of the non-null values disagree
+    with it. Checks run from most to least specific: a geometry type (Point, LineString,
+    Polygon, ... as descriptor_synthesis.geometry_schema names them), Boolean, Integer,
+    Number, DateTime, and Text as the fallback.
+
+    Returns:
+        str: The inferred iudx dataSchema, or None if the column has no values.
+    """
+    # pandas is imported here so importing the patterns above stays cheap; descriptor_synthesis
+    # imports this module
+    import pandas as pd
+    from descriptor_synthesis import geometry_schema, is_geometry
+
+    series = pd.Series(values, dtype=object)
+    series = series[series.notna() & (series != "")]
+    total = len(series)
+    if total == 0:
+        return None
+    allowed = int(np.floor(total * tolerance))
+
+    def matches(mask):
+        return total - int(mask.sum()) <= allowed
+
+    kinds = series.map(type)
+    is_bool = (kinds == bool).to_numpy()
+    is_int = (kinds == int).to_numpy()
+    is_float = (kinds == float).to_numpy()
+    is_str = (kinds == str).to_numpy()
+    is_container = (kinds == dict).to_numpy() | (kinds == list).to_numpy()
+
+    if is_container.any():
+        geometry_kinds = series[is_container].map(lambda value: _geometry_kind(value, is_geometry))
+        common = geometry_kinds.dropna().mode()
+        if len(common) and matches(geometry_kinds == common.iloc[0]):
+            return geometry_schema(common.iloc[0])
+
+    strings = series[is_str].astype(str).str.strip()
+    str_bool = np.zeros(total, dtype=bool)
+    str_int = np.zeros(total, dtype=bool)
+    str_num = np.zeros(total, dtype=bool)
+    str_datetime = np.zeros(total, dtype=bool)
+    if len(strings):
+        str_bool[is_str] = strings.str.fullmatch(BOOLEAN_PATTERN).to_numpy()
+        str_int[is_str] = strings.str.fullmatch(INTEGER_PATTERN).to_numpy()
+        str_num[is_str] = strings.str.fullmatch(NUMBER_PATTERN).to_numpy()
+        str_datetime[is_str] = strings.str.fullmatch(DATETIME_PATTERN).to_numpy()
+
+    if matches(is_bool | str_bool):
+        return "iudx:Boolean"
+    if matches(is_int | str_int):
+        return "iudx:Integer"
+    if matches(is_int | is_float | str_num):
+        return "iudx:Number"
+    if matches(str_datetime):
+        return "iudx:DateTime"
+    return "iudx:Text"
+
+
+def infer_column_types(columns, tolerance=0.0):
+    """Infer a dataSchema for every column; columns without any values are left out."""
+    types = {}
+    for key, values in columns.items():
+        inferred = infer_column_type(values, tolerance)
+        if inferred is not None:
+            types[key] = inferred
+    return types
+
+
+def infer_dataset_types(path, tolerance=0.0):
+    """
+    Infer field types from every feature of a dataset rather than a single sample.
+
+    Non-GeoJSON JSON documents are treated as a single record.
+    """
+    stream = FeatureStream(path)
+    columns = collect_columns(stream)
+    if not columns and isinstance(stream.header, dict):
+        columns = collect_columns([stream.header])
+    return infer_column_types(columns, tolerance)
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for path in sys.argv[1:]:
+        started = time.perf_counter()
+        types = infer_dataset_types(path)
+        print(f"{path} ({time.perf_counter() - started:.3f}s)")
+        for key, value in types.items():
+            print(f"  {key}: {value}")
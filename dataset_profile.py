@@ -0,0 +1,250 @@
+import json
+import random
+from geojson_stream import FeatureStream
+
+MAX_TRACKED_VALUES = 1000   # distinct values remembered per property for cardinality
+MAX_EXAMPLES = 3            # example values kept per property
+MAX_EXAMPLE_LENGTH = 80     # long strings are truncated in examples
+
+
+def value_kind(value):
+    """JSON kind of a value: null, boolean, integer, number, string, object or array."""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, dict):
+        return "object"
+    return "array"
+
+
+def _as_number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _short(value):
+    if isinstance(value, str) and len(value) > MAX_EXAMPLE_LENGTH:
+        return value[:MAX_EXAMPLE_LENGTH] + "..."
+    return value
+
+
+class PropertyStats:
+    """Running statistics for one property, updated one value at a time."""
+
+    def __init__(self):
+        self.count = 0
+        self.nulls = 0
+        self.kinds = {}
+        self.distinct = set()
+        self.distinct_overflow = False
+        self.min = None
+        self.max = None
+        self.examples = []
+        self.kind_examples = {}
+
+    def add(self, value):
+        self.count += 1
+        kind = value_kind(value)
+        if value is None or value == "":
+            self.nulls += 1
+            kind = "null" if value is None else "empty"
+        self.kinds[kind] = self.kinds.get(kind, 0) + 1
+        if kind in ("null", "empty"):
+            return
+        self.kind_examples.setdefault(kind, _short(value))
+
+        key = json.dumps(value, sort_keys=True) if kind in ("object", "array") else value
+        if key not in self.distinct:
+            if len(self.distinct) < MAX_TRACKED_VALUES:
+                self.distinct.add(key)
+                if len(self.examples) < MAX_EXAMPLES:
+                    self.examples.append(_short(value))
+            else:
+                self.distinct_overflow = True
+
+        number = _as_number(value)
+        if number is not None:
+            self.min = number if self.min is None else min(self.min, number)
+            self.max = number if self.max is None else max(self.max, number)
+
+    def summary(self, total):
+        missing = total - self.count
+        summary = {
+            "types": self.kinds,
+            "nullRate": round((self.nulls + missing) / total, 3) if total else 0.0,
+            "cardinality": f">={MAX_TRACKED_VALUES}" if self.distinct_overflow else len(self.distinct),
+            "examples": self.examples,
+        }
+        if self.min is not None:
+            summary["min"] = self.min
+            summary["max"] = self.max
+        return summary
+
+    def representative(self):
+        """An example value of the most common non-null kind, or None."""
+        if not self.kind_examples:
+            return None
+        kind = max(self.kind_examples, key=lambda k: self.kinds[k])
+        return self.kind_examples[kind]
+
+
+def _signature(feature):
+    """Which properties are filled and with what kind; used to pick diverse exemplars."""
+    properties = feature.get("properties") or {}
+    return frozenset((k, value_kind(v)) for k, v in properties.items() if v not in (None, ""))
+
+
+class DatasetProfile:
+    """
+    One-pass profile of a GeoJSON dataset.
+
+    Feed features with `add()` (or use `profile_dataset()`); memory stays bounded by
+    the number of properties, not the number of features.
+    """
+
+    def __init__(self, max_exemplars=3):
+        self.max_exemplars = max_exemplars
+        self.feature_count = 0
+        self.properties = {}
+        self.geometry_types = {}
+        self.bbox = None
+        self.geometry_example = None
+        self.distinct_exemplars = []
+        self._signatures = set()
+        self._reservoir = []
+        self._random = random.Random(0)
+        self.header = {}
+
+    def add(self, feature):
+        self.feature_count += 1
+        for key, value in (feature.get("properties") or {}).items():
+            stats = self.properties.get(key)
+            if stats is None:
+                stats = self.properties[key] = PropertyStats()
+            stats.add(value)
+
+        geometry = feature.get("geometry") or {}
+        geometry_type = geometry.get("type", "null")
+        self.geometry_types[geometry_type] = self.geometry_types.get(geometry_type, 0) + 1
+        if geometry_type == "Point":
+            self._extend_bbox(geometry.get("coordinates") or [])
+        if self.geometry_example is None and geometry:
+            self.geometry_example = geometry
+
+        # Prefer features that fill properties in a way not seen before ...
+        if len(self.distinct_exemplars) < self.max_exemplars:
+            signature = _signature(feature)
+            if signature not in self._signatures:
+                self._signatures.add(signature)
+                self.distinct_exemplars.append(feature)
+                return
+
+        # ... and spread the remaining picks uniformly over the dataset
+        if len(self._reservoir) < self.max_exemplars:
+            self._reservoir.append(feature)
+        else:
+            slot = self._random.randrange(self.feature_count)
+            if slot < self.max_exemplars:
+                self._reservoir[slot] = feature
+
+    @property
+    def exemplars(self):
+        """Up to `max_exemplars` diverse features seen so far."""
+        exemplars = list(self.distinct_exemplars)
+        for feature in self._reservoir:
+            if len(exemplars) >= self.max_exemplars:
+                break
+            exemplars.append(feature)
+        return exemplars
+
+    def _extend_bbox(self, coordinates):
+        if len(coordinates) < 2:
+            return
+        x, y = coordinates[0], coordinates[1]
+        if self.bbox is None:
+            self.bbox = [x, y, x, y]
+        else:
+            self.bbox = [min(self.bbox[0], x), min(self.bbox[1], y), max(self.bbox[2], x), max(self.bbox[3], y)]
+
+    def summary(self):
+        """Compact per-property statistics."""
+        summary = {
+            "featureCount": self.feature_count,
+            "geometryTypes": self.geometry_types,
+            "properties": {k: s.summary(self.feature_count) for k, s in self.properties.items()},
+        }
+        if self.bbox is not None:
+            summary["bbox"] = self.bbox
+        return summary
+
+    def profile_feature(self):
+        """Synthetic Feature with one representative value per property."""
+        feature = {
+            "type": "Feature",
+            "properties": {k: s.representative() for k, s in self.properties.items()},
+            "geometry": self.geometry_example or {},
+        }
+        if "filename" in self.header:
+            feature["filename"] = self.header["filename"]
+        elif "name" in self.header:
+            feature["filename"] = self.header["name"]
+        return feature
+
+
+def profile_dataset(path, max_exemplars=3):
+    """Profile a GeoJSON file in one streaming pass."""
+    profile = DatasetProfile(max_exemplars=max_exemplars)
+    stream = FeatureStream(path)
+    for feature in stream:
+        profile.add(feature)
+    profile.header = stream.header if isinstance(stream.header, dict) else {}
+    return profile
+
+
+def representative_sample(path):
+    """
+    Input record to put into a metadata prompt.
+
+    For a FeatureCollection this is the synthetic profile feature; single Features and
+    other JSON documents are returned unchanged.
+    """
+    profile = profile_dataset(path, max_exemplars=1)
+    if profile.feature_count == 0:
+        return profile.header
+    if profile.feature_count == 1:
+        return profile.exemplars[0]
+    return profile.profile_feature()
+
+
+def prompt_payload(path, max_exemplars=3):
+    """Profile plus a few diverse exemplar features; its size does not grow with the dataset."""
+    profile = profile_dataset(path, max_exemplars=max_exemplars)
+    return {
+        "profile": profile.summary(),
+        "profileFeature": profile.profile_feature(),
+        "exemplars": profile.exemplars,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    for path in sys.argv[1:]:
+        payload = json.dumps(prompt_payload(path))
+        print(f"{path}: {len(payload)} characters")
+        print(payload[:2000])
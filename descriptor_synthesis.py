@@ -0,0 +1,201 @@
+import os
+import re
+import json
+
+from column_inference import collect_columns, infer_column_types
+from json_extract import extract_json
+
+IUDX_CONTEXT = "https://voc.iudx.org.in/"
+GEOMETRY_DESCRIPTION = "Geographical representation corresponding to this observation."
+GEOMETRY_TYPES = {"Point", "MultiPoint", "LineString", "MultiLineString", "Polygon", "MultiPolygon",
+                  "GeometryCollection"}
+
+# Fixed instructions for the free-text request; only the dataset payload after them changes
+FREE_TEXT_INSTRUCTIONS = """You write the human-readable parts of IUDX metadata for a dataset. The structure, data types and identifiers are generated elsewhere; do not produce them.
+
+Given the fields of a dataset (with their IUDX data types and example values), return only a JSON object of this form:
+
+{
+  "name": "<snake_case_filename_without_extension>",
+  "label": "<Human Readable Title>",
+  "description": "<Meaningful summary of the dataset>",
+  "tags": ["<relevant tags such as geospatial themes, location, topic, source (like osm), etc.>"],
+  "address": "<City/State/India>",
+  "fields": {
+    "<each field name>": "<one sentence describing the field>"
+  }
+}"""
+
+
+def snake_case(text):
+    """'Zebra Crossings.geojson' -> 'zebra_crossings'."""
+    stem = os.path.splitext(os.path.basename(text))[0]
+    return re.sub(r"[^0-9a-zA-Z]+", "_", stem).strip("_").lower()
+
+
+def sample_properties(sample):
+    """The properties of a Feature sample, or the record itself for plain JSON inputs."""
+    if sample.get("type") == "Feature":
+        return dict(sample.get("properties") or {})
+    return {k: v for k, v in sample.items() if k != "filename"}
+
+
+def sample_column_types(sample):
+    """dataSchema of every property of a single sample."""
+    return infer_column_types(collect_columns([sample_properties(sample)]))
+
+
+def is_geometry(value):
+    """True for a GeoJSON geometry object such as {"type": "LineString", "coordinates": [...]}."""
+    return (isinstance(value, dict) and value.get("type") in GEOMETRY_TYPES
+            and ("coordinates" in value or "geometries" in value))
+
+
+def geometry_schema(kind):
+    """'LineString' -> 'iudx:LineString'."""
+    return f"iudx:{kind[0].upper()}{kind[1:]}"
+
+
+def geometry_type(sample):
+    """
+    Type of the sample's geometry: the Feature geometry, else the first property whose
+    value is a GeoJSON geometry (e.g. a `location` LineString in a plain JSON record).
+    """
+    if not isinstance(sample, dict):
+        return None
+    if is_geometry(sample.get("geometry")):
+        return sample["geometry"]["type"]
+    for value in sample_properties(sample).values():
+        if is_geometry(value):
+            return value["type"]
+    return None
+
+
+def field_descriptor(key, value, column_type=None):
+    """
+    Descriptor entry for one property: a ValueDescriptor typed from its geometry or
+    `column_type`, or for a nested object a group with one entry per member.
+    """
+    if is_geometry(value):
+        return {"type": ["ValueDescriptor"], "description": "", "dataSchema": geometry_schema(value["type"])}
+    if isinstance(value, dict) and value:
+        group = {"type": [key[0].upper() + key[1:]]}
+        member_types = sample_column_types(value)
+        for member, member_value in value.items():
+            group[member] = field_descriptor(member, member_value, member_types.get(member))
+        return group
+    return {"type": ["ValueDescriptor"], "description": "", "dataSchema": column_type or "iudx:Text"}
+
+
+def build_structure(sample, column_types, metadata, static_fields):
+    """
+    The non-creative part of the metadata, built from the sample and its column types.
+
+    Free-text values (label, description, tags, address, per-field descriptions) are
+    left empty for `merge_free_text` to fill. Key order follows the prompt template.
+
+    Args:
+        sample (dict): The input record (a GeoJSON Feature or a plain JSON object).
+        column_types (dict): dataSchema per property, e.g. from infer_dataset_types().
+        metadata (dict): The resource type's fixed metadata from resource_config.
+        static_fields (dict): Trailing fixed fields (itemStatus, cos, ownerUserId, instance).
+    """
+    additional = metadata.get("additional_fields", {})
+    structure = {
+        "@context": IUDX_CONTEXT,
+        "type": ["iudx:Resource"],
+        "id": "",
+        "name": snake_case(sample["filename"]) if sample.get("filename") else "",
+        "label": "",
+        "description": "",
+        "tags": [],
+        "apdURL": metadata.get("apdURL", ""),
+    }
+    for key in ("crs", "datum"):
+        if key in additional:
+            structure[key] = additional[key]
+    structure["location"] = {"address": "", "type": "Place"}
+    structure["accessPolicy"] = metadata.get("accessPolicy", "")
+    structure["resourceType"] = metadata.get("resourceType", "")
+    if "ogcResourceInfo" in additional:
+        structure["ogcResourceInfo"] = dict(additional["ogcResourceInfo"])
+        if geometry_type(sample):
+            structure["ogcResourceInfo"]["geometryType"] = geometry_type(sample)
+    structure["provider"] = ""
+    structure["resourceServer"] = ""
+    structure["resourceGroup"] = ""
+    structure["dataSample"] = sample
+
+    descriptor = {
+        "@context": IUDX_CONTEXT,
+        "type": ["iudx:DataDescriptor"],
+        "dataDescriptorLabel": "",
+        "description": "",
+    }
+    if is_geometry(sample.get("geometry")):
+        descriptor["geometry"] = {
+            "type": ["ValueDescriptor"],
+            "description": GEOMETRY_DESCRIPTION,
+            "dataSchema": geometry_schema(sample["geometry"]["type"]),
+        }
+    for key, value in sample_properties(sample).items():
+        descriptor[key] = field_descriptor(key, value, column_types.get(key))
+    structure["dataDescriptor"] = descriptor
+    structure.update(static_fields)
+    return structure
+
+
+def free_text_prompt(sample, column_types):
+    """
+    (static, payload) prompt asking only for the free-text fields.
+
+    The payload lists each field with its type and an example value instead of the
+    whole output skeleton, so both the prompt and the answer stay short.
+    """
+    fields = {}
+
+    def add(entries, values, prefix=""):
+        # Members of nested objects are listed under dotted names, e.g. "roadStartPoint.name"
+        for key, entry in entries.items():
+            if "dataSchema" in entry:
+                fields[prefix + key] = {"dataSchema": entry["dataSchema"], "example": values.get(key)}
+            elif isinstance(entry, dict) and key != "type":
+                add(entry, values.get(key) or {}, f"{prefix}{key}.")
+
+    properties = sample_properties(sample)
+    add({key: field_descriptor(key, value, column_types.get(key)) for key, value in properties.items()}, properties)
+    payload = {"filename": sample.get("filename"), "geometryType": geometry_type(sample), "fields": fields}
+    return FREE_TEXT_INSTRUCTIONS, "## Dataset:\n" + json.dumps(payload, indent=2, default=str)
+
+
+def parse_free_text(raw_output):
+    """The JSON object in a free-text response."""
+    return extract_json(raw_output)
+
+
+def merge_free_text(structure, free_text):
+    """Fill the free-text slots of `structure` from the model's answer (missing ones get defaults)."""
+    label = free_text.get("label") or structure["name"].replace("_", " ").title() or "Dataset"
+    structure["name"] = structure["name"] or snake_case(free_text.get("name") or label)
+    structure["label"] = label
+    structure["description"] = free_text.get("description") or f"{label} dataset."
+    structure["tags"] = list(free_text.get("tags") or [])
+    structure["location"]["address"] = free_text.get("address") or "India"
+
+    descriptor = structure["dataDescriptor"]
+    descriptor["dataDescriptorLabel"] = f"Data Descriptor for {label}"
+    descriptor["description"] = f"Describes the data structure of the {label} dataset."
+    descriptions = free_text.get("fields") or {}
+
+    def fill(entries, prefix=""):
+        for key, value in entries.items():
+            if not isinstance(value, dict):
+                continue
+            if value.get("description") == "":
+                value["description"] = descriptions.get(prefix + key) or descriptions.get(key) \
+                    or f"{prefix + key} of the {label} dataset."
+            elif "ValueDescriptor" not in value.get("type", []):
+                fill(value, f"{prefix}{key}.")
+
+    fill(descriptor)
+    return structure
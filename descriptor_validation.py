@@ -0,0 +1,158 @@
+from typing import Dict, List
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator
+from iudx_vocabulary import get_vocabulary
+
+# dataDescriptor members that describe the descriptor itself rather than a field
+DESCRIPTOR_META_KEYS = {"@context", "type", "dataDescriptorLabel", "description"}
+
+
+class FieldDescriptor(BaseModel):
+    type: List[str]
+    description: str
+    dataSchema: str
+
+    @field_validator("dataSchema")
+    def validate_data_schema(cls, v):
+        if not v.startswith("iudx:"):
+            raise ValueError("dataSchema must start with 'iudx:'")
+        return v
+
+
+# Validates a whole {field: descriptor} mapping in one call
+FIELDS_ADAPTER = TypeAdapter(Dict[str, FieldDescriptor])
+
+
+def field_entries(descriptor: Dict) -> Dict:
+    """The per-field members of a dataDescriptor (or of a nested group)."""
+    return {k: v for k, v in descriptor.items() if k not in DESCRIPTOR_META_KEYS}
+
+
+def is_group(entry) -> bool:
+    """
+    True for a nested group of fields, e.g. "deviceInfo": {"type": ["Device"],
+    "deviceName": {...}}: typed, but not a ValueDescriptor and without a dataSchema.
+    """
+    if not isinstance(entry, dict) or "dataSchema" in entry:
+        return False
+    kinds = entry.get("type")
+    return isinstance(kinds, list) and "ValueDescriptor" not in kinds
+
+
+def check_field(field, vocabulary=None) -> List[str]:
+    """
+    Hand-compiled equivalent of FieldDescriptor validation for one field.
+
+    When a vocabulary snapshot (iudx_vocabulary.Vocabulary) is given, dataSchema must
+    also name a known IUDX class. Returns the list of problems (empty when the field is
+    valid) instead of raising.
+    """
+    if not isinstance(field, dict):
+        return ["descriptor must be an object"]
+    errors = []
+    kinds = field.get("type")
+    if kinds is None:
+        errors.append("type: field required")
+    elif not isinstance(kinds, (list, tuple)) or not all(isinstance(k, str) for k in kinds):
+        errors.append("type: must be a list of strings")
+    description = field.get("description")
+    if description is None:
+        errors.append("description: field required")
+    elif not isinstance(description, str):
+        errors.append("description: must be a string")
+    schema = field.get("dataSchema")
+    if schema is None:
+        errors.append("dataSchema: field required")
+    elif not isinstance(schema, str):
+        errors.append("dataSchema: must be a string")
+    elif not schema.startswith("iudx:"):
+        errors.append("dataSchema: must start with 'iudx:'")
+    elif vocabulary is not None and not vocabulary.is_data_schema(schema):
+        errors.append(f"dataSchema: {schema} is not in the IUDX vocabulary")
+    return errors
+
+
+def validate_fields(fields: Dict, vocabulary=None) -> Dict[str, List[str]]:
+    """
+    Validate every field descriptor at once; returns {field: [problems]} for the invalid ones.
+
+    `vocabulary` defaults to the local snapshot from iudx_vocabulary (if one has been
+    built); pass False to skip the vocabulary check.
+    """
+    if vocabulary is None:
+        vocabulary = get_vocabulary()
+    vocabulary = vocabulary or None
+    errors = {}
+    for key, field in fields.items():
+        problems = _check_entry(field, vocabulary)
+        if problems:
+            errors[key] = problems
+    return errors
+
+
+def _check_entry(entry, vocabulary) -> List[str]:
+    """check_field for a field; a group's own problems are its children's, prefixed with their paths."""
+    if not is_group(entry):
+        return check_field(entry, vocabulary)
+    children = field_entries(entry)
+    if not children:
+        return ["group has no fields"]
+    problems = []
+    for key, child in children.items():
+        problems.extend(f"{key}.{problem}" if is_group(child) else f"{key}: {problem}"
+                        for problem in _check_entry(child, vocabulary))
+    return problems
+
+
+def validate_fields_pydantic(fields: Dict) -> Dict[str, List[str]]:
+    """
+    Same result as validate_fields(fields, vocabulary=False) for flat descriptors, using
+    the FieldDescriptor TypeAdapter; the vocabulary snapshot is not consulted.
+    """
+    try:
+        FIELDS_ADAPTER.validate_python(fields)
+        return {}
+    except ValidationError as e:
+        errors = {}
+        for error in e.errors():
+            location = error["loc"]
+            detail = ".".join(str(part) for part in location[1:])
+            errors.setdefault(location[0], []).append(f"{detail}: {error['msg']}" if detail else error["msg"])
+        return errors
+
+
+def validate_descriptor(descriptor: Dict, vocabulary=None) -> Dict[str, List[str]]:
+    """Structured errors for every invalid field of a dataDescriptor; nested groups are checked field by field."""
+    return validate_fields(field_entries(descriptor), vocabulary)
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: per-field model construction vs one TypeAdapter call vs the compiled checker
+    import sys
+    import timeit
+
+    def per_field(fields):
+        errors = {}
+        for key, field in fields.items():
+            try:
+                FieldDescriptor(**field)
+            except ValidationError as e:
+                errors[key] = [str(e)]
+        return errors
+
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for invalid_share in (0.0, 0.5):
+        fields = {}
+        for i in range(size):
+            if i < size * invalid_share:
+                fields[f"field{i}"] = {"type": ["ValueDescriptor"], "description": "bad", "dataSchema": "Text"}
+            else:
+                fields[f"field{i}"] = {"type": ["ValueDescriptor"], "description": f"field {i}", "dataSchema": "iudx:Text"}
+        expected = set(per_field(fields))
+        print(f"{size} fields, {invalid_share:.0%} invalid:")
+        for name, check in (("per-field FieldDescriptor", per_field),
+                            ("TypeAdapter", validate_fields_pydantic),
+                            ("compiled checker", lambda f: validate_fields(f, vocabulary=False))):
+            assert set(check(fields)) == expected, name
+            runs = 200
+            seconds = timeit.timeit(lambda: check(fields), number=runs) / runs
+            print(f"  {name:<26} {seconds * 1e6:9.1f} us/descriptor")
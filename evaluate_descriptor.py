@@ -2,8 +2,11 @@ import json
 import re
 from typing import Literal
 from pydantic import BaseModel, ValidationError, validator
+from geojson_stream import read_sample
 
 allowed_schemas = ["iudx:Text", "iudx:Number", "iudx:Point"]
+# Nearest allowed schema for the finer types column_inference can report
+schema_fallbacks = {"iudx:Integer": "iudx:Number", "iudx:DateTime": "iudx:Text", "iudx:Boolean": "iudx:Text"}
 
 class FieldDescriptor(BaseModel):
     type: list[Literal["ValueDescriptor"]] = ["ValueDescriptor"]
@@ -26,7 +29,9 @@ def infer_data_schema(key: str, value):
 def is_description_apt(key: str, description: str) -> bool:
     return key.lower().replace(".", "") in description.lower() or key.lower() in description.lower()
 
-def evaluate_descriptor(descriptor_path: str, json_sample: dict):
+def evaluate_descriptor(descriptor_path: str, json_sample: dict, dataset_types: dict = None):
+    # dataset_types (from column_inference.infer_dataset_types) overrides per-value inference
+    dataset_types = dataset_types or {}
     with open(descriptor_path) as f:
         descriptor = json.load(f)
 
@@ -49,7 +54,8 @@ def evaluate_descriptor(descriptor_path: str, json_sample: dict):
 
         sample_value = json_sample.get("properties", {}).get(key)
         if sample_value:
-            inferred = infer_data_schema(key, sample_value)
+            inferred = dataset_types.get(key) or infer_data_schema(key, sample_value)
+            inferred = schema_fallbacks.get(inferred, inferred)
             if inferred != field["dataSchema"]:
                 field_result["status"] = "Rejected"
                 field_result["reason"] = f"expected {inferred} but got {field['dataSchema']}"
@@ -65,8 +71,7 @@ def evaluate_descriptor(descriptor_path: str, json_sample: dict):
     return result, descriptor
 
 if __name__ == "__main__":
-    with open("basicjsonsnippet.json") as f:
-        sample = json.load(f)
+    sample = read_sample("basicjsonsnippet.json")
 
     output, fixed_descriptor = evaluate_descriptor("generated_descriptor.json", sample)
 
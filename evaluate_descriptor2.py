@@ -1,33 +1,30 @@
 import json
 from typing import List, Dict, Tuple
-import joblib
-from pydantic import BaseModel, ValidationError, field_validator
-import pandas as pd
+from geojson_stream import read_sample
+from type_inference import MODEL_PATH, get_type_service
+from descriptor_validation import is_group, validate_fields
+from descriptor_synthesis import geometry_schema, is_geometry
 
-class FieldDescriptor(BaseModel):
-    type: List[str]
-    description: str
-    dataSchema: str
 
-    @field_validator("dataSchema")
-    def validate_data_schema(cls, v):
-        if not v.startswith("iudx:"):
-            raise ValueError("dataSchema must start with 'iudx:'")
-        return v
-
-
-model_path = "iudx_random_forest.pkl"
-vectorizer, clf = joblib.load(model_path)
+model_path = MODEL_PATH
+# Loaded on first prediction and shared by every call
+type_service = get_type_service(model_path)
 
 def infer_type(key: str, value) -> str:
     try:
-        X = pd.DataFrame([[key, str(value)]], columns=["field_name", "sample_value"])
-        X_transformed = vectorizer.transform(X)
-        return clf.predict(X_transformed)[0]
+        return type_service.predict([(key, value)])[0][0]
     except Exception as e:
         print(f"[WARN] Type inference failed: {e}")
         return "iudx:Text"
 
+def infer_types(sample_input: Dict) -> Dict:
+    """Predict every field of the sample in one vectorised call."""
+    try:
+        return type_service.predict_sample(sample_input)
+    except Exception as e:
+        print(f"[WARN] Type inference failed: {e}")
+        return {}
+
 
 
 
@@ -44,16 +41,20 @@ def flatten_geojson_feature(geojson: Dict) -> Dict:
 
 NON_CRITICAL_FIELDS = {"filename"}  # everything else is treated as critical
 
-def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Dict]:
-    with open(template_path) as f:
-        full_metadata = json.load(f)
-        descriptor = full_metadata.get("dataDescriptor", {})
+def check_descriptor(descriptor: Dict, sample_input: Dict, inferred_types: Dict = None) -> Tuple[str, Dict, List]:
+    """Validate a dataDescriptor against a flattened sample; returns (status, fixed_descriptor, errors)."""
+    # inferred_types (e.g. from type_inference.TypeInferencePipeline) overrides the RandomForest
+    inferred_types = inferred_types or infer_types(sample_input)
 
     errors = []
     fixed_descriptor = descriptor.copy()
+    # Every described field of the sample is validated in one pass
+    invalid = validate_fields({key: descriptor[key] for key in sample_input if key in descriptor})
 
     for key, value in sample_input.items():
-        expected_type = infer_type(key, value)
+        # A GeoJSON geometry (e.g. a `location` LineString) is described by its own type
+        expected_type = geometry_schema(value["type"]) if is_geometry(value) \
+            else inferred_types.get(key) or infer_type(key, value)
 
         if key not in descriptor:
             fixed_descriptor[key] = {
@@ -67,20 +68,21 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
                 errors.append((key, f"CRITICAL: missing field, expected {expected_type}"))
         else:
             field = descriptor[key]
-            try:
-                fd = FieldDescriptor(**field)
+            if is_group(field) and key not in invalid:
+                continue  # a valid nested group; its fields have no single type to compare
+            if key not in invalid:
                 numeric_types = {"iudx:Number", "iudx:Integer"}
-                if fd.dataSchema != expected_type:
+                if field["dataSchema"] != expected_type:
                 # Allow iudx:Integer wherever iudx:Number is inferred, and vice versa
-                    if {fd.dataSchema, expected_type}.issubset(numeric_types):
+                    if {field["dataSchema"], expected_type}.issubset(numeric_types):
                         continue  
 
                     if key in NON_CRITICAL_FIELDS:
                         fixed_descriptor[key]["dataSchema"] = expected_type
                         errors.append((key, f"non-critical: type mismatch, fixed to {expected_type}"))
                     else:
-                        errors.append((key, f"CRITICAL: type mismatch ({fd.dataSchema} ≠ {expected_type})"))
-            except ValidationError:
+                        errors.append((key, f"CRITICAL: type mismatch ({field['dataSchema']} ≠ {expected_type})"))
+            else:
                 if key in NON_CRITICAL_FIELDS:
                     fixed_descriptor[key] = {
                         "type": ["ValueDescriptor"],
@@ -89,7 +91,7 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
                     }
                     errors.append((key, f"non-critical: invalid descriptor, autofixed to {expected_type}"))
                 else:
-                    errors.append((key, f"CRITICAL: invalid descriptor for {key}"))
+                    errors.append((key, f"CRITICAL: invalid descriptor for {key} ({'; '.join(invalid[key])})"))
 
     if "filename" in sample_input:
         name = sample_input["filename"]
@@ -98,6 +100,15 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
 
     has_critical_error = any("CRITICAL" in msg for _, msg in errors)
     status = "REJECTED" if has_critical_error else "ACCEPTED"
+    return status, fixed_descriptor, errors
+
+
+def evaluate_descriptor(template_path: str, sample_input: Dict, inferred_types: Dict = None) -> Tuple[str, Dict]:
+    with open(template_path) as f:
+        full_metadata = json.load(f)
+        descriptor = full_metadata.get("dataDescriptor", {})
+
+    status, fixed_descriptor, errors = check_descriptor(descriptor, sample_input, inferred_types)
 
     # Print Validation Summary
     print("Validation Summary:")
@@ -112,8 +123,7 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
 
 
 if __name__ == "__main__":
-    with open("inputtemple.geojson") as geo:
-        geojson = json.load(geo)
+    geojson = read_sample("inputtemple.geojson")
 
     flat_sample = flatten_geojson_feature(geojson)
 
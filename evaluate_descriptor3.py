@@ -1,18 +1,9 @@
 import json
-from typing import List, Dict, Tuple
-from pydantic import BaseModel, ValidationError, field_validator
-
-
-class FieldDescriptor(BaseModel):
-    type: List[str]
-    description: str
-    dataSchema: str
-
-    @field_validator("dataSchema")
-    def validate_data_schema(cls, v):
-        if not v.startswith("iudx:"):
-            raise ValueError("dataSchema must start with 'iudx:'")
-        return v
+from typing import Dict, Tuple
+from geojson_stream import read_sample
+from column_inference import infer_dataset_types
+from descriptor_validation import is_group, validate_fields
+from descriptor_synthesis import geometry_schema, is_geometry
 
 
 def infer_type(value):
@@ -49,16 +40,28 @@ def flatten_geojson_feature(geojson: Dict) -> Dict:
     return merged
 
 
-def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Dict]:
+def evaluate_descriptor(template_path: str, sample_input: Dict, dataset_types: Dict = None) -> Tuple[str, Dict]:
+    """
+    Validate a descriptor against a flattened sample.
+
+    `dataset_types` (from column_inference.infer_dataset_types) takes precedence over
+    inferring each field's type from the single sample value.
+    """
+    dataset_types = dataset_types or {}
     with open(template_path) as f:
         descriptor = json.load(f)
 
     errors = []
     fixed_descriptor = descriptor.copy()
     fixed_descriptor.setdefault("properties", {})
+    # Every described field of the sample is validated in one pass
+    properties = descriptor.get("properties", {})
+    invalid = validate_fields({key: properties[key] for key in sample_input if key in properties})
 
     for key, value in sample_input.items():
-        expected_type = infer_type(value)
+        # A GeoJSON geometry (e.g. a `location` LineString) is described by its own type
+        expected_type = geometry_schema(value["type"]) if is_geometry(value) \
+            else dataset_types.get(key) or infer_type(value)
 
         if key not in descriptor.get("properties", {}):
             # Field missing, add it
@@ -71,13 +74,14 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
 
         else:
             field = descriptor["properties"][key]
-            try:
-                fd = FieldDescriptor(**field)
+            if is_group(field) and key not in invalid:
+                continue  # a valid nested group; its fields have no single type to compare
+            if key not in invalid:
                 # Fix only if type is wrong
-                if fd.dataSchema != expected_type:
+                if field["dataSchema"] != expected_type:
                     fixed_descriptor["properties"][key]["dataSchema"] = expected_type
                     errors.append((key, f"type mismatch, fixed to {expected_type}"))
-            except ValidationError:
+            else:
                 # Keep existing description if it's meaningful
                 desc = field.get("description", "").lower()
                 if "autofixed" in desc or not any(c.isalpha() for c in desc):
@@ -102,11 +106,11 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
 
 
 if __name__ == "__main__":
-    with open("inputtemple.geojson") as geo:
-        geojson = json.load(geo)
+    geojson = read_sample("inputtemple.geojson")
 
     flat_sample = flatten_geojson_feature(geojson)
-    output_status, fixed_data = evaluate_descriptor("outputtemple.jsonld", flat_sample)
+    dataset_types = infer_dataset_types("inputtemple.geojson")
+    output_status, fixed_data = evaluate_descriptor("outputtemple.jsonld", flat_sample, dataset_types)
 
     with open("outputtemple2.jsonld", "w") as f:
         json.dump(fixed_data, f, indent=2)
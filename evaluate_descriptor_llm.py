@@ -1,13 +1,22 @@
 import json
-from typing import List, Dict, Tuple
-from pydantic import BaseModel, ValidationError, field_validator
-from groq import Groq
-import os
+from typing import Dict, Tuple
+from descriptor_validation import is_group, validate_fields
+from descriptor_synthesis import geometry_schema, is_geometry
+from concurrent.futures import ThreadPoolExecutor
+from llm_client import ResilientClient
+from llm_backends import get_backend
+from json_extract import extract_json
+from type_classifier import split_confident
 from dotenv import load_dotenv
+from geojson_stream import read_sample
 load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=GROQ_API_KEY)
+# LLM backend (Groq unless IUDX_LLM_BACKEND says otherwise)
+backend = get_backend()
+client = ResilientClient(backend.client())
+MODEL = backend.model
+
+ALLOWED_TYPES = {"iudx:Text", "iudx:Number", "iudx:Integer", "iudx:Boolean", "iudx:Point"}
 
 def infer_type_llm(key: str, value) -> str:
     prompt = f"""
@@ -43,7 +52,7 @@ Value: {json.dumps(value)}
 
     try:
         response = client.chat.completions.create(
-            model="llama3-70b-8192",
+            model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0.0
         )
@@ -54,16 +63,72 @@ Value: {json.dumps(value)}
         print(f"[WARN] LLM type inference failed for `{key}`: {e}")
         return "iudx:Text"
 
-class FieldDescriptor(BaseModel):
-    type: List[str]
-    description: str
-    dataSchema: str
+def infer_types_llm_batch(sample_input: Dict) -> Dict[str, str]:
+    """
+    Infer the dataSchema of every field in one LLM request.
+
+    Fields missing from the response, or mapped to an unknown type, fall back to
+    individual infer_type_llm calls.
+    """
+    fields = dict(sample_input)
+    if not fields:
+        return {}
+
+    prompt = f"""
+You are an expert in semantic data modeling for everything.
+
+Given the following fields with a sample value each, predict the most suitable IUDX dataSchema type for every field.
+
+Use only the following types:
+- iudx:Text
+- iudx:Number
+- iudx:Integer
+- iudx:Boolean
+- iudx:Point
 
-    @field_validator("dataSchema")
-    def validate_data_schema(cls, v):
-        if not v.startswith("iudx:"):
-            raise ValueError("dataSchema must start with 'iudx:'")
-        return v
+Examples:
+Field: "Name", Value: "Temple of Kali" -> iudx:Text
+Field: "Latitude", Value: 28.6139 -> iudx:Number
+Field: "geometry", Value: {{ "type": "Point", "coordinates": [76.4, 29.1] }} -> iudx:Point
+
+Fields (a JSON object of field name to sample value):
+{json.dumps(fields)}
+
+Respond ONLY with a JSON object mapping every field name to its type, for example:
+{{"Name": "iudx:Text", "Latitude": "iudx:Number"}}
+""".strip()
+
+    inferred = {}
+    try:
+        response = client.chat.completions.create(
+            model=MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.0
+        )
+        raw_output = response.choices[0].message.content.strip()
+        parsed = extract_json(raw_output)
+        inferred = {k: v for k, v in parsed.items() if k in fields and v in ALLOWED_TYPES}
+    except Exception as e:
+        print(f"[WARN] Batched LLM type inference failed: {e}")
+
+    # Only the entries that did not come back cleanly cost an extra round trip; sent
+    # concurrently so a batching backend can serve them together
+    missing = [key for key in fields if key not in inferred]
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(8, len(missing))) as pool:
+            for key, type_str in zip(missing, pool.map(lambda k: infer_type_llm(k, fields[k]), missing)):
+                inferred[key] = type_str
+    return {key: inferred[key] for key in fields}
+
+def infer_types(sample_input: Dict) -> Dict[str, str]:
+    """
+    The value rules and the in-process classifier type every field they are confident
+    about, within ALLOWED_TYPES; only the rest cost an LLM request.
+    """
+    resolved, remaining = split_confident(sample_input, allowed=ALLOWED_TYPES)
+    if remaining:
+        resolved.update(infer_types_llm_batch(remaining))
+    return {key: resolved[key] for key in sample_input}
 
 def flatten_geojson_feature(geojson: Dict) -> Dict:
     merged = {}
@@ -75,7 +140,7 @@ def flatten_geojson_feature(geojson: Dict) -> Dict:
 
 NON_CRITICAL_FIELDS = {"filename"}
 
-def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Dict]:
+def evaluate_descriptor(template_path: str, sample_input: Dict, batched: bool = True) -> Tuple[str, Dict]:
     with open(template_path) as f:
         full_metadata = json.load(f)
         descriptor = full_metadata.get("dataDescriptor", {})
@@ -83,8 +148,15 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
     errors = []
     fixed_descriptor = descriptor.copy()
 
+    # Classifier first, then one request for all remaining fields instead of one per field
+    inferred_types = infer_types(sample_input) if batched else {}
+    # Every described field of the sample is validated in one pass
+    invalid = validate_fields({key: descriptor[key] for key in sample_input if key in descriptor})
+
     for key, value in sample_input.items():
-        expected_type = infer_type_llm(key, value)
+        # A GeoJSON geometry (e.g. a `location` LineString) is described by its own type
+        expected_type = geometry_schema(value["type"]) if is_geometry(value) \
+            else inferred_types.get(key) or infer_type_llm(key, value)
 
         # Refine numeric type based on value
         if expected_type in {"iudx:Number", "iudx:Integer"}:
@@ -100,21 +172,23 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
             errors.append((key, f"{'non-critical' if key in NON_CRITICAL_FIELDS else 'CRITICAL'}: missing field, added with inferred type {expected_type}"))
         else:
             field = descriptor[key]
-            try:
-                fd = FieldDescriptor(**field)
+            if is_group(field) and key not in invalid:
+                continue  # a valid nested group; its fields have no single type to compare
+            if key not in invalid:
+                fd_schema = field["dataSchema"]
                 numeric_types = {"iudx:Number", "iudx:Integer"}
-                if fd.dataSchema != expected_type:
+                if fd_schema != expected_type:
                     # Allow iudx:Number as a valid type for integers (superset)
-                    if expected_type == "iudx:Integer" and fd.dataSchema == "iudx:Number":
+                    if expected_type == "iudx:Integer" and fd_schema == "iudx:Number":
                         continue
                     # Flag mismatch if expected type is Number but descriptor is Integer
-                    if expected_type == "iudx:Number" and fd.dataSchema == "iudx:Integer":
-                        errors.append((key, f"{'non-critical' if key in NON_CRITICAL_FIELDS else 'CRITICAL'}: type mismatch (expected {expected_type}, found {fd.dataSchema})"))
+                    if expected_type == "iudx:Number" and fd_schema == "iudx:Integer":
+                        errors.append((key, f"{'non-critical' if key in NON_CRITICAL_FIELDS else 'CRITICAL'}: type mismatch (expected {expected_type}, found {fd_schema})"))
                         fixed_descriptor[key]["dataSchema"] = expected_type
-                    elif fd.dataSchema != expected_type and not {fd.dataSchema, expected_type}.issubset(numeric_types):
-                        errors.append((key, f"{'non-critical' if key in NON_CRITICAL_FIELDS else 'CRITICAL'}: type mismatch ({fd.dataSchema} ≠ {expected_type})"))
+                    elif fd_schema != expected_type and not {fd_schema, expected_type}.issubset(numeric_types):
+                        errors.append((key, f"{'non-critical' if key in NON_CRITICAL_FIELDS else 'CRITICAL'}: type mismatch ({fd_schema} ≠ {expected_type})"))
                         fixed_descriptor[key]["dataSchema"] = expected_type
-            except ValidationError:
+            else:
                 fixed_descriptor[key] = {
                     "type": ["ValueDescriptor"],
                     "description": "autofixed",
@@ -137,8 +211,7 @@ def evaluate_descriptor(template_path: str, sample_input: Dict) -> Tuple[str, Di
     return status, fixed_descriptor
 
 if __name__ == "__main__":
-    with open("input21.json") as geo:
-        geojson = json.load(geo)
+    geojson = read_sample("input21.json")
 
     flat_sample = flatten_geojson_feature(geojson)
 
@@ -1,19 +1,26 @@
-from rdflib import Graph
+import os
 import json
+from iudx_vocabulary import DEFAULT_INDEX_PATH, Vocabulary, build_index, save_index
 
-def get_iudx_types(rdf_url="https://voc.iudx.org.in/", output_file="types.json"):
-    g = Graph()
-    print(f"[INFO] Fetching RDF from {rdf_url} ...")
-    
-    # Explicitly declare the format
-    g.parse(rdf_url, format="json-ld")
+def get_iudx_types(vocab_file="iudx_vocabulary.jsonld", output_file="types.json", index_path=DEFAULT_INDEX_PATH):
+    """
+    List the IUDX classes and property ranges from a local copy of the vocabulary.
 
-    types = set()
-    for s, p, o in g.triples((None, None, None)):
-        if "iudx:" in str(o) and ("range" in str(p) or "type" in str(p)):
-            types.add(str(o).split("/")[-1])  # only the last part of the URI
+    The JSON-LD file is indexed once into `index_path`; later runs load the snapshot
+    instead of fetching and re-parsing https://voc.iudx.org.in/ with rdflib.
+    """
+    if os.path.exists(vocab_file):
+        print(f"[INFO] Indexing vocabulary from {vocab_file} ...")
+        save_index(build_index(vocab_file), index_path)
+    elif not os.path.exists(index_path):
+        raise FileNotFoundError(
+            f"Neither {vocab_file} nor a vocabulary snapshot at {index_path} exists; "
+            "download https://voc.iudx.org.in/ as JSON-LD to build one"
+        )
+    vocabulary = Vocabulary.load(index_path)
 
-    sorted_types = sorted(types)
+    types = {t for t in vocabulary.classes | vocabulary.range_values if t.startswith("iudx:")}
+    sorted_types = sorted(t.split(":", 1)[1] for t in types)  # only the local name
 
     with open(output_file, "w") as f:
         json.dump(sorted_types, f, indent=2)
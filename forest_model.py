@@ -0,0 +1,353 @@
+import os
+import re
+import json
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# File layout: magic, header length, JSON header, then the raw arrays at 64-byte aligned offsets
+MAGIC = b"IUDXFRST"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+FOREST_SUFFIX = ".forest"
+
+WHITE_SPACES = re.compile(r"\s\s+")
+
+# MurmurHash3 x86_32 constants
+C1 = np.uint32(0xCC9E2D51)
+C2 = np.uint32(0x1B873593)
+M5 = np.uint32(5)
+N1 = np.uint32(0xE6546B64)
+F1 = np.uint32(0x85EBCA6B)
+F2 = np.uint32(0xC2B2AE35)
+
+
+def sample_text(value) -> str:
+    """The text the vectorizer sees for a sample value: strings as-is, anything else as JSON."""
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def forest_path(artifact: str) -> str:
+    """Where the exported arrays of a joblib model are written."""
+    return os.path.splitext(artifact)[0] + FOREST_SUFFIX
+
+
+def _rotl(x, r):
+    return (x << np.uint32(r)) | (x >> np.uint32(32 - r))
+
+
+def murmurhash3_32(tokens: List[bytes], seed: int = 0) -> np.ndarray:
+    """
+    Signed MurmurHash3 (x86, 32-bit) of every token, as sklearn's murmurhash3_32 and
+    HashingVectorizer compute it. Tokens are hashed a whole length group at a time.
+    """
+    hashes = np.empty(len(tokens), dtype=np.uint32)
+    groups = {}
+    for i, token in enumerate(tokens):
+        groups.setdefault(len(token), []).append(i)
+
+    for length, positions in groups.items():
+        data = np.frombuffer(b"".join(tokens[i] for i in positions), dtype=np.uint8).reshape(len(positions), length)
+        h = np.full(len(positions), seed, dtype=np.uint32)
+        n_blocks = length // 4
+        if n_blocks:
+            blocks = np.ascontiguousarray(data[:, :n_blocks * 4]).view("<u4")
+            for b in range(n_blocks):
+                k = blocks[:, b] * C1
+                k = _rotl(k, 15) * C2
+                h = _rotl(h ^ k, 13) * M5 + N1
+        tail = data[:, n_blocks * 4:].astype(np.uint32)
+        if tail.shape[1]:
+            k = np.zeros(len(positions), dtype=np.uint32)
+            for j in reversed(range(tail.shape[1])):
+                k ^= tail[:, j] << np.uint32(8 * j)
+            k = _rotl(k * C1, 15) * C2
+            h ^= k
+        h ^= np.uint32(length)
+        h ^= h >> np.uint32(16)
+        h *= F1
+        h ^= h >> np.uint32(13)
+        h *= F2
+        h ^= h >> np.uint32(16)
+        hashes[positions] = h
+    return hashes.view(np.int32)
+
+
+def char_wb_ngrams(text: str, ngram_range, lowercase=True) -> List[str]:
+    """Same n-grams as a char_wb CountVectorizer/HashingVectorizer analyzer."""
+    if lowercase:
+        text = text.lower()
+    text = WHITE_SPACES.sub(" ", text)
+    low, high = ngram_range
+    ngrams = []
+    for word in text.split():
+        word = f" {word} "
+        length = len(word)
+        for n in range(low, high + 1):
+            offset = 0
+            ngrams.append(word[:n])
+            while offset + n < length:
+                offset += 1
+                ngrams.append(word[offset:offset + n])
+            if offset == 0:  # a word shorter than n is counted once
+                break
+    return ngrams
+
+
+def write_arrays(path: str, arrays: Dict[str, np.ndarray], spec: Dict):
+    """Write little-endian arrays plus a JSON spec in the .forest layout."""
+    entries = {}
+    offset = 0
+    blobs = []
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        offset = (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        blobs.append((offset, array.tobytes()))
+        offset += array.nbytes
+    header = json.dumps({"format_version": FORMAT_VERSION, "arrays": entries, "spec": spec}).encode("utf-8")
+    start = (len(MAGIC) + 4 + len(header) + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for position, blob in blobs:
+            f.seek(start + position)
+            f.write(blob)
+
+
+def read_arrays(path: str) -> Tuple[Dict[str, np.ndarray], Dict]:
+    """Memory-map every array of a .forest file; returns (arrays, spec)."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a .forest model")
+        (length,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(length))
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"{path} has format version {header['format_version']}, expected {FORMAT_VERSION}")
+    start = (len(MAGIC) + 4 + length + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+    arrays = {
+        # Plain ndarray views of the mapping: indexing a np.memmap subclass is much slower
+        name: np.asarray(np.memmap(path, dtype=entry["dtype"], mode="r", offset=start + entry["offset"],
+                                   shape=tuple(entry["shape"])))
+        if int(np.prod(entry["shape"])) else np.zeros(entry["shape"], dtype=entry["dtype"])
+        for name, entry in header["arrays"].items()
+    }
+    return arrays, header["spec"]
+
+
+class ForestModel:
+    """
+    Pure-NumPy RandomForest over hashed char n-gram features.
+
+    Trees are stored as flat node arrays, with the (left, right) children of each node
+    side by side and leaves pointing at themselves. Every tree of every row is walked in
+    lock-step, one vectorised step per level, dropping walks as they reach a leaf. Only
+    the features some split uses are materialised, as a small dense matrix.
+    predict_proba matches the sklearn pipeline it was exported from.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], spec: Dict):
+        self.spec = spec
+        self.classes = spec["classes"]
+        self.columns = spec["columns"]
+        self.max_depth = spec["max_depth"]
+        self.roots = arrays["roots"]
+        self.children = arrays["children"]
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.value = arrays["value"]
+        self.used_features = arrays["used_features"]
+        sizes = [column["n_features"] for column in self.columns]
+        self.column_sizes = np.array(sizes, dtype=np.int64)
+        self.column_offsets = np.cumsum([0] + sizes[:-1]).astype(np.int64)
+        self.width = int(sum(sizes))
+        self.l2 = np.array([column["norm"] == "l2" for column in self.columns])
+
+    @classmethod
+    def load(cls, path: str) -> "ForestModel":
+        return cls(*read_arrays(path))
+
+    def transform(self, rows: List[Tuple[str, object]]) -> np.ndarray:
+        """Dense (n_rows, n_used_features) float32 matrix of the features the trees split on."""
+        tokens, token_rows, token_columns = [], [], []
+        for c, column in enumerate(self.columns):
+            for r, (key, value) in enumerate(rows):
+                text = key if column["source"] == "field_name" else sample_text(value)
+                ngrams = char_wb_ngrams(text, column["ngram_range"], column["lowercase"])
+                tokens.extend(gram.encode("utf-8") for gram in ngrams)
+                token_rows.extend([r] * len(ngrams))
+                token_columns.extend([c] * len(ngrams))
+
+        X = np.zeros((len(rows), len(self.used_features)), dtype=np.float32)
+        if not tokens:
+            return X
+        token_columns = np.array(token_columns, dtype=np.int64)
+        # abs() in int64 also covers -2**31, which sklearn maps to 2**31 % n_features
+        buckets = np.abs(murmurhash3_32(tokens).astype(np.int64)) % self.column_sizes[token_columns]
+        keys = np.array(token_rows, dtype=np.int64) * self.width + self.column_offsets[token_columns] + buckets
+
+        # Duplicate n-grams add up, then each column block is normalised on its own
+        unique, counts = np.unique(keys, return_counts=True)
+        unique_rows, features = unique // self.width, unique % self.width
+        values = counts.astype(np.float64)
+        blocks = np.searchsorted(self.column_offsets, features, side="right") - 1
+        if self.l2.any():
+            groups = unique_rows * len(self.columns) + blocks
+            norms = np.sqrt(np.bincount(groups, weights=values * values, minlength=len(rows) * len(self.columns)))
+            values = np.where(self.l2[blocks], values / norms[groups], values)
+
+        positions = np.minimum(np.searchsorted(self.used_features, features), len(self.used_features) - 1)
+        used = self.used_features[positions] == features
+        X[unique_rows[used], positions[used]] = values[used]
+        return X
+
+    def predict_proba(self, rows: List[Tuple[str, object]]) -> np.ndarray:
+        if not rows:
+            return np.zeros((0, len(self.classes)))
+        X = self.transform(rows)
+        n_trees = len(self.roots)
+        nodes = np.tile(self.roots, len(rows))
+        # Offset of each walk's row in the flattened feature matrix
+        row_base = np.repeat(np.arange(len(rows)) * X.shape[1], n_trees)
+        X = X.ravel()
+        active = np.arange(len(nodes))
+        current = nodes.copy()
+        for _ in range(self.max_depth):
+            go_right = X[row_base[active] + self.feature[current]] > self.threshold[current]
+            following = self.children[current, go_right.astype(np.intp)]
+            nodes[active] = following
+            moving = following != current
+            active, current = active[moving], following[moving]
+            if not len(active):
+                break
+        return self.value[nodes].reshape(len(rows), n_trees, -1).mean(axis=1)
+
+    def predict(self, rows: List[Tuple[str, object]]) -> List[Tuple[str, float]]:
+        """(type, confidence) for every (field_name, sample_value) row."""
+        probabilities = self.predict_proba(rows)
+        best = probabilities.argmax(axis=1) if len(rows) else []
+        return [(self.classes[i], float(p[i])) for i, p in zip(best, probabilities)]
+
+
+def _column_spec(name, vectorizer, source):
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    if not isinstance(vectorizer, HashingVectorizer):
+        raise ValueError(f"column {name!r} uses {type(vectorizer).__name__}; only HashingVectorizer models can be exported")
+    unsupported = {
+        "analyzer": vectorizer.analyzer != "char_wb",
+        "alternate_sign": vectorizer.alternate_sign,
+        "binary": vectorizer.binary,
+        "norm": vectorizer.norm not in ("l2", None),
+        "preprocessor": vectorizer.preprocessor is not None,
+        "strip_accents": vectorizer.strip_accents is not None,
+    }
+    problems = [option for option, bad in unsupported.items() if bad]
+    if problems:
+        raise ValueError(f"column {name!r}: unsupported HashingVectorizer settings: {', '.join(problems)}")
+    return {"name": name, "source": source, "n_features": vectorizer.n_features,
+            "ngram_range": list(vectorizer.ngram_range), "lowercase": vectorizer.lowercase, "norm": vectorizer.norm}
+
+
+def export_forest(model, path: str, source_sha256: str = None) -> str:
+    """
+    Write a (ColumnTransformer of HashingVectorizers, RandomForestClassifier) pair, as
+    saved by train_type_model.py, to `path` in the .forest layout.
+
+    Raises:
+        ValueError: For models the NumPy predictor cannot reproduce exactly.
+    """
+    vectorizer, clf = model
+    if getattr(vectorizer, "remainder", "drop") != "drop":
+        raise ValueError("only ColumnTransformers with remainder='drop' can be exported")
+    columns = [_column_spec(name, transformer, source) for name, transformer, source in vectorizer.transformers_
+               if transformer != "drop"]
+    if getattr(clf, "n_outputs_", 1) != 1:
+        raise ValueError("only single-output forests can be exported")
+
+    trees = [estimator.tree_ for estimator in clf.estimators_]
+    used = np.unique(np.concatenate([tree.feature[tree.feature >= 0] for tree in trees]))
+    if not len(used):
+        used = np.zeros(1, dtype=np.int64)  # every tree is a single leaf
+    roots, children, feature, threshold, value = [], [], [], [], []
+    start = 0
+    for tree in trees:
+        ids = np.arange(tree.node_count)
+        leaf = tree.children_left < 0
+        roots.append(start)
+        # Leaves point at themselves so the lock-step walk stays put once it gets there
+        children.append(np.stack([np.where(leaf, ids, tree.children_left),
+                                  np.where(leaf, ids, tree.children_right)], axis=1) + start)
+        feature.append(np.where(leaf, 0, np.searchsorted(used, np.maximum(tree.feature, 0))))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        counts = tree.value[:, 0, :]
+        value.append(counts / counts.sum(axis=1, keepdims=True))
+        start += tree.node_count
+
+    arrays = {
+        "roots": np.array(roots, dtype=np.int32),
+        "children": np.concatenate(children).astype(np.int32),
+        "feature": np.concatenate(feature).astype(np.int32),
+        "threshold": np.concatenate(threshold).astype(np.float64),
+        "value": np.concatenate(value).astype(np.float64),
+        "used_features": used.astype(np.int64),
+    }
+    spec = {
+        "classes": [str(c) for c in clf.classes_],
+        "columns": columns,
+        "max_depth": int(max(tree.max_depth for tree in trees)),
+        "n_trees": len(trees),
+        "source_sha256": source_sha256,
+    }
+    write_arrays(path, arrays, spec)
+    return path
+
+
+def main():
+    # Re-export the joblib model a .forest was converted from and compare it with sklearn
+    import sys
+    import json
+    import time
+    import joblib
+    from model_registry import file_entry, latest_artifact, sidecar_path, write_sidecar
+
+    path = sys.argv[1] if len(sys.argv) > 1 else latest_artifact("iudx_type_rf")
+    if path is None:
+        raise SystemExit("No trained model found; run train_type_model.py first.")
+    with open(sidecar_path(path)) as f:
+        metadata = json.load(f)
+    artifact = os.path.join(os.path.dirname(path), metadata["source"]["artifact"])
+    if not os.path.exists(artifact):
+        # Only the .forest export is checked in; the joblib model comes from retraining
+        raise SystemExit(f"{artifact} is not available; run train_type_model.py to retrain it.")
+    if file_entry(artifact)["sha256"] != metadata["source"]["sha256"]:
+        raise SystemExit(f"{artifact} is not the model {path} was exported from.")
+    model = joblib.load(artifact)
+    export_forest(model, path, metadata["source"]["sha256"])
+    write_sidecar(path, metadata)
+
+    started = time.perf_counter()
+    forest = ForestModel.load(path)
+    load_seconds = time.perf_counter() - started
+
+    from train_type_model import mine_examples
+    from type_inference import RandomForestTypeService
+
+    rows = [(key, value) for key, value, _ in mine_examples()]
+    service = RandomForestTypeService(artifact)
+    service._model = model
+    expected = service.predict_proba(rows)
+    difference = float(np.abs(forest.predict_proba(rows) - expected).max()) if rows else 0.0
+
+    started = time.perf_counter()
+    for key, value in rows[:50]:
+        forest.predict([(key, value)])
+    single = (time.perf_counter() - started) / max(1, min(50, len(rows)))
+    print(f"Wrote {path} ({os.path.getsize(path) / 1024:.0f} KiB, {forest.spec['n_trees']} trees, "
+          f"{len(forest.used_features)} split features)")
+    print(f"load: {load_seconds * 1000:.2f}ms  predict: {single * 1000:.3f}ms per field  "
+          f"max |p - sklearn p|: {difference:.2e}")
+
+
+if __name__ == "__main__":
+    main()
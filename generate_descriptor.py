@@ -2,15 +2,18 @@ import os
 import json
 import re
 from groq import Groq
+from llm_client import ResilientClient
+from llm_cache import cached_completion
+from json_extract import extract_json
+from geojson_stream import read_sample
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+client = ResilientClient(Groq(api_key=os.getenv("GROQ_API_KEY")))
 
 # Load your basic input JSON
-with open("inputtemple.geojson", "r") as f:
-    basic_data = json.load(f)
+basic_data = read_sample("inputtemple.geojson")
 
 # Prepare prompt
 prompt = f"""
@@ -47,27 +50,18 @@ Use the exact property key names from the GeoJSON and do not wrap fields inside
 Return only the valid "dataDescriptor" JSON block.
 """
 
-response = client.chat.completions.create(
+# Extract the first JSON object, repairing common defects; only a parseable answer is cached
+parsed_descriptor = cached_completion(
+    client,
     model="llama3-70b-8192",
     messages=[
         {"role": "system", "content": "You are a JSON-LD generator for IUDX metadata."},
         {"role": "user", "content": prompt}
     ],
-    temperature=0.2
+    temperature=0.2,
+    validate=extract_json
 )
 
-raw_output = response.choices[0].message.content.strip()
-
-# Simple extraction of first JSON object
-start = raw_output.find("{")
-end = raw_output.rfind("}") + 1
-
-if start == -1 or end == -1:
-    raise ValueError("No valid JSON object found in model output.")
-
-clean_json_str = raw_output[start:end]
-parsed_descriptor = json.loads(clean_json_str)
-
 # Save
 with open("myoutputtemple.jsonld", "w") as f:
     json.dump({"dataDescriptor": parsed_descriptor}, f, indent=2)
@@ -2,15 +2,18 @@ import os
 import json
 import uuid
 from groq import Groq
+from llm_client import ResilientClient
+from llm_cache import cached_completion
+from json_extract import extract_json
+from geojson_stream import read_sample
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+client = ResilientClient(Groq(api_key=os.getenv("GROQ_API_KEY")))
 
 # Load input GeoJSON
-with open("inputtemple.geojson", "r") as f:
-    basic_data = json.load(f)
+basic_data = read_sample("inputtemple.geojson")
 
 # Load prompt template
 with open("prompt_template.txt", "r") as f:
@@ -19,32 +22,26 @@ with open("prompt_template.txt", "r") as f:
 # Replace placeholder
 prompt = template.replace("{geojson_input}", json.dumps(basic_data, indent=2))
 
-# Query the model
-response = client.chat.completions.create(
+def parse(raw_output):
+    print("==== RAW LLM OUTPUT START ====")
+    print(repr(raw_output.strip()))
+    print("==== RAW LLM OUTPUT END ====")
+    # Extract (and if needed repair) the JSON object
+    return extract_json(raw_output)
+
+
+# Query the model; only a parseable answer is cached
+parsed_metadata = cached_completion(
+    client,
     model="llama3-70b-8192",
     messages=[
         {"role": "system", "content": "You are a JSON-LD generator for IUDX metadata."},
         {"role": "user", "content": prompt}
     ],
-    temperature=0.2
+    temperature=0.2,
+    validate=parse
 )
 
-raw_output = response.choices[0].message.content.strip()
-
-print("==== RAW LLM OUTPUT START ====")
-print(repr(raw_output))
-print("==== RAW LLM OUTPUT END ====")
-
-
-# Extract and clean JSON block
-start = raw_output.find("{")
-end = raw_output.rfind("}") + 1
-if start == -1 or end == -1:
-    raise ValueError("No valid JSON object found in model output.")
-
-clean_json_str = raw_output[start:end]
-parsed_metadata = json.loads(clean_json_str)
-
 # Add UUID as `id`
 parsed_metadata["id"] = str(uuid.uuid4())
 
@@ -3,41 +3,40 @@ import json
 import uuid
 from dotenv import load_dotenv
 from groq import Groq
+from llm_client import ResilientClient
+from llm_cache import cached_completion
+from geojson_stream import read_sample
 
 # Load environment variables
 load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+client = ResilientClient(Groq(api_key=os.getenv("GROQ_API_KEY")))
 
 # Load the prompt template
 with open("prompt_template.txt", "r") as f:
     base_prompt = f.read()
 
 # Load your input GeoJSON
-with open("inputmosque1.geojson", "r") as f:
-    geojson_input = json.load(f)
+geojson_input = read_sample("inputmosque1.geojson")
 
 # Inject input GeoJSON into prompt
 prompt = base_prompt.replace("{geojson_input}", json.dumps(geojson_input, indent=2))
 
-# Send to LLM
-response = client.chat.completions.create(
-    model="llama3-70b-8192",
-    messages=[
-        {"role": "system", "content": "You are a helpful assistant that outputs structured JSON-LD metadata following the IUDX schema."},
-        {"role": "user", "content": prompt}
-    ],
-    temperature=0.2
-)
-
-# Extract the generated JSON-LD text
-response_text = response.choices[0].message.content.strip()
-
-# Try parsing the result to validate
+# Send to LLM (cached on model, temperature and messages); parsing the result validates
+# it, and only a valid JSON answer is cached
 try:
-    jsonld_output = json.loads(response_text)
-except json.JSONDecodeError:
+    jsonld_output = cached_completion(
+        client,
+        model="llama3-70b-8192",
+        messages=[
+            {"role": "system", "content": "You are a helpful assistant that outputs structured JSON-LD metadata following the IUDX schema."},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.2,
+        validate=json.loads
+    )
+except json.JSONDecodeError as e:
     print("LLM output is not valid JSON.")
-    print(response_text)
+    print(e.doc.strip())
     exit(1)
 
 # Save to file
@@ -1,8 +1,10 @@
 import os
 import json
 
-INPUT_DIR = "samples_for_finetuning"
-OUTPUT_FILE = "finetune_data.jsonl"
+# Next to this script, so the trainers that read OUTPUT_FILE find it from any cwd
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+INPUT_DIR = os.path.join(REPO_DIR, "samples_for_finetuning")
+OUTPUT_FILE = os.path.join(REPO_DIR, "finetune_data.jsonl")
 
 ALLOWED_TYPES = [
     "iudx:Text",
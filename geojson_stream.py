@@ -0,0 +1,188 @@
+import re
+import json
+
+CHUNK_SIZE = 1 << 16
+
+# Characters the scanner has to stop at outside / inside string literals
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+_STRING_END = re.compile(r'["\\]')
+_NEXT_VALUE = re.compile(r'[^\s,]')
+
+_decoder = json.JSONDecoder()
+
+
+class FeatureStream:
+    """
+    Incremental GeoJSON reader that yields one feature at a time.
+
+    Only the feature currently being read is held in memory, so FeatureCollections
+    of any size can be processed, whether pretty-printed or on a single line.
+
+    - FeatureCollection: yields each entry of the top-level "features" array.
+    - Top-level array: yields each element.
+    - Any other document (e.g. a single Feature): yields the document itself if it
+      is a Feature; non-GeoJSON documents are available as `.header`.
+
+    After iteration, `.header` holds the top-level members other than "features"
+    (e.g. "name", "crs"), or the extra members of a single Feature (e.g. "filename").
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.header = None
+        self.features_read = 0
+
+    def __iter__(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            yield from self._scan(f)
+
+    def _scan(self, f):
+        buf = ""
+        i = 0                   # scan position in buf
+        mark = 0                # start of outer text not yet copied into outer_parts
+        depth = 0
+        in_string = False
+        string_start = None
+        last_key = None         # last string seen directly inside the top-level object
+        mode = "outer"          # "outer" or "features"
+        features_depth = None
+        found_features = False
+        outer_parts = []
+
+        while True:
+            chunk = f.read(self.chunk_size)
+            buf += chunk
+            eof = not chunk
+
+            while i < len(buf):
+                if mode == "features":
+                    # Between features: skip separators, then decode the next feature whole
+                    m = _NEXT_VALUE.search(buf, i)
+                    if m is None:
+                        i = len(buf)
+                        break
+                    idx = m.start()
+                    if buf[idx] == "]":
+                        mode = "outer"
+                        depth -= 1
+                        mark = idx
+                        i = idx + 1
+                        continue
+                    try:
+                        feature, end = _decoder.raw_decode(buf, idx)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                        i = idx
+                        break
+                    if end == len(buf) and not eof:
+                        # A value ending exactly at the buffer edge may be truncated
+                        i = idx
+                        break
+                    i = end
+                    self.features_read += 1
+                    yield feature
+                    continue
+
+                if in_string:
+                    m = _STRING_END.search(buf, i)
+                    if m is None:
+                        i = len(buf)
+                        break
+                    idx = m.start()
+                    if buf[idx] == "\\":
+                        if idx + 1 >= len(buf):
+                            i = idx
+                            break
+                        i = idx + 2
+                        continue
+                    in_string = False
+                    i = idx + 1
+                    if depth == 1:
+                        last_key = json.loads(buf[string_start:i])
+                    continue
+
+                m = _STRUCTURAL.search(buf, i)
+                if m is None:
+                    i = len(buf)
+                    break
+                idx = m.start()
+                c = buf[idx]
+                i = idx + 1
+
+                if c == '"':
+                    in_string = True
+                    string_start = idx
+                elif c in "{[":
+                    depth += 1
+                    if depth == 1 and c == "[":
+                        mode, features_depth, found_features = "features", 1, True
+                        mark = i
+                    elif depth == 2 and c == "[" and last_key == "features" and not found_features:
+                        outer_parts.append(buf[mark:i])
+                        mode, features_depth, found_features = "features", 2, True
+                        mark = i
+                else:
+                    depth -= 1
+
+            if eof:
+                break
+
+            # Drop everything that is no longer needed, keeping outer text for the header
+            if mode == "features":
+                keep = i
+            elif in_string:
+                keep = string_start
+                outer_parts.append(buf[mark:keep])
+            else:
+                keep = i
+                outer_parts.append(buf[mark:keep])
+            buf = buf[keep:]
+            i -= keep
+            if in_string:
+                string_start -= keep
+            mark = 0
+
+        if features_depth == 1:
+            self.header = {}
+            return
+        outer_parts.append(buf[mark:])
+        document = json.loads("".join(outer_parts))
+        if found_features:
+            document.pop("features", None)
+            self.header = document
+        elif isinstance(document, dict) and document.get("type") == "Feature":
+            self.header = {k: v for k, v in document.items() if k not in ("type", "properties", "geometry")}
+            self.features_read += 1
+            yield document
+        else:
+            self.header = document
+
+
+def iter_features(path, chunk_size=CHUNK_SIZE):
+    """Yield the features of a GeoJSON file one at a time."""
+    return iter(FeatureStream(path, chunk_size))
+
+
+def read_sample(path):
+    """
+    Return a single representative record from an input file without loading it fully.
+
+    For GeoJSON this is the first feature; any other JSON document is returned as-is.
+    """
+    stream = FeatureStream(path)
+    for feature in stream:
+        return feature
+    return stream.header
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for path in sys.argv[1:]:
+        started = time.perf_counter()
+        stream = FeatureStream(path)
+        count = sum(1 for _ in stream)
+        print(f"{path}: {count} features in {time.perf_counter() - started:.3f}s, header={stream.header}")
@@ -0,0 +1,215 @@
+import os
+import sys
+import json
+import hashlib
+
+# Default location of the built snapshot; override with IUDX_VOCAB_INDEX
+DEFAULT_INDEX_PATH = os.getenv(
+    "IUDX_VOCAB_INDEX", os.path.join(os.path.dirname(os.path.abspath(__file__)), "iudx_vocab_index.json")
+)
+INDEX_VERSION = 1
+# The snapshot is built from a JSON-LD download of https://voc.iudx.org.in/
+BUILD_COMMAND = "python iudx_vocabulary.py build <vocab.jsonld>"
+
+# Namespaces used to shorten full IRIs to prefix:name form
+KNOWN_PREFIXES = {
+    "iudx": "https://voc.iudx.org.in/",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "owl": "http://www.w3.org/2002/07/owl#",
+    "schema": "http://schema.org/",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+}
+
+CLASS_TYPES = {"rdfs:Class", "owl:Class"}
+DOMAIN_KEYS = {"rdfs:domain", "iudx:domainIncludes", "schema:domainIncludes"}
+RANGE_KEYS = {"rdfs:range", "iudx:rangeIncludes", "schema:rangeIncludes"}
+SUBCLASS_KEYS = {"rdfs:subClassOf"}
+
+
+def _prefixes(context):
+    prefixes = dict(KNOWN_PREFIXES)
+    contexts = context if isinstance(context, list) else [context]
+    for ctx in contexts:
+        if isinstance(ctx, dict):
+            for name, value in ctx.items():
+                if isinstance(value, str) and value.endswith(("/", "#")):
+                    prefixes[name] = value
+    return prefixes
+
+
+def _compact(iri, prefixes):
+    """'https://voc.iudx.org.in/Text' -> 'iudx:Text'; compact IRIs are returned unchanged."""
+    for name, namespace in prefixes.items():
+        if iri.startswith(namespace):
+            local = iri[len(namespace):]
+            # Prefer the canonical iudx prefix for the IUDX namespace
+            if namespace == KNOWN_PREFIXES["iudx"]:
+                name = "iudx"
+            return f"{name}:{local}"
+    if iri.startswith("http://voc.iudx.org.in/"):
+        return "iudx:" + iri[len("http://voc.iudx.org.in/"):]
+    return iri
+
+
+def _ids(value, prefixes):
+    """IRIs referenced by a JSON-LD value: "x", {"@id": "x"} or lists of those."""
+    values = value if isinstance(value, list) else [value]
+    ids = []
+    for v in values:
+        if isinstance(v, dict):
+            v = v.get("@id")
+        if isinstance(v, str):
+            ids.append(_compact(v, prefixes))
+    return ids
+
+
+def _nodes(document):
+    if isinstance(document, list):
+        for item in document:
+            yield from _nodes(item)
+    elif isinstance(document, dict):
+        if "@graph" in document:
+            yield from _nodes(document["@graph"])
+        elif "@id" in document:
+            yield document
+
+
+def _is_property_type(node_type):
+    local = node_type.split(":")[-1]
+    return local.endswith("Property") or local == "Relationship"
+
+
+def build_index(jsonld_path):
+    """
+    Index the classes and properties of a local JSON-LD vocabulary file (compact or expanded form).
+
+    Returns:
+        dict: {"classes", "properties": {name: {"domain", "range"}}, "superclasses"} plus provenance.
+    """
+    with open(jsonld_path, "rb") as f:
+        raw = f.read()
+    document = json.loads(raw)
+    contexts = [d.get("@context") for d in (document if isinstance(document, list) else [document]) if isinstance(d, dict)]
+    prefixes = _prefixes([c for ctx in contexts for c in (ctx if isinstance(ctx, list) else [ctx])])
+
+    classes = set()
+    properties = {}
+    superclasses = {}
+    for node in _nodes(document):
+        name = _compact(node["@id"], prefixes)
+        members = {_compact(k, prefixes): v for k, v in node.items()}
+        node_types = set(_ids(members.get("@type", []), prefixes)) | set(_ids(members.get("rdf:type", []), prefixes))
+        parents = [p for key in SUBCLASS_KEYS for p in _ids(members.get(key, []), prefixes)]
+        domains = [d for key in DOMAIN_KEYS for d in _ids(members.get(key, []), prefixes)]
+        ranges = [r for key in RANGE_KEYS for r in _ids(members.get(key, []), prefixes)]
+
+        if any(_is_property_type(t) for t in node_types) or domains or ranges:
+            entry = properties.setdefault(name, {"domain": [], "range": []})
+            entry["domain"] = sorted(set(entry["domain"]) | set(domains))
+            entry["range"] = sorted(set(entry["range"]) | set(ranges))
+        elif node_types & CLASS_TYPES or parents:
+            classes.add(name)
+            if parents:
+                superclasses[name] = sorted(set(superclasses.get(name, [])) | set(parents))
+
+    return {
+        "version": INDEX_VERSION,
+        "source": os.path.basename(jsonld_path),
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "classes": sorted(classes),
+        "properties": dict(sorted(properties.items())),
+        "superclasses": dict(sorted(superclasses.items())),
+    }
+
+
+def save_index(index, path=DEFAULT_INDEX_PATH):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+class Vocabulary:
+    """In-memory view of a vocabulary index with O(1) membership lookups."""
+
+    def __init__(self, index):
+        self.index = index
+        self.classes = frozenset(index["classes"])
+        self.properties = {name: (frozenset(p["domain"]), frozenset(p["range"])) for name, p in index["properties"].items()}
+        self.superclasses = {name: tuple(parents) for name, parents in index["superclasses"].items()}
+        # Every value some property declares as its range, e.g. iudx:Number
+        self.range_values = frozenset(r for _, ranges in self.properties.values() for r in ranges)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH):
+        with open(path) as f:
+            index = json.load(f)
+        if index.get("version") != INDEX_VERSION:
+            raise ValueError(f"{path}: unsupported vocabulary index version {index.get('version')}")
+        return cls(index)
+
+    def is_class(self, name):
+        return name in self.classes
+
+    def is_property(self, name):
+        return name in self.properties
+
+    def is_data_schema(self, name):
+        """Whether `name` is usable as a dataSchema: a known class or a declared range."""
+        return name in self.classes or name in self.range_values
+
+    def domain_of(self, name):
+        return self.properties[name][0] if name in self.properties else frozenset()
+
+    def range_of(self, name):
+        return self.properties[name][1] if name in self.properties else frozenset()
+
+    def ancestors(self, name):
+        """All superclasses of a class, nearest first."""
+        seen = []
+        pending = list(self.superclasses.get(name, ()))
+        while pending:
+            parent = pending.pop(0)
+            if parent not in seen:
+                seen.append(parent)
+                pending.extend(self.superclasses.get(parent, ()))
+        return seen
+
+
+_vocabulary = {}
+
+
+def get_vocabulary(path=DEFAULT_INDEX_PATH):
+    """
+    The snapshot at `path`, loaded once per process; None when no snapshot has been built,
+    in which case the validators skip their vocabulary checks (said once on stderr).
+    """
+    if path not in _vocabulary:
+        _vocabulary[path] = Vocabulary.load(path) if os.path.exists(path) else None
+        if _vocabulary[path] is None:
+            print(f"[WARN] No IUDX vocabulary snapshot at {path}; dataSchema and property names are not "
+                  f"checked against the vocabulary. Build it with: {BUILD_COMMAND}", file=sys.stderr)
+    return _vocabulary[path]
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    if len(sys.argv) >= 3 and sys.argv[1] == "build":
+        output = sys.argv[3] if len(sys.argv) > 3 else DEFAULT_INDEX_PATH
+        index = build_index(sys.argv[2])
+        save_index(index, output)
+        print(f"Indexed {len(index['classes'])} classes and {len(index['properties'])} properties into {output}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "check":
+        started = time.perf_counter()
+        vocabulary = get_vocabulary()
+        if vocabulary is None:
+            raise SystemExit(f"No vocabulary snapshot at {DEFAULT_INDEX_PATH}; run: {BUILD_COMMAND}")
+        print(f"Loaded in {(time.perf_counter() - started) * 1000:.1f}ms")
+        for name in sys.argv[2:]:
+            kind = "class" if vocabulary.is_class(name) else "property" if vocabulary.is_property(name) else "unknown"
+            print(f"{name}: {kind}")
+    else:
+        print("Usage: python iudx_vocabulary.py build <vocab.jsonld> [index.json] | check <name>...")
@@ -0,0 +1,186 @@
+import re
+import json
+import heapq
+import bisect
+
+# Matching closer for each opening bracket
+CLOSERS = {"{": "}", "[": "]"}
+OPENERS = {"}": "{", "]": "["}
+
+# A bracket or a quote; a string literal from a quote on (an unterminated one runs to the end)
+TOKEN_PATTERN = re.compile(r'["{}\[\]]')
+STRING_PATTERN = re.compile(r'"(?:[^"\\]+|\\.)*"?', re.DOTALL)
+
+# What may follow a JSON string: a colon, a comma, a closing bracket, a comment or the end
+AFTER_STRING_PATTERN = re.compile(r"\s*(?:[:,}\]]|//|/\*|\Z)")
+
+# String literals (kept as they are), comments and trailing commas, even before a comment (dropped)
+REPAIR_PATTERN = re.compile(
+    r'"(?:[^"\\]+|\\.)*"?|//[^\n]*|/\*.*?\*/|,(?=(?:\s|//[^\n]*|/\*.*?\*/)*[}\]])', re.DOTALL
+)
+
+# ``` or ```json fence markers around a code block
+FENCE_PATTERN = re.compile(r"```[A-Za-z0-9_-]*")
+
+
+def _fenced_ranges(text):
+    """(start, end) of the contents of every complete ``` code block."""
+    markers = list(FENCE_PATTERN.finditer(text))
+    return [(opening.end(), closing.start()) for opening, closing in zip(markers[::2], markers[1::2])]
+
+
+def find_candidates(text):
+    """
+    Spans of every balanced {...} / [...] value in `text`, found in one forward pass.
+
+    Brackets are only counted outside JSON strings (escapes included), and strings are
+    only tracked once inside a bracket, so quotes in the surrounding prose do not throw
+    the scan off. A quote that does not start a terminated string followed by a colon,
+    comma or closer means the brackets still open were prose ('He said "hi {" then
+    {...}'): they are dropped and the scan goes on right after the quote. A stray opener
+    that is never closed does not hide the values nested after it, and a mismatched
+    closer resets the scan.
+
+    The scan never moves backwards, and a quote inside a rejected string would end at the
+    same place, so it is rejected without matching it again: the pass is linear.
+
+    Returns:
+        list[tuple[int, int]]: (start, end) spans ordered by start, so outer values come
+        before the values nested in them.
+    """
+    spans = []
+    stack = []
+    rejected_until = 0
+    pos = 0
+    while True:
+        match = TOKEN_PATTERN.search(text, pos)
+        if match is None:
+            break
+        token, pos = match.group(), match.end()
+        if token == '"':
+            if not stack:
+                continue  # outside any bracket a quote is just prose
+            if match.start() >= rejected_until:
+                string = STRING_PATTERN.match(text, match.start())
+                literal = string.group()
+                if len(literal) > 1 and literal[-1] == '"' and AFTER_STRING_PATTERN.match(text, string.end()):
+                    pos = string.end()
+                    continue
+                # A quote inside the rejected string ends where it does; its closing quote may not
+                rejected_until = string.end() - (len(literal) > 1 and literal[-1] == '"')
+            stack.clear()
+        elif token in CLOSERS:
+            stack.append(match.start())
+        elif stack and text[stack[-1]] == OPENERS[token]:
+            spans.append((stack.pop(), pos))
+        else:
+            stack.clear()
+    return sorted(spans)
+
+
+# A bracket right after `"key":`, `,` or `[` is a member of a JSON container, not a standalone value
+MEMBER_PATTERN = re.compile(r'(?:"\s*:|[,\[])\s*$')
+
+
+def top_level_candidates(text, spans):
+    """
+    The outermost spans: values nested in another balanced span are part of it. Spans
+    left inside a container that was never closed (a truncated response) are dropped
+    too, so a fragment of a cut-off object is never mistaken for the answer.
+    """
+    candidates = []
+    covered_until = 0
+    for start, end in spans:
+        if start < covered_until:
+            continue
+        covered_until = end
+        if not MEMBER_PATTERN.search(text[max(0, start - 64):start]):
+            candidates.append((start, end))
+    return candidates
+
+
+def repair_json(fragment):
+    """
+    Fix the defects models commonly leave in otherwise valid JSON: trailing commas
+    before a closing bracket and // or /* */ comments. Strings are left untouched.
+    """
+    return REPAIR_PATTERN.sub(lambda m: m.group() if m.group()[0] == '"' else "", fragment)
+
+
+def _loads(fragment):
+    try:
+        return json.loads(fragment)
+    except json.JSONDecodeError:
+        return json.loads(repair_json(fragment))
+
+
+def extract_json(text, expect=dict):
+    """
+    The first JSON value in a model response that parses (after repair if needed).
+
+    The candidates come from one find_candidates pass. Only outermost values are tried
+    (see top_level_candidates); when one fails to parse, the outermost values nested in
+    it are tried in its place, from the spans already found. Candidates inside ``` code
+    blocks are tried first, then the rest in order of appearance.
+
+    Args:
+        text (str): The model response.
+        expect (type): dict or list to only accept objects or arrays; None accepts either.
+
+    Raises:
+        ValueError: When no candidate parses.
+    """
+    opener = {dict: "{", list: "["}.get(expect)
+    stripped = text.strip()
+    if stripped[:1] in ((opener,) if opener else CLOSERS):
+        # Fast path: the whole response is the value
+        try:
+            return json.loads(stripped)
+        except json.JSONDecodeError:
+            pass
+
+    fenced = _fenced_ranges(text)
+    inside = lambda span: any(start <= span[0] and span[1] <= end for start, end in fenced)
+    order = lambda span: (bool(fenced) and not inside(span), span)
+    spans = find_candidates(text)
+    queue = [(order(span), span) for span in top_level_candidates(text, spans)]
+    heapq.heapify(queue)
+
+    while queue:
+        _, (start, end) = heapq.heappop(queue)
+        if opener and text[start] != opener:
+            continue
+        try:
+            return _loads(text[start:end])
+        except json.JSONDecodeError:
+            # e.g. '{Note: {"a": 1}}': the outer braces were prose, so try what they enclose
+            nested = spans[bisect.bisect_right(spans, (start, end)):bisect.bisect_left(spans, (end,))]
+            for span in top_level_candidates(text, nested):
+                heapq.heappush(queue, (order(span), span))
+    kind = {dict: "object", list: "array"}.get(expect, "value")
+    raise ValueError(f"No valid JSON {kind} found in model output.")
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: find/rfind + json.loads vs the bracket scan on a large response
+    import timeit
+
+    item = {"name": "sample", "tags": ["a", "b"], "dataDescriptor": {f"field{i}": {"type": ["ValueDescriptor"],
+            "description": f"Field {i} with a {{brace}} and \"quotes\"", "dataSchema": "iudx:Text"} for i in range(300)}}
+    body = json.dumps(item, indent=2)
+    responses = {
+        "clean": body,
+        "prose + fence": "Here is the {metadata} you asked for:\n```json\n" + body + "\n```\nLet me know if you need {more}.",
+        "trailing commas": body.replace('"iudx:Text"\n', '"iudx:Text",\n'),
+    }
+    for label, text in responses.items():
+        def naive():
+            return json.loads(text[text.find("{"):text.rfind("}") + 1])
+        try:
+            naive()
+            naive_result = f"{timeit.timeit(naive, number=50) / 50 * 1000:.2f}ms"
+        except ValueError:
+            naive_result = "fails"
+        assert extract_json(text) == item
+        seconds = timeit.timeit(lambda: extract_json(text), number=50) / 50
+        print(f"{label:<16} {len(text):>7} chars  find/rfind: {naive_result:<8}  extract_json: {seconds * 1000:.2f}ms")
@@ -0,0 +1,432 @@
+import os
+import json
+import time
+import queue
+import asyncio
+import threading
+from functools import partial
+from types import SimpleNamespace
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import httpx
+import groq
+
+try:
+    import llama_cpp
+except ImportError:
+    llama_cpp = None
+
+# Backend for this run: groq (hosted), openai (any OpenAI-compatible server, e.g.
+# llama.cpp's llama-server, vLLM or Ollama) or llamacpp (in-process llama-cpp-python)
+DEFAULT_BACKEND = os.getenv("IUDX_LLM_BACKEND", "groq")
+
+GROQ_MODEL = "llama3-70b-8192"
+LOCAL_BASE_URL = os.getenv("IUDX_LOCAL_LLM_URL", "http://127.0.0.1:8080/v1")
+LOCAL_MODEL = os.getenv("IUDX_LOCAL_LLM_MODEL", "local")
+LLAMACPP_MODEL_PATH = os.getenv("IUDX_LLAMACPP_MODEL")
+LLAMACPP_CONTEXT = int(os.getenv("IUDX_LLAMACPP_CONTEXT", "8192"))
+
+# Dynamic batching: dispatch when this many requests are waiting, or this long after the first
+# (a request with nothing queued behind it is dispatched at once)
+DEFAULT_MAX_BATCH = int(os.getenv("IUDX_LLM_MAX_BATCH", "8"))
+DEFAULT_MAX_WAIT = float(os.getenv("IUDX_LLM_BATCH_WAIT", "0.02"))
+
+
+def _completion(content, model, usage=None, finish_reason="stop"):
+    """An SDK-shaped chat completion, so callers cannot tell backends apart."""
+    usage = usage or {}
+    return SimpleNamespace(
+        model=model,
+        choices=[SimpleNamespace(index=0, finish_reason=finish_reason,
+                                 message=SimpleNamespace(role="assistant", content=content))],
+        usage=SimpleNamespace(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            total_tokens=usage.get("total_tokens", 0),
+        ),
+    )
+
+
+def _from_openai(data, model):
+    choice = data["choices"][0]
+    return _completion(choice["message"]["content"], data.get("model", model), data.get("usage"),
+                       choice.get("finish_reason", "stop"))
+
+
+class _ChunkStream:
+    """Iterator of SDK-shaped stream chunks with the close() llm_stream expects."""
+
+    def __init__(self, pieces, close=None):
+        self.pieces = pieces
+        self._close = close
+
+    def __iter__(self):
+        for piece in self.pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, finish_reason=None,
+                                                           delta=SimpleNamespace(content=piece))])
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+
+
+class _AsyncChunkStream:
+    """Async view of a _ChunkStream; each chunk is pulled on the backend's executor."""
+
+    def __init__(self, stream, executor):
+        self.stream = stream
+        self.chunks = iter(stream)
+        self.executor = executor
+        self.pending = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self.pending = self.executor.submit(next, self.chunks, None)
+        chunk = await asyncio.wrap_future(self.pending)
+        if chunk is None:
+            raise StopAsyncIteration
+        return chunk
+
+    async def close(self):
+        # A generator cannot be closed while another thread is inside its next() (e.g.
+        # after the awaiting coroutine was cancelled), so let that call finish first
+        if self.pending is not None and not self.pending.done():
+            await asyncio.wait({asyncio.wrap_future(self.pending)})
+        self.stream.close()
+
+
+class DynamicBatcher:
+    """
+    Groups requests that arrive close together and runs them as one batch.
+
+    A batch is dispatched once `max_batch` requests are waiting or `max_wait` seconds
+    after its first request arrived, whichever comes first; a request with nothing
+    queued behind it (e.g. from a sequential caller) is dispatched at once. Identical
+    requests in a batch are only run once. Up to `parallel` batches run at the same time.
+
+    Args:
+        run_batch: fn(list of requests) -> list of results, in the same order.
+    """
+
+    def __init__(self, run_batch, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT, parallel=1):
+        self.run_batch = run_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.slots = threading.Semaphore(parallel)
+        self.executor = ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="llm-batch")
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "batches": 0, "deduplicated": 0}
+        threading.Thread(target=self._collect, daemon=True, name="llm-batcher").start()
+
+    def submit(self, request, timeout=None):
+        """
+        Queue a request and block until its batch has run; returns its result.
+
+        Raises:
+            concurrent.futures.TimeoutError: When the result is not there after `timeout` seconds.
+        """
+        future = Future()
+        self.queue.put((request, future))
+        return future.result(timeout)
+
+    def _collect(self):
+        while True:
+            batch = [self.queue.get()]
+            # Only wait for company when some is already queued; otherwise a sequential
+            # caller would pay max_wait on every request
+            deadline = time.monotonic() + (self.max_wait if not self.queue.empty() else 0)
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.slots.acquire()
+            self.executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        try:
+            unique = {}
+            for request, future in batch:
+                unique.setdefault(json.dumps(request, sort_keys=True), (request, []))[1].append(future)
+            with self.lock:
+                self.counts["requests"] += len(batch)
+                self.counts["batches"] += 1
+                self.counts["deduplicated"] += len(batch) - len(unique)
+            groups = list(unique.values())
+            try:
+                results = self.run_batch([request for request, _ in groups])
+            except Exception as e:
+                for _, futures in groups:
+                    for future in futures:
+                        future.set_exception(e)
+                return
+            for (_, futures), result in zip(groups, results):
+                for future in futures:
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+        finally:
+            self.slots.release()
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        counts["mean_batch_size"] = round(counts["requests"] / counts["batches"], 2) if counts["batches"] else None
+        return counts
+
+
+class _LocalBackend:
+    """
+    Shared plumbing of the local backends: an SDK-compatible `chat.completions.create`
+    whose non-streaming requests go through a DynamicBatcher, and an async client that
+    runs it on a thread pool so concurrent coroutines end up in the same batches.
+
+    Local servers serve a single model, so the `model` argument of requests is ignored.
+    """
+
+    name = None
+    model = None
+
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT, parallel=1):
+        self.batcher = DynamicBatcher(self.run_batch, max_batch, max_wait, parallel)
+        # Enough threads for a full batch to be waiting while the previous ones run
+        self.executor = ThreadPoolExecutor(max_workers=max_batch * (parallel + 1), thread_name_prefix=f"llm-{self.name}")
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def run_batch(self, requests):
+        raise NotImplementedError
+
+    def stream(self, request, timeout=None):
+        raise NotImplementedError
+
+    def timeout_error(self):
+        """The SDK's timeout exception, which ResilientClient retries."""
+        return groq.APITimeoutError(request=httpx.Request("POST", f"http://{self.name}/chat/completions"))
+
+    def create(self, messages, model=None, temperature=None, stream=False, timeout=None, **extra):
+        request = {"messages": messages, "temperature": temperature, **extra}
+        if stream:
+            return self.stream(request, timeout)
+        try:
+            return self.batcher.submit(request, timeout)
+        except FutureTimeoutError:
+            # The batch still runs (and its result still reaches the other requests in it)
+            raise self.timeout_error()
+
+    async def acreate(self, **kwargs):
+        result = await asyncio.get_running_loop().run_in_executor(self.executor, partial(self.create, **kwargs))
+        return _AsyncChunkStream(result, self.executor) if kwargs.get("stream") else result
+
+    def client(self):
+        return self
+
+    def async_client(self):
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.acreate)))
+
+    def stats(self):
+        return {"backend": self.name, "model": self.model, "batching": self.batcher.stats()}
+
+
+class OpenAICompatibleBackend(_LocalBackend):
+    """
+    Any server speaking the OpenAI chat completions API (llama.cpp's llama-server, vLLM,
+    Ollama, LM Studio, ...).
+
+    The requests of a batch are sent together over one keep-alive connection pool, so a
+    server with several slots (llama-server --parallel N, vLLM) decodes them in the same
+    forward passes. Errors are raised as the Groq SDK's exception types so that
+    ResilientClient retries them the same way.
+    """
+
+    name = "openai"
+
+    def __init__(self, base_url=LOCAL_BASE_URL, model=LOCAL_MODEL, api_key=None, timeout=600.0,
+                 max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT):
+        self.model = model
+        self.http = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout,
+            headers={"Authorization": f"Bearer {api_key or os.getenv('IUDX_LOCAL_LLM_KEY', 'local')}"},
+            limits=httpx.Limits(max_connections=2 * max_batch, max_keepalive_connections=2 * max_batch),
+        )
+        self.requests = ThreadPoolExecutor(max_workers=2 * max_batch, thread_name_prefix="llm-openai-http")
+        super().__init__(max_batch, max_wait, parallel=2)
+
+    def _send(self, request, stream=False, timeout=None):
+        body = dict(request, model=self.model, stream=stream)
+        # Per request when given, else the client's default
+        options = {"timeout": timeout} if timeout is not None else {}
+        try:
+            response = self.http.send(self.http.build_request("POST", "/chat/completions", json=body, **options),
+                                      stream=stream)
+        except httpx.TimeoutException as e:
+            raise groq.APITimeoutError(request=e.request)
+        except httpx.TransportError as e:
+            raise groq.APIConnectionError(request=e.request)
+        if response.status_code >= 400:
+            response.read()
+            response.close()
+            raise groq.APIStatusError(f"Error code: {response.status_code} - {response.text}", response=response, body=None)
+        return response
+
+    def _post(self, request):
+        try:
+            return _from_openai(self._send(request).json(), self.model)
+        except Exception as e:
+            return e
+
+    def run_batch(self, requests):
+        return list(self.requests.map(self._post, requests))
+
+    def stream(self, request, timeout=None):
+        response = self._send(request, stream=True, timeout=timeout)
+
+        def pieces():
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                for choice in json.loads(data).get("choices", []):
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield content
+
+        return _ChunkStream(pieces(), close=response.close)
+
+
+class LlamaCppBackend(_LocalBackend):
+    """
+    In-process llama.cpp through llama-cpp-python, for fully offline runs.
+
+    The model is loaded on first use. A llama_cpp.Llama instance decodes one sequence at
+    a time, so the requests of a batch run back to back under a lock; batching still
+    collapses duplicate prompts, and the CPU is never shared between two decodes. For
+    parallel decoding run llama-server with --parallel N and use the openai backend.
+    """
+
+    name = "llamacpp"
+
+    def __init__(self, model_path=LLAMACPP_MODEL_PATH, n_ctx=LLAMACPP_CONTEXT, n_threads=None,
+                 max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT):
+        if llama_cpp is None:
+            raise ImportError("The llamacpp backend needs llama-cpp-python (pip install llama-cpp-python)")
+        if not model_path:
+            raise ValueError("Set IUDX_LLAMACPP_MODEL to the path of a GGUF model file")
+        self.model_path = model_path
+        self.model = os.path.basename(model_path)
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or os.cpu_count()
+        self._llm = None
+        self.lock = threading.Lock()
+        super().__init__(max_batch, max_wait, parallel=1)
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            self._llm = llama_cpp.Llama(model_path=self.model_path, n_ctx=self.n_ctx, n_threads=self.n_threads, verbose=False)
+        return self._llm
+
+    def _generate(self, request, stream=False):
+        return self.llm.create_chat_completion(
+            messages=request["messages"],
+            temperature=request.get("temperature") or 0.0,
+            stream=stream,
+        )
+
+    def run_batch(self, requests):
+        results = []
+        with self.lock:
+            for request in requests:
+                try:
+                    results.append(_from_openai(self._generate(request), self.model))
+                except Exception as e:
+                    results.append(e)
+        return results
+
+    def stream(self, request, timeout=None):
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        def pieces():
+            with self.lock:
+                # Decoding cannot be interrupted, so the deadline is checked between tokens
+                for event in self._generate(request, stream=True):
+                    if deadline is not None and time.monotonic() > deadline:
+                        raise self.timeout_error()
+                    content = event["choices"][0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+
+        # Closing the generator early releases the lock for the next request
+        generator = pieces()
+        return _ChunkStream(generator, close=generator.close)
+
+
+class GroqBackend:
+    """The hosted Groq API (the default); requests go straight to the SDK client."""
+
+    name = "groq"
+    model = GROQ_MODEL
+
+    def client(self):
+        return groq.Groq(api_key=os.getenv("GROQ_API_KEY"))
+
+    def async_client(self):
+        return groq.AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+    def stats(self):
+        return {"backend": self.name, "model": self.model}
+
+
+BACKENDS = {
+    "groq": GroqBackend,
+    "openai": OpenAICompatibleBackend,
+    "llamacpp": LlamaCppBackend,
+}
+
+_backends = {}
+
+
+def get_backend(name=None, **options):
+    """The backend called `name` (default: IUDX_LLM_BACKEND), created once per set of options."""
+    # Read at call time so a value loaded from .env after import still applies
+    name = name or os.getenv("IUDX_LLM_BACKEND", DEFAULT_BACKEND)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend {name!r}; choose from {sorted(BACKENDS)}")
+    key = (name, tuple(sorted(options.items())))
+    if key not in _backends:
+        _backends[key] = BACKENDS[name](**options)
+    return _backends[key]
+
+
+if __name__ == "__main__":
+    # Throughput of concurrent requests through the openai backend against the mock server
+    import sys
+    from mock_groq_server import start_server
+
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    server = start_server(latency=latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    def prompt(i):
+        return [{"role": "user", "content": f"Generate metadata for dataset {i % (count // 2)}"}]
+
+    for max_batch in (1, 8):
+        backend = OpenAICompatibleBackend(base_url=base_url, max_batch=max_batch)
+        pool = ThreadPoolExecutor(max_workers=count)
+        started = time.perf_counter()
+        responses = list(pool.map(lambda i: backend.create(messages=prompt(i), temperature=0.2), range(count)))
+        seconds = time.perf_counter() - started
+        tokens = sum(r.usage.completion_tokens for r in responses)
+        print(f"max_batch={max_batch}: {count} requests in {seconds:.2f}s, {tokens / seconds:.0f} completion tokens/s, "
+              f"{backend.batcher.stats()}")
+    server.shutdown()
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from llm_stream import DEFAULT_STREAM, stream_completion
+
+# Cache location and switches can be overridden from the environment
+DEFAULT_CACHE_PATH = os.getenv(
+    "IUDX_LLM_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".llm_cache.sqlite"),
+)
+DEFAULT_MAX_ENTRIES = int(os.getenv("IUDX_LLM_CACHE_MAX_ENTRIES", "10000"))
+DEFAULT_MAX_BYTES = int(os.getenv("IUDX_LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def cache_bypassed():
+    """True when IUDX_LLM_CACHE_BYPASS is set to a truthy value."""
+    return os.getenv("IUDX_LLM_CACHE_BYPASS", "").lower() in {"1", "true", "yes"}
+
+
+def cache_key(model, temperature, messages):
+    """
+    Content hash of everything that determines a completion.
+
+    The messages carry the system message and the fully rendered prompt, so any
+    change to the template or the input JSON produces a different key.
+    """
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": messages},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache of LLM completions with LRU eviction.
+
+    Entries beyond `max_entries`, or beyond `max_bytes` of stored response text,
+    are evicted least-recently-used first.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key, response, model=None):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            key, size = self.conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def stats(self):
+        with self.lock:
+            count, total = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total, "path": self.path}
+
+    def close(self):
+        self.conn.close()
+
+
+_default_cache = None
+
+
+def get_cache():
+    """Process-wide cache instance at DEFAULT_CACHE_PATH, opened on first use."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
+
+
+def cached_completion(client, model, messages, temperature, bypass=None, cache=None, stream=None, monitor=None,
+                      validate=None):
+    """
+    Return the completion text for `messages`, served from the cache when possible.
+
+    With `bypass` (or IUDX_LLM_CACHE_BYPASS=1) the lookup is skipped and the model is
+    always queried; the fresh response still replaces the stored one.
+
+    With `stream` (or IUDX_LLM_STREAM=1) a fresh response is streamed through `monitor`
+    (see llm_stream.JsonStreamMonitor), which may abort it early with StreamAborted;
+    aborted responses are not cached.
+
+    With `validate`, its result (e.g. the parsed item) is returned instead of the text.
+    A response is only cached once `validate` accepts it, and a cached response it
+    rejects with ValueError is treated as a miss.
+    """
+    if stream is None:
+        stream = DEFAULT_STREAM
+    if bypass is None:
+        bypass = cache_bypassed()
+    cache = cache or get_cache()
+    key = cache_key(model, temperature, messages)
+
+    if not bypass:
+        hit = cache.get(key)
+        if hit is not None:
+            if validate is None:
+                return hit
+            try:
+                return validate(hit)
+            except ValueError:
+                pass
+
+    if stream:
+        content = stream_completion(client, monitor, model=model, messages=messages, temperature=temperature)
+    else:
+        response = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
+        content = response.choices[0].message.content
+    result = validate(content) if validate is not None else content
+    cache.put(key, content, model=model)
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the LLM response cache.")
+    parser.add_argument("command", choices=["stats", "clear"])
+    args = parser.parse_args()
+
+    if args.command == "clear":
+        get_cache().clear()
+    print(get_cache().stats())
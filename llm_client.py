@@ -0,0 +1,355 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import groq
+
+# Defaults can be tuned per run from the environment
+DEFAULT_TIMEOUT = float(os.getenv("IUDX_LLM_TIMEOUT", "60"))
+DEFAULT_MAX_RETRIES = int(os.getenv("IUDX_LLM_MAX_RETRIES", "5"))
+DEFAULT_HEDGE = os.getenv("IUDX_LLM_HEDGE", "").lower() in {"1", "true", "yes"}
+# Longest sleep between retries, including one a server asks for with Retry-After
+DEFAULT_MAX_BACKOFF = float(os.getenv("IUDX_LLM_MAX_BACKOFF", "30"))
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+def is_retryable(error):
+    """429s, 5xxs, timeouts and connection failures are worth retrying."""
+    if isinstance(error, (groq.APITimeoutError, groq.APIConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+
+def backoff_delay(attempt, base=0.5, cap=DEFAULT_MAX_BACKOFF):
+    """Exponential backoff with full jitter for the given (0-based) retry attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after(error):
+    """Server-provided Retry-After delay in seconds, if any."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def close_response(response):
+    """Release a response nobody will read (e.g. the losing stream of a hedged request)."""
+    close = getattr(response, "close", None)
+    return close() if callable(close) else None
+
+
+class LatencyTracker:
+    """Rolling window of request latencies used to derive the hedging deadline."""
+
+    def __init__(self, window=200, min_samples=20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def p95(self):
+        with self.lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for `cooldown`
+    seconds; after that a single trial call is let through (half-open).
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        """Returns True when this call is the half-open trial; see release_trial."""
+        with self.lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.cooldown or self.trial_in_flight:
+                raise CircuitOpenError("LLM circuit breaker is open; skipping request")
+            self.trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """End a trial that produced no verdict (a non-retryable error or a cancellation)."""
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+
+class _Policy:
+    """Retry, timeout and hedging settings shared by the sync and async clients."""
+
+    def __init__(self, timeout, max_retries, hedge, hedge_after, breaker, max_backoff=DEFAULT_MAX_BACKOFF):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+        self.max_backoff = max_backoff
+        self.latency = LatencyTracker()
+        self.breaker = breaker or CircuitBreaker()
+        # Updated from every thread (and hedge worker) sharing the client
+        self.counts = {"requests": 0, "retries": 0, "hedges": 0, "failures": 0}
+        self.lock = threading.Lock()
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        return dict(counts, breaker=self.breaker.state, p95=self.latency.p95())
+
+    def hedge_deadline(self):
+        """Seconds to wait before sending a duplicate request, or None if hedging is off."""
+        if not self.hedge:
+            return None
+        return self.latency.p95() or self.hedge_after
+
+    def delay_for(self, error, attempt):
+        """The server's Retry-After when it sent one, else jittered backoff; never above max_backoff."""
+        server = retry_after(error)
+        if server is not None:
+            return min(max(server, 0.0), self.max_backoff)
+        return backoff_delay(attempt, cap=self.max_backoff)
+
+
+def _close_future_result(future):
+    if not future.cancelled() and future.exception() is None:
+        close_response(future.result())
+
+
+def _without_retries(client):
+    # Retrying is handled here; stop the SDK from retrying underneath us
+    return client.with_options(max_retries=0) if hasattr(client, "with_options") else client
+
+
+class ResilientClient:
+    """
+    Wraps a Groq client with timeouts, retries, hedging and a circuit breaker.
+
+    Exposes the same `client.chat.completions.create(...)` call as the SDK, so it can
+    be dropped in wherever a Groq client is used.
+
+    Args:
+        client: A `groq.Groq` (or API-compatible) client.
+        timeout (float): Per-request timeout in seconds.
+        max_retries (int): Retries for 429/5xx/timeout/connection errors.
+        hedge (bool): Send a duplicate request when the first has not answered by the
+            rolling p95 latency (or `hedge_after` until enough samples exist).
+        breaker (CircuitBreaker): Shared breaker; a new one is created by default.
+    """
+
+    def __init__(self, client, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 hedge=DEFAULT_HEDGE, hedge_after=10.0, breaker=None):
+        self.client = _without_retries(client)
+        self.policy = _Policy(timeout, max_retries, hedge, hedge_after, breaker)
+        self.executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge") if hedge else None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @property
+    def stats(self):
+        return self.policy.stats()
+
+    def _call(self, kwargs):
+        started = time.monotonic()
+        response = self.client.chat.completions.create(timeout=self.policy.timeout, **kwargs)
+        self.policy.latency.record(time.monotonic() - started)
+        return response
+
+    def _call_hedged(self, kwargs, deadline):
+        first = self.executor.submit(self._call, kwargs)
+        done, _ = wait([first], timeout=deadline)
+        if done:
+            return first.result()
+
+        self.policy.count("hedges")
+        second = self.executor.submit(self._call, kwargs)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # The loser keeps running on its thread; close its response when it lands
+                    for loser in {first, second} - {future}:
+                        loser.add_done_callback(_close_future_result)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def create(self, **kwargs):
+        policy = self.policy
+        attempt = 0
+        while True:
+            trial = policy.breaker.before_call()
+            settled = False
+            policy.count("requests")
+            try:
+                deadline = policy.hedge_deadline()
+                if deadline is not None and self.executor is not None:
+                    response = self._call_hedged(kwargs, deadline)
+                else:
+                    response = self._call(kwargs)
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    policy.breaker.record_failure()
+                    settled = True
+                if not retryable or attempt >= policy.max_retries:
+                    policy.count("failures")
+                    raise
+                time.sleep(policy.delay_for(e, attempt))
+                attempt += 1
+                policy.count("retries")
+                continue
+            else:
+                policy.breaker.record_success()
+                settled = True
+                return response
+            finally:
+                # Never leave the half-open trial claimed, however the attempt ended
+                if trial and not settled:
+                    policy.breaker.release_trial()
+
+
+class AsyncResilientClient:
+    """Asyncio counterpart of ResilientClient for `groq.AsyncGroq` clients."""
+
+    def __init__(self, client, timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 hedge=DEFAULT_HEDGE, hedge_after=10.0, breaker=None):
+        self.client = _without_retries(client)
+        self.policy = _Policy(timeout, max_retries, hedge, hedge_after, breaker)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @property
+    def stats(self):
+        return self.policy.stats()
+
+    async def _call(self, kwargs):
+        started = time.monotonic()
+        response = await self.client.chat.completions.create(timeout=self.policy.timeout, **kwargs)
+        self.policy.latency.record(time.monotonic() - started)
+        return response
+
+    async def _call_hedged(self, kwargs, deadline):
+        first = asyncio.ensure_future(self._call(kwargs))
+        done, _ = await asyncio.wait({first}, timeout=deadline)
+        if done:
+            return first.result()
+
+        self.policy.count("hedges")
+        second = asyncio.ensure_future(self._call(kwargs))
+        pending = {first, second}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        # Both may have finished together; the other response is never read
+                        for loser in done - {task}:
+                            if loser.exception() is None:
+                                closed = close_response(loser.result())
+                                if asyncio.iscoroutine(closed):
+                                    await closed
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def create(self, **kwargs):
+        policy = self.policy
+        attempt = 0
+        while True:
+            trial = policy.breaker.before_call()
+            settled = False
+            policy.count("requests")
+            try:
+                deadline = policy.hedge_deadline()
+                if deadline is not None:
+                    response = await self._call_hedged(kwargs, deadline)
+                else:
+                    response = await self._call(kwargs)
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    policy.breaker.record_failure()
+                    settled = True
+                if not retryable or attempt >= policy.max_retries:
+                    policy.count("failures")
+                    raise
+                await asyncio.sleep(policy.delay_for(e, attempt))
+                attempt += 1
+                policy.count("retries")
+                continue
+            else:
+                policy.breaker.record_success()
+                settled = True
+                return response
+            finally:
+                # Never leave the half-open trial claimed, however the attempt ended
+                if trial and not settled:
+                    policy.breaker.release_trial()
+
+
+def make_client(backend=None, **options):
+    """
+    ResilientClient around the client of an llm_backends backend (default: IUDX_LLM_BACKEND,
+    i.e. Groq configured from GROQ_API_KEY / GROQ_BASE_URL).
+    """
+    from llm_backends import get_backend
+    return ResilientClient(get_backend(backend).client(), **options)
+
+
+def make_async_client(backend=None, **options):
+    """AsyncResilientClient around the async client of an llm_backends backend."""
+    from llm_backends import get_backend
+    return AsyncResilientClient(get_backend(backend).async_client(), **options)
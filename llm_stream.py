@@ -0,0 +1,271 @@
+import os
+import re
+import json
+import threading
+
+from json_extract import repair_json
+
+# Stream completions instead of waiting for the whole response; override per call
+DEFAULT_STREAM = os.getenv("IUDX_LLM_STREAM", "").lower() in {"1", "true", "yes"}
+
+# A leading ``` or ```json fence line is tolerated before the object
+FENCE_PREFIX = re.compile(r"```[A-Za-z0-9_-]*")
+
+
+class StreamAborted(ValueError):
+    """Raised when a streamed completion is abandoned because it cannot yield valid output."""
+
+    def __init__(self, reason, text=""):
+        super().__init__(reason)
+        self.reason = reason
+        self.text = text
+
+
+class JsonStreamMonitor:
+    """
+    Incremental checks on a JSON object whose text arrives in chunks.
+
+    The text is scanned once as it arrives. The moment a top-level member is complete it
+    is parsed and handed to its validator, so e.g. the dataDescriptor is checked while
+    the rest of the item is still being generated. feed() raises StreamAborted as soon
+    as the output can no longer be accepted:
+
+    - anything other than whitespace (or a ``` fence) before the opening `{`
+    - a first key other than `first_key`
+    - a member value that is not valid JSON
+    - a validator reporting problems
+
+    Args:
+        first_key (str): Key the object must start with; None accepts any.
+        validators (dict): {key: fn(value) -> list of problems} for top-level members.
+    """
+
+    def __init__(self, first_key=None, validators=None):
+        self.first_key = first_key
+        self.validators = validators or {}
+        self.members = {}
+        self.text = ""
+        self.done = False
+        self._pos = None  # next index to scan; None until the opening brace is found
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._phase = "key"  # key -> colon -> value, for top-level members
+        self._key_start = None
+        self._key = None
+        self._value_start = None
+
+    def _abort(self, reason):
+        raise StreamAborted(reason, self.text)
+
+    def _find_start(self):
+        head = self.text.lstrip()
+        fence = FENCE_PREFIX.match(head)
+        if fence:
+            head = head[fence.end():].lstrip()
+        elif "```".startswith(head):
+            return  # possibly the start of a fence
+        if not head:
+            return
+        if head[0] != "{":
+            self._abort(f"output does not start with a JSON object: {head[:40]!r}")
+        self._pos = len(self.text) - len(head)
+
+    def _finish_member(self, end):
+        raw = self.text[self._value_start:end].strip()
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            try:
+                value = json.loads(repair_json(raw))
+            except json.JSONDecodeError:
+                self._abort(f"value of {self._key!r} is not valid JSON")
+        self.members[self._key] = value
+        validate = self.validators.get(self._key)
+        if validate is not None:
+            problems = validate(value)
+            if problems:
+                self._abort(f"{self._key} is invalid: " + "; ".join(problems))
+        self._key = self._value_start = None
+        self._phase = "key"
+
+    def feed(self, chunk):
+        """Add the next piece of the response; raises StreamAborted when it diverges."""
+        self.text += chunk
+        if self.done:
+            return
+        if self._pos is None:
+            self._find_start()
+            if self._pos is None:
+                return
+
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._phase == "key":
+                        self._key = json.loads(text[self._key_start:i + 1])
+                        if not self.members and self.first_key is not None and self._key != self.first_key:
+                            self._abort(f"first key is {self._key!r}, expected {self.first_key!r}")
+                        self._phase = "colon"
+                continue
+            if ch in " \t\r\n":
+                continue
+            top_level = self._depth == 1
+            if top_level and self._phase == "value" and self._value_start is None and ch not in ",}":
+                self._value_start = i
+            if ch == '"':
+                self._in_string = True
+                if top_level and self._phase == "key":
+                    self._key_start = i
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._phase == "value":
+                        self._finish_member(i)
+                    self.done = True
+                    break
+            elif top_level and ch == ":" and self._phase == "colon":
+                self._phase = "value"
+            elif top_level and ch == "," and self._phase == "value":
+                self._finish_member(i)
+        self._pos = len(text)
+
+
+class StreamMetrics:
+    """Counts of streamed completions, how many were aborted early and the text received."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.streams = 0
+        self.aborted = 0
+        self.chars = 0
+        self.aborted_chars = 0
+
+    def record(self, text, aborted=False):
+        with self.lock:
+            self.streams += 1
+            self.chars += len(text)
+            if aborted:
+                self.aborted += 1
+                self.aborted_chars += len(text)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "streams": self.streams,
+                "aborted": self.aborted,
+                "chars_received": self.chars,
+                "chars_before_abort": self.aborted_chars,
+            }
+
+
+# Process-wide counters, reported by the batch generator
+stream_metrics = StreamMetrics()
+
+
+def _delta(chunk):
+    if not chunk.choices:
+        return None
+    return chunk.choices[0].delta.content
+
+
+def stream_completion(client, monitor=None, **kwargs):
+    """
+    Run a chat completion with stream=True and return its full text.
+
+    Every chunk is fed to `monitor` (a JsonStreamMonitor); when it raises StreamAborted
+    the connection is closed straight away so no further tokens are generated or read.
+    """
+    stream = client.chat.completions.create(stream=True, **kwargs)
+    parts = []
+    try:
+        for chunk in stream:
+            delta = _delta(chunk)
+            if delta:
+                parts.append(delta)
+                if monitor is not None:
+                    monitor.feed(delta)
+    except StreamAborted:
+        stream_metrics.record("".join(parts), aborted=True)
+        raise
+    finally:
+        stream.close()
+    text = "".join(parts)
+    stream_metrics.record(text)
+    return text
+
+
+async def astream_completion(client, monitor=None, **kwargs):
+    """Asyncio counterpart of stream_completion."""
+    stream = await client.chat.completions.create(stream=True, **kwargs)
+    parts = []
+    try:
+        async for chunk in stream:
+            delta = _delta(chunk)
+            if delta:
+                parts.append(delta)
+                if monitor is not None:
+                    monitor.feed(delta)
+    except StreamAborted:
+        stream_metrics.record("".join(parts), aborted=True)
+        raise
+    finally:
+        await stream.close()
+    text = "".join(parts)
+    stream_metrics.record(text)
+    return text
+
+
+if __name__ == "__main__":
+    # Time to a verdict on a bad generation: full response vs streamed with early abort
+    import sys
+    import time
+    from groq import Groq
+    from mock_groq_server import DEFAULT_RESPONSE, start_server
+
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    good = json.dumps(DEFAULT_RESPONSE, indent=2)
+    bad_outputs = {
+        "prose before {": "Sure! Here is the metadata you asked for:\n" + good,
+        "wrong first key": json.dumps({"name": "x", **DEFAULT_RESPONSE}, indent=2),
+        "invalid dataDescriptor": good.replace('"iudx:Point"', '"Point"'),
+    }
+    state = {"response": good}
+    server = start_server(responder=lambda messages: state["response"], latency=latency)
+    client = Groq(api_key="mock", base_url=f"http://127.0.0.1:{server.server_address[1]}")
+
+    from descriptor_validation import validate_descriptor
+
+    def descriptor_problems(descriptor):
+        return [f"{key}: {', '.join(problems)}" for key, problems in validate_descriptor(descriptor, vocabulary=False).items()]
+
+    request = dict(model="mock", messages=[{"role": "user", "content": "metadata"}], temperature=0.2)
+    for label, output in [("valid", good), *bad_outputs.items()]:
+        state["response"] = output
+        started = time.perf_counter()
+        client.chat.completions.create(**request)
+        full = time.perf_counter() - started
+
+        monitor = JsonStreamMonitor(first_key="@context", validators={"dataDescriptor": descriptor_problems})
+        started = time.perf_counter()
+        try:
+            stream_completion(client, monitor, **request)
+            verdict = "accepted"
+        except StreamAborted as e:
+            verdict = f"aborted ({e.reason[:40]})"
+        streamed = time.perf_counter() - started
+        print(f"{label:<24} full: {full:.2f}s  streamed: {streamed:.2f}s  {verdict}")
+    print(stream_metrics.stats())
+    server.shutdown()
@@ -0,0 +1,199 @@
+import json
+import time
+import random
+import threading
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Canned completion returned when no response file/responder is configured
+DEFAULT_RESPONSE = {
+    "@context": "https://voc.iudx.org.in/",
+    "type": ["iudx:Resource"],
+    "name": "mock-resource",
+    "label": "Mock Resource",
+    "description": "Metadata returned by the local mock Groq server.",
+    "tags": ["mock"],
+    "location": {"address": "India", "type": "Place"},
+    "dataDescriptor": {
+        "@context": "https://voc.iudx.org.in/",
+        "type": ["iudx:DataDescriptor"],
+        "dataDescriptorLabel": "Data Descriptor for mock resource",
+        "description": "Describes the data structure of the mock resource.",
+        "geometry": {
+            "type": ["ValueDescriptor"],
+            "description": "Geographical representation corresponding to this observation.",
+            "dataSchema": "iudx:Point"
+        }
+    },
+    "itemStatus": "ACTIVE"
+}
+
+# Characters per streamed chunk (a few tokens, like the real API)
+STREAM_CHUNK_CHARS = 16
+
+COMPLETION_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+
+
+def default_responder(messages):
+    """Return the canned JSON-LD completion for any chat request."""
+    return json.dumps(DEFAULT_RESPONSE, indent=2)
+
+
+def count_tokens(text):
+    """Rough token estimate (~4 characters per token), good enough for benchmarks."""
+    return max(1, len(text) // 4)
+
+
+def make_handler(responder, latency, fail_first=0, fail_status=429, error_rate=0.0):
+    """
+    Build the request handler.
+
+    `latency` is seconds per response (or a callable returning them). The first
+    `fail_first` requests, and a random `error_rate` fraction after that, are answered
+    with `fail_status` to exercise client retries.
+    """
+    counter = {"requests": 0}
+    lock = threading.Lock()
+
+    class MockGroqHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if self.path not in COMPLETION_PATHS:
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            messages = request.get("messages", [])
+
+            with lock:
+                counter["requests"] += 1
+                number = counter["requests"]
+            if number <= fail_first or random.random() < error_rate:
+                body = json.dumps({"error": {"message": "mock failure", "type": "mock_error"}}).encode()
+                self.send_response(fail_status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            delay = latency() if callable(latency) else latency
+            content = responder(messages)
+            if request.get("stream"):
+                self.stream_content(request, content, delay)
+                return
+            if delay:
+                time.sleep(delay)
+
+            prompt_tokens = sum(count_tokens(m.get("content", "")) for m in messages)
+            completion_tokens = count_tokens(content)
+            body = json.dumps({
+                "id": f"chatcmpl-mock-{time.time_ns()}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens
+                }
+            }).encode()
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up on this request (timeout or hedged duplicate)
+                pass
+
+        def stream_content(self, request, content, delay):
+            """
+            Answer as server-sent events, a few tokens per chunk. `delay` is spread over
+            the chunks, like generation time, so a client that disconnects early stops
+            the remaining chunks (and their latency) from being produced.
+            """
+            pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)] or [""]
+            base = {"id": f"chatcmpl-mock-{time.time_ns()}", "object": "chat.completion.chunk",
+                    "created": int(time.time()), "model": request.get("model", "mock")}
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            try:
+                for index, piece in enumerate(pieces):
+                    if delay:
+                        time.sleep(delay / len(pieces))
+                    last = index == len(pieces) - 1
+                    event = dict(base, choices=[{"index": 0, "delta": {"content": piece},
+                                                 "finish_reason": "stop" if last else None}])
+                    if last:
+                        prompt_tokens = sum(count_tokens(m.get("content", "")) for m in request.get("messages", []))
+                        completion_tokens = count_tokens(content)
+                        event["x_groq"] = {"usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                                                     "total_tokens": prompt_tokens + completion_tokens}}
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # The client aborted the stream
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return MockGroqHandler
+
+
+def start_server(host="127.0.0.1", port=0, responder=default_responder, latency=0.0, **failures):
+    """
+    Start the mock server on a background thread.
+
+    Point the Groq SDK at it with GROQ_BASE_URL=http://<host>:<port> (any API key works).
+    Extra keyword arguments (fail_first, fail_status, error_rate) are passed to make_handler.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call .shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(responder, latency, **failures))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Groq chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep before each response")
+    parser.add_argument("--response-file", help="File whose contents are returned as every completion")
+    parser.add_argument("--fail-first", type=int, default=0, help="Fail this many requests before answering")
+    parser.add_argument("--fail-status", type=int, default=429, help="HTTP status used for injected failures")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests to fail at random")
+    args = parser.parse_args()
+
+    responder = default_responder
+    if args.response_file:
+        with open(args.response_file) as f:
+            canned = f.read()
+        responder = lambda messages: canned
+
+    handler = make_handler(responder, args.latency, args.fail_first, args.fail_status, args.error_rate)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f"Mock Groq server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
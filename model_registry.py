@@ -0,0 +1,88 @@
+import os
+import re
+import json
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+# Versioned model artifacts live here, each next to a <name>-v<N>.json metadata sidecar
+MODEL_DIR = os.getenv("IUDX_MODEL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+
+VERSION_PATTERN = re.compile(r"^(?P<name>.+)-v(?P<version>\d+)\.json$")
+
+
+def sidecar_path(artifact: str) -> str:
+    return os.path.splitext(artifact)[0] + ".json"
+
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def versions(name: str, model_dir: str = MODEL_DIR) -> List[Tuple[int, Dict]]:
+    """(version, sidecar metadata) of every artifact of `name`, oldest first."""
+    found = []
+    if not os.path.isdir(model_dir):
+        return found
+    for filename in os.listdir(model_dir):
+        match = VERSION_PATTERN.match(filename)
+        if match and match.group("name") == name:
+            with open(os.path.join(model_dir, filename)) as f:
+                found.append((int(match.group("version")), json.load(f)))
+    return sorted(found, key=lambda entry: entry[0])
+
+
+def next_version(name: str, model_dir: str = MODEL_DIR) -> int:
+    existing = versions(name, model_dir)
+    return existing[-1][0] + 1 if existing else 1
+
+
+def artifact_path(name: str, version: int, suffix: str, model_dir: str = MODEL_DIR) -> str:
+    return os.path.join(model_dir, f"{name}-v{version}{suffix}")
+
+
+def latest_artifact(name: str, model_dir: str = MODEL_DIR) -> Optional[str]:
+    """Path of the newest artifact of `name`, or None when none has been trained."""
+    existing = versions(name, model_dir)
+    if not existing:
+        return None
+    return os.path.join(model_dir, existing[-1][1]["artifact"])
+
+
+def file_entry(path: str) -> Dict:
+    """File name, size and sha256 of an artifact, as recorded in sidecars."""
+    return {"artifact": os.path.basename(path), "size_bytes": os.path.getsize(path), "sha256": file_sha256(path)}
+
+
+def write_sidecar(artifact: str, metadata: Dict) -> str:
+    """Record `metadata` plus the artifact's file name, size and sha256 next to it."""
+    metadata = dict(metadata, **file_entry(artifact))
+    path = sidecar_path(artifact)
+    with open(path, "w") as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+    return path
+
+
+def verify(artifact: str) -> Optional[Dict]:
+    """
+    Check an artifact, or the model it was converted from (the sidecar's "source"),
+    against the sidecar before it is loaded.
+
+    Returns the sidecar metadata, or None for a legacy artifact without one.
+
+    Raises:
+        ValueError: When the file does not match the recorded sha256.
+    """
+    path = sidecar_path(artifact)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        metadata = json.load(f)
+    entries = [metadata, metadata.get("source") or {}]
+    entry = next((e for e in entries if e.get("artifact") == os.path.basename(artifact)), None)
+    if entry is not None and file_sha256(artifact) != entry.get("sha256"):
+        raise ValueError(f"{artifact} does not match the sha256 recorded in {path}")
+    return metadata
@@ -0,0 +1,210 @@
+import os
+import io
+import json
+import tempfile
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# auto picks the fastest installed encoder: orjson, then ujson, then the stdlib
+DEFAULT_BACKEND = os.getenv("IUDX_JSON_BACKEND", "auto")
+DEFAULT_COMPACT = os.getenv("IUDX_JSON_COMPACT", "").lower() in {"1", "true", "yes"}
+
+# mkstemp creates 0600 files; finished outputs get the usual umask-based mode instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def success_envelope(items):
+    """The `urn:dx:cat:Success` catalogue response wrapping generated items."""
+    items = list(items)
+    return {
+        "type": "urn:dx:cat:Success",
+        "title": "Success",
+        "totalHits": len(items),
+        "results": items,
+        "detail": "Success: Item generated Successfully"
+    }
+
+
+def resolve_backend(backend=DEFAULT_BACKEND):
+    if backend == "auto":
+        return "orjson" if orjson is not None else "ujson" if ujson is not None else "json"
+    if backend == "orjson" and orjson is None or backend == "ujson" and ujson is None:
+        raise ImportError(f"JSON backend {backend!r} is not installed")
+    if backend not in {"orjson", "ujson", "json"}:
+        raise ValueError(f"Unknown JSON backend: {backend}")
+    return backend
+
+
+def dumps(obj, compact=DEFAULT_COMPACT, backend=DEFAULT_BACKEND):
+    """
+    Serialise to UTF-8 bytes.
+
+    Every backend lays the document out the same way (only float exponents may be
+    spelled differently, e.g. 1e+20 vs 1e20): pretty output uses a 2-space indent and
+    ": " separators, compact output has no whitespace, and non-ASCII text is written as
+    UTF-8 rather than \\u escapes.
+    """
+    backend = resolve_backend(backend)
+    if backend == "orjson":
+        return orjson.dumps(obj, option=0 if compact else orjson.OPT_INDENT_2)
+    if backend == "ujson":
+        text = ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False, indent=0 if compact else 2)
+        return text.encode("utf-8")
+    if compact:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _temp_beside(path):
+    """A temporary file in the same directory as `path`, so the final rename is atomic."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=os.path.basename(path), dir=directory)
+    os.chmod(tmp, 0o666 & ~_UMASK)
+    return fd, tmp
+
+
+def write_atomic(path, data):
+    """Write bytes to a temporary file next to `path` and rename it into place."""
+    fd, tmp = _temp_beside(path)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class JsonWriter:
+    """
+    Writes one JSON document per file.
+
+    Args:
+        compact (bool): No indentation or separator whitespace.
+        backend (str): "auto", "orjson", "ujson" or "json".
+        atomic (bool): Write to a temporary file and rename it, so readers never see a
+            partially written output.
+    """
+
+    def __init__(self, compact=DEFAULT_COMPACT, backend=DEFAULT_BACKEND, atomic=True):
+        self.compact = compact
+        self.backend = resolve_backend(backend)
+        self.atomic = atomic
+
+    def write(self, path, obj):
+        data = dumps(obj, self.compact, self.backend)
+        if self.atomic:
+            write_atomic(path, data)
+        else:
+            with open(path, "wb") as f:
+                f.write(data)
+        return path
+
+    def write_items(self, path, items):
+        return self.write(path, success_envelope(items))
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+class JsonLinesSink:
+    """
+    Appends one compact `urn:dx:cat:Success` envelope per line to a single file.
+
+    Lines are buffered and written in blocks. The file is assembled under a temporary
+    name and renamed into place on close(), so an interrupted run never leaves a
+    truncated sink behind; leaving a `with` block on an exception aborts instead.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path, backend=DEFAULT_BACKEND, buffer_size=1 << 20):
+        self.path = path
+        self.backend = resolve_backend(backend)
+        self.buffer_size = buffer_size
+        self.count = 0
+        self.lock = threading.Lock()
+        fd, self.tmp = _temp_beside(path)
+        self.file = io.BufferedWriter(os.fdopen(fd, "wb", buffering=0), buffer_size=buffer_size)
+
+    def write(self, path, obj):
+        """Append `obj` as a line; `path` is ignored (kept for JsonWriter compatibility)."""
+        line = dumps(obj, compact=True, backend=self.backend) + b"\n"
+        with self.lock:
+            self.file.write(line)
+            self.count += 1
+        return self.path
+
+    def write_items(self, path, items):
+        return self.write(path, success_envelope(items))
+
+    def close(self):
+        with self.lock:
+            if self.file.closed:
+                return
+            self.file.close()
+            os.replace(self.tmp, self.path)
+
+    def abort(self):
+        """Drop everything written so far."""
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+                os.remove(self.tmp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+def make_writer(jsonl_path=None, compact=DEFAULT_COMPACT, backend=DEFAULT_BACKEND):
+    """A JsonLinesSink when `jsonl_path` is given, else a per-file JsonWriter."""
+    if jsonl_path:
+        return JsonLinesSink(jsonl_path, backend=backend)
+    return JsonWriter(compact=compact, backend=backend)
+
+
+if __name__ == "__main__":
+    # Throughput of the available backends on a generated catalogue item
+    import sys
+    import time
+
+    sample_file = next((a for a in sys.argv[1:] if not a.isdigit()), "IUDX_generation_eval/output_file7.jsonld")
+    with open(sample_file) as f:
+        item = json.load(f)["results"][0]
+    count = int(sys.argv[-1]) if sys.argv[-1].isdigit() else 2000
+    out_dir = tempfile.mkdtemp(prefix="iudx_writer_")
+
+    backends = ["json"] + [name for name, module in (("ujson", ujson), ("orjson", orjson)) if module is not None]
+    for backend in backends:
+        for compact in (False, True):
+            writer = JsonWriter(compact=compact, backend=backend)
+            started = time.perf_counter()
+            for i in range(count):
+                writer.write_items(os.path.join(out_dir, f"output_{i}.jsonld"), [item])
+            seconds = time.perf_counter() - started
+            print(f"{backend:<7} {'compact' if compact else 'pretty ':<7} files: {count / seconds:8.0f}/s")
+        sink_path = os.path.join(out_dir, f"catalogue_{backend}.jsonl")
+        started = time.perf_counter()
+        with JsonLinesSink(sink_path, backend=backend) as sink:
+            for _ in range(count):
+                sink.write_items(None, [item])
+        print(f"{backend:<7} jsonl   lines: {count / (time.perf_counter() - started):8.0f}/s")
@@ -0,0 +1,168 @@
+import os
+import re
+import hashlib
+import threading
+
+# Placeholders look like {json_input}; JSON braces in the templates never match this
+SLOT_PATTERN = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+class CompiledTemplate:
+    """
+    A prompt template split once into literal segments and named slots.
+
+    Rendering fills the slot positions of a pre-built parts list and joins it, instead
+    of scanning the whole template once per placeholder with str.replace.
+    """
+
+    def __init__(self, text, name=None):
+        self.name = name
+        self.text = text
+        self.parts = []
+        self.slot_positions = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(text):
+            self.parts.append(text[position:match.start()])
+            self.slot_positions.append((len(self.parts), match.group(1)))
+            self.parts.append(None)
+            position = match.end()
+        self.parts.append(text[position:])
+        self.slots = {name for _, name in self.slot_positions}
+        # Slot names in order of first appearance
+        self.slot_order = list(dict.fromkeys(name for _, name in self.slot_positions))
+        # The template with every slot replaced by a <name> reference; identical for every request
+        names = dict(self.slot_positions)
+        self.static_text = "".join(f"<{names[i]}>" if part is None else part for i, part in enumerate(self.parts))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, "r") as f:
+            return cls(f.read(), name=os.path.basename(path))
+
+    def render(self, values):
+        """Fill every slot from `values` (a mapping of slot name to string)."""
+        parts = list(self.parts)
+        try:
+            for index, name in self.slot_positions:
+                parts[index] = values[name]
+        except KeyError as e:
+            raise ValueError(f"Missing value for placeholder {{{e.args[0]}}} in {self.name}") from None
+        return "".join(parts)
+
+    def render_payload(self, values):
+        """
+        The per-request part of a split prompt: the value of every <name> reference in
+        `static_text`, in order of first appearance.
+        """
+        lines = ["## Values for the <placeholders> above:"]
+        for name in self.slot_order:
+            if name not in values:
+                raise ValueError(f"Missing value for placeholder {{{name}}} in {self.name}")
+            value = values[name]
+            lines.append(f"<{name}>:\n{value}" if "\n" in value else f"<{name}>: {value}")
+        return "\n".join(lines)
+
+
+class TemplateRegistry:
+    """
+    Compiled prompt templates for every resource type in a `resource_config`.
+
+    Templates are read and compiled once. At load time every placeholder must have a
+    source: a `required_params` / `optional_params` entry of its resource type, or one of
+    the `derived` names the caller always provides (e.g. "json_input").
+    Resource types whose template file does not exist are recorded in `missing` and
+    raise FileNotFoundError when rendered.
+    """
+
+    def __init__(self, resource_config, base_dir, derived=()):
+        self.templates = {}
+        self.missing = {}
+        self.config = resource_config
+        for resource_type, config in resource_config.items():
+            path = os.path.join(base_dir, config["prompt_file"])
+            if not os.path.exists(path):
+                self.missing[resource_type] = path
+                continue
+            template = CompiledTemplate.from_file(path)
+            sources = set(config.get("required_params", [])) | set(config.get("optional_params", [])) | set(derived)
+            unsourced = template.slots - sources
+            if unsourced:
+                raise ValueError(f"{path}: no source for placeholder(s) {sorted(unsourced)}")
+            self.templates[resource_type] = template
+
+    def get(self, resource_type):
+        if resource_type in self.templates:
+            return self.templates[resource_type]
+        if resource_type in self.missing:
+            raise FileNotFoundError(f"Prompt template not found for {resource_type}: {self.missing[resource_type]}")
+        raise ValueError(f"Unknown resource_type: {resource_type}")
+
+    def render(self, resource_type, values):
+        return self.get(resource_type).render(values)
+
+    def render_split(self, resource_type, values):
+        """(static prefix, dynamic payload) for prompts that should share a cacheable prefix."""
+        template = self.get(resource_type)
+        return template.static_text, template.render_payload(values)
+
+
+def prefix_messages(system_message, prompt):
+    """
+    Chat messages for a split (static, payload) prompt.
+
+    The system message and the static template body come first and are byte-identical
+    for every request of a resource type, so providers and local servers with prefix/KV
+    caching can reuse them; only the short payload differs between requests.
+    """
+    static, payload = prompt
+    return [
+        {"role": "system", "content": f"{system_message}\n\n{static}"},
+        {"role": "user", "content": payload}
+    ]
+
+
+class PrefixReuseTracker:
+    """
+    Counts how much of the prompt text sent so far was a repeat of an earlier prefix.
+
+    The prefix of a request is every message except the last one; it counts as reused
+    when an identical prefix was already recorded in this process.
+    """
+
+    def __init__(self):
+        self.seen = set()
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.reused_requests = 0
+        self.prompt_chars = 0
+        self.prefix_chars = 0
+        self.reused_chars = 0
+
+    def record(self, messages):
+        prefix = "".join(f"{m['role']}\0{m['content']}\0" for m in messages[:-1])
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        total = sum(len(m["content"]) for m in messages)
+        prefix_length = sum(len(m["content"]) for m in messages[:-1])
+        with self.lock:
+            self.requests += 1
+            self.prompt_chars += total
+            self.prefix_chars += prefix_length
+            if digest in self.seen:
+                self.reused_requests += 1
+                self.reused_chars += prefix_length
+            else:
+                self.seen.add(digest)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "distinct_prefixes": len(self.seen),
+                "reused_requests": self.reused_requests,
+                "prefix_share": round(self.prefix_chars / self.prompt_chars, 4) if self.prompt_chars else 0.0,
+                "prefix_reuse_ratio": round(self.reused_chars / self.prompt_chars, 4) if self.prompt_chars else 0.0,
+            }
+
+
+# Process-wide prefix metrics for the generators
+prefix_metrics = PrefixReuseTracker()
@@ -0,0 +1,233 @@
+import uuid
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, create_model, field_validator
+
+from descriptor_validation import validate_descriptor
+from iudx_vocabulary import get_vocabulary
+
+ENVELOPE_TYPE = "urn:dx:cat:Success"
+
+
+class Geometry(BaseModel):
+    type: str
+    coordinates: list
+
+
+class Location(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    type: Literal["Place"]
+    address: str
+    geometry: Optional[Geometry] = None
+
+
+class OgcResourceInfo(BaseModel):
+    ogcResourceAPIs: List[str]
+    geometryType: str
+
+
+class ResourceItem(BaseModel):
+    """Shape shared by every IUDX resource item, as laid out in the prompt templates."""
+
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
+
+    context: str = Field(alias="@context", min_length=1)
+    type: List[str]
+    id: str
+    name: str = Field(min_length=1)
+    label: str = Field(min_length=1)
+    description: str = Field(min_length=1)
+    tags: List[str]
+    location: Location
+    accessPolicy: str
+    resourceType: str
+    apdURL: str
+    provider: str
+    resourceServer: str
+    resourceGroup: str
+    itemStatus: str
+    itemCreatedAt: str
+    dataDescriptor: Dict
+
+    @field_validator("type")
+    def validate_type(cls, v):
+        if "iudx:Resource" not in v:
+            raise ValueError("type must include 'iudx:Resource'")
+        vocabulary = get_vocabulary()
+        if vocabulary is not None:
+            unknown = [t for t in v if t.startswith("iudx:") and not vocabulary.is_class(t)]
+            if unknown:
+                raise ValueError(f"types not in the IUDX vocabulary: {unknown}")
+        return v
+
+    @field_validator("id")
+    def validate_id(cls, v):
+        uuid.UUID(v)
+        return v
+
+    @field_validator("dataDescriptor")
+    def validate_data_descriptor(cls, v):
+        errors = validate_descriptor(v)
+        if errors:
+            details = "; ".join(f"{key}: {', '.join(problems)}" for key, problems in errors.items())
+            raise ValueError(f"invalid field descriptors ({details})")
+        return v
+
+
+def _subset_of(allowed, name):
+    def check(cls, v):
+        unknown = [x for x in v if x not in allowed]
+        if unknown:
+            raise ValueError(f"{name} not allowed for this resource type: {unknown}")
+        return v
+    return check
+
+
+def _ogc_apis_within(allowed):
+    check_apis = _subset_of(allowed, "ogcResourceAPIs")
+
+    def check(cls, v):
+        check_apis(cls, v.ogcResourceAPIs)
+        return v
+    return check
+
+
+def build_item_model(resource_type: str, metadata: Dict):
+    """
+    ResourceItem specialised with the fixed values a resource type's config pins down:
+    resourceType, accessPolicy, apdURL, iudxResourceAPIs and the additional_fields.
+    """
+    fields = {}
+    validators = {}
+    for key in ("resourceType", "accessPolicy", "apdURL"):
+        if key in metadata:
+            fields[key] = (Literal[metadata[key]], ...)
+    if "iudxResourceAPIs" in metadata:
+        fields["iudxResourceAPIs"] = (Optional[List[str]], None)
+        validators["check_iudx_apis"] = field_validator("iudxResourceAPIs")(
+            _subset_of(metadata["iudxResourceAPIs"], "iudxResourceAPIs"))
+
+    additional = metadata.get("additional_fields", {})
+    for key in ("crs", "datum"):
+        if key in additional:
+            fields[key] = (Literal[additional[key]], ...)
+    if "ogcResourceInfo" in additional:
+        fields["ogcResourceInfo"] = (OgcResourceInfo, ...)
+        validators["check_ogc_apis"] = field_validator("ogcResourceInfo")(
+            _ogc_apis_within(additional["ogcResourceInfo"]["ogcResourceAPIs"]))
+
+    return create_model(f"{resource_type}Item", __base__=ResourceItem, __validators__=validators, **fields)
+
+
+def build_envelope_model(item_model):
+    return create_model(
+        f"{item_model.__name__}Envelope",
+        type=(Literal[ENVELOPE_TYPE], ...),
+        title=(str, ...),
+        totalHits=(int, ...),
+        results=(List[item_model], ...),
+        detail=(str, ...),
+    )
+
+
+def format_errors(error: ValidationError) -> List[str]:
+    messages = []
+    for e in error.errors():
+        location = ".".join(str(part) for part in e["loc"])
+        messages.append(f"{location}: {e['msg']}" if location else e["msg"])
+    return messages
+
+
+class ResourceSchemaRegistry:
+    """
+    Compiled item and envelope validators per resource type, built on first use and cached.
+
+    Validation returns a list of error messages (empty when valid) instead of raising.
+    """
+
+    def __init__(self, resource_config: Dict):
+        self.resource_config = resource_config
+        self._items = {}
+        self._envelopes = {}
+        self._batches = {}
+
+    def _item_model(self, resource_type):
+        if resource_type not in self._items:
+            if resource_type not in self.resource_config:
+                raise ValueError(f"Unknown resource_type: {resource_type}")
+            self._items[resource_type] = build_item_model(resource_type, self.resource_config[resource_type]["metadata"])
+        return self._items[resource_type]
+
+    def envelope_adapter(self, resource_type):
+        if resource_type not in self._envelopes:
+            self._envelopes[resource_type] = TypeAdapter(build_envelope_model(self._item_model(resource_type)))
+        return self._envelopes[resource_type]
+
+    def batch_adapter(self, resource_type):
+        if resource_type not in self._batches:
+            self._batches[resource_type] = TypeAdapter(List[self._item_model(resource_type)])
+        return self._batches[resource_type]
+
+    def validate_item(self, item: Dict, resource_type: str) -> List[str]:
+        try:
+            self._item_model(resource_type).model_validate(item)
+            return []
+        except ValidationError as e:
+            return format_errors(e)
+
+    def validate_envelope(self, envelope: Dict, resource_type: str) -> List[str]:
+        try:
+            self.envelope_adapter(resource_type).validate_python(envelope)
+            return []
+        except ValidationError as e:
+            return format_errors(e)
+
+    def validate_items(self, items: List[Dict], resource_type: str) -> Dict[int, List[str]]:
+        """Validate a batch of items of one resource type in one call; returns {index: errors}."""
+        try:
+            self.batch_adapter(resource_type).validate_python(items)
+            return {}
+        except ValidationError as e:
+            errors = {}
+            for error in e.errors():
+                index, *location = error["loc"]
+                path = ".".join(str(part) for part in location)
+                errors.setdefault(index, []).append(f"{path}: {error['msg']}" if path else error["msg"])
+            return errors
+
+
+if __name__ == "__main__":
+    # Check catalogue files against every configured resource type; exits 1 when an item fits none
+    import os
+    import sys
+    import json
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(here, "IUDX_generation_eval"))
+    # The generator builds an LLM client at import time; no request is made here
+    os.environ["GROQ_API_KEY"] = os.getenv("GROQ_API_KEY") or "unused"
+    from generate_iudx_metadata2 import resource_config
+
+    registry = ResourceSchemaRegistry(resource_config)
+    paths = sys.argv[1:] or sorted(
+        os.path.join(here, "IUDX_generation_eval", name)
+        for name in os.listdir(os.path.join(here, "IUDX_generation_eval"))
+        if name.startswith("output_file") and name.endswith(".jsonld"))
+    failed = False
+    for path in paths:
+        with open(path) as f:
+            document = json.load(f)
+        items = document["results"] if isinstance(document, dict) and "results" in document else [document]
+        for item in items:
+            results = {resource_type: registry.validate_item(item, resource_type) for resource_type in resource_config}
+            valid = [resource_type for resource_type, errors in results.items() if not errors]
+            if valid:
+                print(f"[OK] {os.path.basename(path)}: {', '.join(valid)}")
+            else:
+                failed = True
+                closest = min(results, key=lambda resource_type: len(results[resource_type]))
+                print(f"[INVALID] {os.path.basename(path)} (closest: {closest})")
+                for message in results[closest]:
+                    print(f"  - {message}")
+    sys.exit(1 if failed else 0)
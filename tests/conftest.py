@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules under test live at the repository root, the generators in IUDX_generation_eval
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(1, os.path.join(REPO_DIR, "IUDX_generation_eval"))
+
+# generate_iudx_metadata2 builds its LLM client at import time; no request is ever made
+os.environ.setdefault("GROQ_API_KEY", "test")
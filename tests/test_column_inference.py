@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from column_inference import collect_columns, infer_column_type, infer_dataset_types
+from conftest import REPO_DIR
+
+LINE = {"type": "LineString", "coordinates": [[75.36, 11.87], [75.37, 11.88]]}
+POLYGON = {"type": "Polygon", "coordinates": [[[75.0, 11.0], [75.1, 11.0], [75.1, 11.1], [75.0, 11.0]]]}
+
+
+@pytest.mark.parametrize("values, expected", [
+    ([{"type": "Point", "coordinates": [77.2, 28.61]}, None, {"type": "Point", "coordinates": [77.3, 28.7]}], "iudx:Point"),
+    ([[77.2, 28.61], [77.3, 28.7]], "iudx:Point"),
+    ([LINE, LINE, None], "iudx:LineString"),
+    ([POLYGON], "iudx:Polygon"),
+    ([{"type": "MultiLineString", "coordinates": [LINE["coordinates"]]}], "iudx:MultiLineString"),
+    ([{"type": "Point", "coordinates": [77.2, 28.61]}, LINE], "iudx:Text"),
+    ([{"coordinates": [80.85, 24.57]}], "iudx:Text"),
+    ([1, 2, "3"], "iudx:Integer"),
+    ([1, 2.5, "3.75"], "iudx:Number"),
+    ([True, "false"], "iudx:Boolean"),
+    (["2024-11-05T15:34:28+05:30", "13:30:12"], "iudx:DateTime"),
+    (["MG Road", 12], "iudx:Text"),
+    ([None, ""], None),
+])
+def test_infer_column_type(values, expected):
+    assert infer_column_type(values) == expected
+
+
+def test_tolerance_allows_a_share_of_other_geometries():
+    values = [LINE, LINE, LINE, {"type": "Point", "coordinates": [75.0, 11.0]}]
+    assert infer_column_type(values) == "iudx:Text"
+    assert infer_column_type(values, tolerance=0.25) == "iudx:LineString"
+
+
+def test_collect_columns_pads_missing_properties():
+    features = [
+        {"type": "Feature", "properties": {"a": 1}, "geometry": LINE},
+        {"type": "Feature", "properties": {"b": "x"}, "geometry": None},
+    ]
+    assert collect_columns(features) == {"a": [1, None], "geometry": [LINE, None], "b": [None, "x"]}
+
+
+def test_dataset_point_and_linestring_columns():
+    road = infer_dataset_types(os.path.join(REPO_DIR, "IUDX_generation_eval", "file7.json"))
+    assert road["location"] == "iudx:LineString"
+    transit = infer_dataset_types(os.path.join(REPO_DIR, "IUDX_generation_eval", "file2.json"))
+    assert transit["location"] == "iudx:Point"
@@ -0,0 +1,73 @@
+import json
+import glob
+import os
+
+import pytest
+
+from geojson_stream import FeatureStream, read_sample
+from conftest import REPO_DIR
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 4096, 1 << 16]
+
+FEATURES = [
+    {"type": "Feature", "properties": {"name": "Brace {inside} [string]", "quote": "say \"hi\"", "slash": "a\\b"},
+     "geometry": {"type": "Point", "coordinates": [77.2, 28.61]}},
+    {"type": "Feature", "properties": {"name": "Ünïcode ✓", "empty": {}, "list": [], "nested": {"a": [1, {"b": None}]}},
+     "geometry": {"type": "LineString", "coordinates": [[77.1, 28.6], [77.2, 28.7]]}},
+    {"type": "Feature", "properties": {"count": 12, "price": 12.5, "flag": True, "escaped": "]}"},
+     "geometry": None},
+]
+
+
+def write(tmp_path, document, indent):
+    path = tmp_path / "data.geojson"
+    path.write_text(json.dumps(document, indent=indent, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_feature_collection_matches_json_load(tmp_path, chunk_size, indent):
+    document = {"type": "FeatureCollection", "name": "test", "crs": {"type": "name"}, "features": FEATURES}
+    path = write(tmp_path, document, indent)
+
+    stream = FeatureStream(path, chunk_size)
+    assert list(stream) == json.load(open(path, encoding="utf-8"))["features"]
+    assert stream.header == {"type": "FeatureCollection", "name": "test", "crs": {"type": "name"}}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_top_level_array(tmp_path, chunk_size):
+    path = write(tmp_path, FEATURES, 2)
+    assert list(FeatureStream(path, chunk_size)) == FEATURES
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_single_feature_and_plain_record(tmp_path, chunk_size):
+    feature = dict(FEATURES[0], filename="sample.geojson")
+    stream = FeatureStream(write(tmp_path, feature, 2), chunk_size)
+    assert list(stream) == [feature]
+
+    record = {"deviceName": "RWPH {1}", "location": {"coordinates": [80.9, 24.6]}}
+    stream = FeatureStream(write(tmp_path, record, None), chunk_size)
+    assert list(stream) == []
+    assert stream.header == record
+
+
+@pytest.mark.parametrize("path", sorted(glob.glob(os.path.join(REPO_DIR, "*.geojson"))), ids=os.path.basename)
+@pytest.mark.parametrize("chunk_size", [1000, 1 << 16])
+def test_bundled_datasets_match_json_load(path, chunk_size):
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    if isinstance(document, list):
+        expected = document
+    elif "features" in document:
+        expected = document["features"]
+    else:
+        expected = [document] if document.get("type") == "Feature" else []
+    assert list(FeatureStream(path, chunk_size)) == expected
+
+
+def test_read_sample_is_first_feature(tmp_path):
+    path = write(tmp_path, {"type": "FeatureCollection", "features": FEATURES}, None)
+    assert read_sample(path) == FEATURES[0]
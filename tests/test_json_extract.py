@@ -0,0 +1,74 @@
+import json
+import time
+
+import pytest
+
+from json_extract import extract_json, find_candidates, repair_json
+
+ITEM = {"name": "sample", "tags": ["a", "b"], "dataDescriptor": {"speed": {"dataSchema": "iudx:Number",
+        "description": "Speed with a {brace} and \"quotes\""}}}
+BODY = json.dumps(ITEM, indent=2)
+
+
+@pytest.mark.parametrize("text", [
+    BODY,
+    "Here is the {metadata} you asked for:\n" + BODY + "\nLet me know if you need {more}.",
+    'He said "hi {" then ' + BODY,
+    "Use {curly \"braces\" like this} and then " + BODY,
+    "```json\n" + BODY + "\n```",
+    "Example: {\"name\": \"other\"}\n```json\n" + BODY + "\n```",
+    "{Note: " + BODY + "}",
+])
+def test_finds_the_object_in_prose(text):
+    assert extract_json(text) == ITEM
+
+
+def test_fenced_block_wins_over_earlier_objects():
+    text = 'Schema: {"type": "object"}\n```json\n{"a": 1}\n```'
+    assert extract_json(text) == {"a": 1}
+
+
+def test_repairs_trailing_commas_and_comments():
+    text = '{"a": [1, 2,], // the list\n "b": {"c": "x, ]",}, /* done */}'
+    assert extract_json(text) == {"a": [1, 2], "b": {"c": "x, ]"}}
+    # Commas and comment markers inside strings are left alone
+    assert repair_json('{"s": "a,}// b"}') == '{"s": "a,}// b"}'
+
+
+def test_expect_selects_objects_or_arrays():
+    text = 'Values [1, 2] and {"a": [3]}'
+    assert extract_json(text) == {"a": [3]}
+    assert extract_json(text, expect=list) == [1, 2]
+
+
+def test_members_of_a_truncated_object_are_not_answers():
+    with pytest.raises(ValueError):
+        extract_json('{"name": "cut off", "location": {"type": "Point"}')
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        extract_json("Sorry, I cannot help with {that request.")
+
+
+def test_candidates_are_ordered_outer_first():
+    text = 'x {"a": [1, {"b": 2}]} y'
+    spans = find_candidates(text)
+    assert [text[start:end] for start, end in spans] == ['{"a": [1, {"b": 2}]}', '[1, {"b": 2}]', '{"b": 2}']
+
+
+def _seconds(text):
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        assert extract_json(text) == {"ok": 1}
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+@pytest.mark.parametrize("unit", ['He said "hi {" then ', '{ "x ', '{\\" ', "{ ", '{"a": 1 x} '])
+def test_extraction_time_is_linear(unit):
+    # 8x the input: a quadratic scan would take ~64x as long, a linear one ~8x
+    small = _seconds(unit * 1000 + '{"ok": 1}')
+    large = _seconds(unit * 8000 + '{"ok": 1}')
+    assert large < 24 * max(small, 1e-4)
@@ -0,0 +1,79 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from llm_cache import ResponseCache, cache_key, cached_completion
+
+MESSAGES = [{"role": "user", "content": "Generate metadata"}]
+
+
+class FakeClient:
+    """SDK-shaped client answering every request with the next of `answers`."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = self.answers.pop(0)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def complete(client, cache, validate=None, bypass=False):
+    return cached_completion(client, "model", MESSAGES, 0.2, bypass=bypass, cache=cache, stream=False,
+                             validate=validate)
+
+
+def require_name(content):
+    item = json.loads(content)
+    if "name" not in item:
+        raise ValueError("no name")
+    return item
+
+
+def test_rejected_response_is_not_stored(cache):
+    client = FakeClient('{"label": "no name"}')
+    with pytest.raises(ValueError):
+        complete(client, cache, require_name)
+    assert cache.get(cache_key("model", 0.2, MESSAGES)) is None
+
+
+def test_accepted_response_is_stored_and_replayed(cache):
+    client = FakeClient('{"name": "a"}')
+    assert complete(client, cache, require_name) == {"name": "a"}
+    assert complete(client, cache, require_name) == {"name": "a"}
+    assert client.calls == 1
+
+
+def test_cached_response_that_fails_validation_is_a_miss(cache):
+    cache.put(cache_key("model", 0.2, MESSAGES), '{"label": "stale"}')
+    client = FakeClient('{"name": "fresh"}')
+    assert complete(client, cache, require_name) == {"name": "fresh"}
+    assert client.calls == 1
+    assert cache.get(cache_key("model", 0.2, MESSAGES)) == '{"name": "fresh"}'
+
+
+def test_bypass_queries_the_model_and_replaces_the_entry(cache):
+    complete(FakeClient("first"), cache)
+    client = FakeClient("second")
+    assert complete(client, cache, bypass=True) == "second"
+    assert client.calls == 1
+    assert complete(FakeClient(), cache) == "second"
+
+
+def test_key_depends_on_model_temperature_and_messages():
+    key = cache_key("model", 0.2, MESSAGES)
+    assert key == cache_key("model", 0.2, [dict(m) for m in MESSAGES])
+    assert key != cache_key("other", 0.2, MESSAGES)
+    assert key != cache_key("model", 0.7, MESSAGES)
+    assert key != cache_key("model", 0.2, [{"role": "user", "content": "Something else"}])
@@ -0,0 +1,90 @@
+import copy
+import glob
+import json
+import os
+
+import pytest
+
+from generate_iudx_metadata2 import apply_fixed_fields, resource_config
+from output_writer import success_envelope
+from resource_validation import ResourceSchemaRegistry
+from conftest import REPO_DIR
+
+OUTPUTS = sorted(glob.glob(os.path.join(REPO_DIR, "IUDX_generation_eval", "output_file*.jsonld")))
+
+# What the model is asked for; apply_fixed_fields adds the rest
+ANSWER = {
+    "@context": "https://voc.iudx.org.in/",
+    "type": ["iudx:Resource"],
+    "name": "zebra-crossings",
+    "label": "Zebra Crossings",
+    "description": "Zebra crossings of the city.",
+    "tags": ["zebra crossing", "road safety"],
+    "location": {"type": "Place", "address": "Kirklees"},
+    "dataDescriptor": {
+        "@context": "https://voc.iudx.org.in/",
+        "type": ["iudx:DataDescriptor"],
+        "dataDescriptorLabel": "Zebra crossing",
+        "description": "A zebra crossing.",
+        "Location": {"type": ["ValueDescriptor"], "description": "Street of the crossing.", "dataSchema": "iudx:Text"},
+        "geometry": {"type": ["ValueDescriptor"], "description": "Position of the crossing.", "dataSchema": "iudx:Point"},
+    },
+    **resource_config["GeoJSON"]["static_fields"],
+}
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return ResourceSchemaRegistry(resource_config)
+
+
+def geojson_item():
+    return apply_fixed_fields(copy.deepcopy(ANSWER), "GeoJSON")
+
+
+@pytest.mark.parametrize("path", OUTPUTS, ids=os.path.basename)
+def test_bundled_outputs_fit_a_resource_type(registry, path):
+    with open(path) as f:
+        document = json.load(f)
+    items = document["results"] if "results" in document else [document]
+    for item in items:
+        assert any(not registry.validate_item(item, resource_type) for resource_type in resource_config)
+
+
+def test_item_with_fixed_fields_is_valid(registry):
+    assert registry.validate_item(geojson_item(), "GeoJSON") == []
+
+
+def test_model_answer_alone_lacks_the_fixed_fields(registry):
+    problems = registry.validate_item(copy.deepcopy(ANSWER), "GeoJSON")
+    for field in ("crs", "datum", "ogcResourceInfo", "apdURL"):
+        assert any(problem.startswith(field) for problem in problems), field
+
+
+@pytest.mark.parametrize("change, field", [
+    (lambda item: item.pop("dataDescriptor"), "dataDescriptor"),
+    (lambda item: item.update(accessPolicy="SECURE"), "accessPolicy"),
+    (lambda item: item.update(id="not-a-uuid"), "id"),
+    (lambda item: item.update(type=["Resource"]), "type"),
+    (lambda item: item["ogcResourceInfo"].update(ogcResourceAPIs=["TILES"]), "ogcResourceInfo"),
+    (lambda item: item["dataDescriptor"]["Location"].update(dataSchema="Text"), "dataDescriptor"),
+])
+def test_invalid_items_are_rejected(registry, change, field):
+    item = geojson_item()
+    change(item)
+    problems = registry.validate_item(item, "GeoJSON")
+    assert any(problem.startswith(field) for problem in problems), problems
+
+
+def test_fixed_fields_of_another_type_are_rejected(registry):
+    assert registry.validate_item(geojson_item(), "EmergencyVehicle")
+
+
+def test_envelope_and_batch(registry):
+    good, bad = geojson_item(), geojson_item()
+    bad.pop("location")
+    assert registry.validate_envelope(success_envelope([good]), "GeoJSON") == []
+    assert registry.validate_envelope(success_envelope([good, bad]), "GeoJSON")
+    errors = registry.validate_items([good, bad], "GeoJSON")
+    assert list(errors) == [1]
+    assert any(problem.startswith("location") for problem in errors[1])
@@ -0,0 +1,265 @@
+import os
+import sys
+import glob
+import time
+import zlib
+import platform
+import argparse
+from collections import Counter
+from datetime import datetime, timezone
+
+from batch_evaluate import find_catalogue_files, iter_items
+from build_manifest import digest
+from column_inference import collect_columns, infer_column_types
+from forest_model import export_forest, forest_path
+from generate_training_data import ALLOWED_TYPES
+from geojson_stream import FeatureStream
+from model_registry import MODEL_DIR, artifact_path, file_entry, next_version, write_sidecar
+from type_classifier import boolean_examples, finetune_examples, item_examples
+from type_inference import LEGACY_MODEL_PATH, MODEL_NAME, RandomForestTypeService, feature_frame, sample_text
+
+# Hashed char n-gram features: nothing to fit, so no vocabulary is stored with the model
+N_FEATURES = 1 << 18
+FEATURE_SPEC = {
+    "hash": "murmurhash3_32",
+    "analyzer": "char_wb",
+    "ngram_range": [2, 4],
+    "lowercase": True,
+    "alternate_sign": False,
+    "norm": "l2",
+    "n_features": {"field_name": N_FEATURES, "sample_value": N_FEATURES},
+}
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SOURCES = [REPO_DIR]
+# Raw input datasets; their non-string values are labelled with the dataset-wide column type
+DATASET_GLOBS = [os.path.join(REPO_DIR, "*.geojson"), os.path.join(REPO_DIR, "IUDX_generation_eval", "file*.json")]
+# Distinct values taken per dataset column, so one large dataset does not dominate
+VALUES_PER_COLUMN = 10
+# Quantities under generic names, so numbers are not typed by field name alone
+NUMERIC_NAMES = ["count", "total", "price", "value", "amount", "speed", "temperature", "distance", "level",
+                 "capacity", "reading", "altitude", "Easting", "Northing", "latitude", "longitude"]
+NUMERIC_VALUES = [12, 0, 250, 7, 3.14, 12.5, 530000.5, 0.75, -4.2, 28.61, 77.2, 1024.0]
+# Files mined for labelled fields; .json files in the repo are inputs, not catalogue items
+SOURCE_SUFFIXES = (".jsonld", ".jsonl")
+SKIP_DIRS = {".git", "__pycache__", "venv", ".venv"}
+
+
+def catalogue_files(sources, model_dir=MODEL_DIR):
+    files = []
+    models = os.path.join(os.path.abspath(model_dir), "")
+    for path in find_catalogue_files(sources):
+        parts = set(os.path.normpath(path).split(os.sep))
+        if path.endswith(SOURCE_SUFFIXES) and not parts & SKIP_DIRS and not os.path.abspath(path).startswith(models):
+            files.append(path)
+    return files
+
+
+def mine_examples(sources=DEFAULT_SOURCES, model_dir=MODEL_DIR):
+    """
+    Deduplicated (field_name, sample_value, dataSchema) triples from every catalogue
+    item under `sources` whose dataDescriptor entries validate.
+    """
+    seen = set()
+    examples = []
+    for path in catalogue_files(sources, model_dir):
+        try:
+            items = list(iter_items(path))
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Skipping {path}: {e}", file=sys.stderr)
+            continue
+        for item in items:
+            for key, value, label in item_examples(item):
+                marker = (key, sample_text(value), label)
+                if marker not in seen:
+                    seen.add(marker)
+                    examples.append((key, value, label))
+    return examples
+
+
+def dataset_examples(patterns=DATASET_GLOBS, per_column=VALUES_PER_COLUMN):
+    """
+    Values of the raw datasets, labelled with the type column_inference gives their
+    whole column. Integer-looking strings are left out: whether "5272" is an identifier
+    or a quantity is what the catalogue descriptors are for. So are objects outside
+    Point columns, e.g. a location without a geometry "type", which falls back to Text.
+    """
+    examples = []
+    for path in sorted({path for pattern in patterns for path in glob.glob(pattern)}):
+        stream = FeatureStream(path)
+        try:
+            columns = collect_columns(stream)
+            if not columns and isinstance(stream.header, dict):
+                columns = collect_columns([stream.header])
+        except ValueError as e:
+            print(f"[WARN] Skipping {path}: {e}", file=sys.stderr)
+            continue
+        for key, label in infer_column_types(columns).items():
+            if label not in ALLOWED_TYPES:
+                continue
+            seen = set()
+            for value in columns[key]:
+                if value in (None, "") or isinstance(value, list) or sample_text(value) in seen:
+                    continue
+                if isinstance(value, dict) and label != "iudx:Point":
+                    continue
+                if label == "iudx:Integer" and isinstance(value, str):
+                    continue
+                seen.add(sample_text(value))
+                examples.append((key, value, label))
+                if len(seen) >= per_column:
+                    break
+    return examples
+
+
+def numeric_examples():
+    """Three NUMERIC_VALUES per NUMERIC_NAMES entry: ints as Integer, floats as Number."""
+    return [(name, value, "iudx:Integer" if isinstance(value, int) else "iudx:Number")
+            for i, name in enumerate(NUMERIC_NAMES)
+            for value in (NUMERIC_VALUES[(3 * i + j) % len(NUMERIC_VALUES)] for j in range(3))]
+
+
+def training_examples(sources=DEFAULT_SOURCES, model_dir=MODEL_DIR):
+    """Mined catalogue fields, fine-tuning examples, dataset values and the synthetic examples, deduplicated."""
+    seen = set()
+    examples = []
+    for key, value, label in (mine_examples(sources, model_dir) + finetune_examples() + dataset_examples()
+                              + numeric_examples() + boolean_examples()):
+        marker = (key, sample_text(value), label)
+        if marker not in seen:
+            seen.add(marker)
+            examples.append((key, value, label))
+    return examples
+
+
+def make_vectorizer():
+    from sklearn.compose import ColumnTransformer
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    def hashing(column):
+        return HashingVectorizer(analyzer=FEATURE_SPEC["analyzer"], ngram_range=tuple(FEATURE_SPEC["ngram_range"]),
+                                 lowercase=FEATURE_SPEC["lowercase"], alternate_sign=FEATURE_SPEC["alternate_sign"],
+                                 norm=FEATURE_SPEC["norm"], n_features=FEATURE_SPEC["n_features"][column])
+
+    return ColumnTransformer([(column, hashing(column), column) for column in ("field_name", "sample_value")])
+
+
+def train(examples, n_estimators=100, max_depth=None, min_samples_leaf=1, seed=42):
+    """Fit the (vectorizer, RandomForestClassifier) pair the type service loads."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    vectorizer = make_vectorizer()
+    X = vectorizer.fit_transform(feature_frame([(key, value) for key, value, _ in examples]))
+    clf = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth,
+                                 min_samples_leaf=min_samples_leaf, n_jobs=-1, random_state=seed)
+    clf.fit(X, [label for _, _, label in examples])
+    return vectorizer, clf
+
+
+def split_holdout(examples, every=5):
+    """
+    (fitted, held_out): the examples of every `every`-th field name (by crc32) are held
+    out, so no value of a held-out column is seen in training.
+    """
+    held = lambda key: zlib.crc32(key.encode("utf-8")) % every == 0
+    return [e for e in examples if not held(e[0])], [e for e in examples if held(e[0])]
+
+
+def accuracy(service, examples):
+    """Share of `examples` whose label `service` predicts; numeric types count as one."""
+    if not examples:
+        return None
+    numeric = {"iudx:Number", "iudx:Integer"}
+    predictions = service.predict([(key, value) for key, value, _ in examples])
+    correct = sum(p == label or {p, label} <= numeric for (p, _), (*_, label) in zip(predictions, examples))
+    return correct / len(examples)
+
+
+def predict_latency(service, rows, repeat=50):
+    """(seconds for a single-field call, seconds per field in one batched call)."""
+    single = []
+    for key, value in rows[:repeat]:
+        started = time.perf_counter()
+        service.predict([(key, value)])
+        single.append(time.perf_counter() - started)
+    batch = (rows * (1000 // len(rows) + 1))[:1000]
+    started = time.perf_counter()
+    service.predict(batch)
+    return sorted(single)[len(single) // 2], (time.perf_counter() - started) / len(batch)
+
+
+def main():
+    import joblib
+    import sklearn
+
+    parser = argparse.ArgumentParser(description="Train the RandomForest field type model from accepted catalogue items.")
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES, help="Files or directories to mine")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--min-samples-leaf", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    params = dict(n_estimators=args.n_estimators, max_depth=args.max_depth,
+                  min_samples_leaf=args.min_samples_leaf, seed=args.seed)
+
+    examples = training_examples(args.sources, args.model_dir)
+    labels = Counter(label for *_, label in examples)
+    if len(labels) < 2:
+        raise SystemExit("Need examples of at least two types to train.")
+    print(f"{len(examples)} examples: " + ", ".join(f"{label}={n}" for label, n in sorted(labels.items())))
+
+    # The held-out score is compared with the legacy pickle's before the model is served
+    fitted, held_out = split_holdout(examples)
+    candidate = RandomForestTypeService()
+    candidate._model = train(fitted, **params)
+    holdout = accuracy(candidate, held_out)
+    legacy = accuracy(RandomForestTypeService(LEGACY_MODEL_PATH), held_out) if os.path.exists(LEGACY_MODEL_PATH) else None
+
+    started = time.perf_counter()
+    model = train(examples, **params)
+    train_seconds = time.perf_counter() - started
+
+    os.makedirs(args.model_dir, exist_ok=True)
+    version = next_version(MODEL_NAME, args.model_dir)
+    source = artifact_path(MODEL_NAME, version, ".joblib", args.model_dir)
+    joblib.dump(model, source, compress=3)
+    # The NumPy export is what is served and checked in; the joblib model is only kept
+    # locally (git-ignored) for forest_model.py to re-export from
+    path = export_forest(model, forest_path(source), file_entry(source)["sha256"])
+
+    service = RandomForestTypeService(path)
+    single, per_field = predict_latency(service, [(key, value) for key, value, _ in examples])
+
+    metrics = {
+        "train_seconds": round(train_seconds, 3),
+        "predict_single_ms": round(single * 1000, 3),
+        "predict_batch_us_per_field": round(per_field * 1e6, 3),
+        "holdout_examples": len(held_out),
+        "holdout_accuracy": holdout,
+        "legacy_holdout_accuracy": legacy,
+    }
+    write_sidecar(path, {
+        "name": MODEL_NAME,
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "format": "forest",
+        "source": dict(file_entry(source), format="joblib"),
+        "classes": list(model[1].classes_),
+        "features": FEATURE_SPEC,
+        "params": params,
+        "training_data": {"examples": len(examples), "labels": dict(labels), "sha256": digest(
+            [[key, sample_text(value), label] for key, value, label in examples])},
+        "metrics": metrics,
+        "python": platform.python_version(),
+        "sklearn": sklearn.__version__,
+    })
+    print(f"Wrote {path} (v{version}, {os.path.getsize(path) / 1024:.0f} KiB) and {source}")
+    print(", ".join(f"{name}={value}" for name, value in metrics.items()))
+    if legacy is not None and holdout < legacy:
+        print(f"[WARN] Held-out accuracy {holdout:.3f} is below the legacy model's {legacy:.3f}; "
+              f"type_inference keeps serving {LEGACY_MODEL_PATH}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
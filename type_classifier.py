@@ -0,0 +1,336 @@
+import os
+import re
+import json
+import zlib
+import glob
+import string
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from generate_training_data import ALLOWED_TYPES, REPO_DIR, OUTPUT_FILE as FINETUNE_FILE
+from descriptor_validation import field_entries, is_group, validate_fields
+
+CLASSIFIER_PATH = os.getenv("IUDX_TYPE_CLASSIFIER", os.path.join(REPO_DIR, "iudx_type_classifier.npz"))
+# Fields below this probability still go to the LLM
+DEFAULT_CONFIDENCE = float(os.getenv("IUDX_TYPE_CONFIDENCE", "0.7"))
+
+# Hashed feature space: no vocabulary to store, and the weights stay a fixed size
+N_FEATURES = 1 << 16
+NGRAM_RANGE = (2, 4)
+# Only the head of long values is looked at
+MAX_VALUE_CHARS = 64
+
+# Accepted catalogue items to mine labelled fields from, in the repository whatever the cwd
+DESCRIPTOR_GLOBS = [os.path.join(REPO_DIR, pattern)
+                    for pattern in ("*.jsonld", "IUDX_generation_eval/*.jsonld", "samples_for_finetuning/*.jsonld")]
+
+# No bundled sample has a Boolean field, so the class is seeded with common flag shapes
+BOOLEAN_NAMES = ["isActive", "occupied", "available", "isOpen", "enabled", "hasParking", "isCharging", "valid"]
+BOOLEAN_VALUES = [True, False, "true", "false", "yes", "no"]
+
+FIELD_PATTERN = re.compile(r'^Field: "(.*)"$', re.MULTILINE)
+VALUE_PATTERN = re.compile(r"^Value: (.*)$", re.MULTILINE)
+SHAPE_RUNS = re.compile(r"(.)\1+")
+
+
+# ASCII digits, capitals and lower-case letters to their class; everything else is kept
+SHAPE_TABLE = str.maketrans({**{c: "9" for c in string.digits}, **{c: "A" for c in string.ascii_uppercase},
+                             **{c: "a" for c in string.ascii_lowercase}})
+
+# Hash seeds keep the name, value and shape n-grams apart in the shared feature space
+NAME_SEED, VALUE_SEED, SHAPE_SEED = (zlib.crc32(prefix) for prefix in (b"k:", b"v:", b"s:"))
+
+
+def _shape(text):
+    """Character classes of a value with runs collapsed: "2021-07-25" -> "9-9-9", "GJ06G" -> "A9A"."""
+    return SHAPE_RUNS.sub(r"\1", text.translate(SHAPE_TABLE))
+
+
+def _ngram_hashes(seed, text, out):
+    """Append the crc32 of every n-gram of the UTF-8 text, padded with ^ and $."""
+    data = f"^{text}$".encode("utf-8")
+    crc32 = zlib.crc32
+    low, high = NGRAM_RANGE
+    for n in range(low, high + 1):
+        for i in range(len(data) - n + 1):
+            out.append(crc32(data[i:i + n], seed))
+
+
+def hashed_features(key: str, value) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (indices, values) of the L2-normalised hashed features of one field: n-grams of the
+    field name, of the value's text and of its shape, plus the JSON kind of the value.
+    Numbers and objects are read through their JSON text, the way the model sees them
+    in a prompt.
+    """
+    text = value if isinstance(value, str) else json.dumps(value, sort_keys=True)
+    text = text.strip()[:MAX_VALUE_CHARS]
+    hashes = [zlib.crc32(f"kind={type(value).__name__}".encode("utf-8"))]
+    _ngram_hashes(NAME_SEED, key.lower(), hashes)
+    _ngram_hashes(VALUE_SEED, text.lower(), hashes)
+    _ngram_hashes(SHAPE_SEED, _shape(text), hashes)
+    indices, counts = np.unique(np.array(hashes, dtype=np.uint32) % N_FEATURES, return_counts=True)
+    counts = counts.astype(np.float32)
+    return indices, counts / np.sqrt(np.dot(counts, counts))
+
+
+def finetune_examples(path: str = FINETUNE_FILE) -> List[Tuple[str, object, str]]:
+    """(field_name, sample_value, dataSchema) triples from generate_training_data.py output."""
+    examples = []
+    if not os.path.exists(path):
+        return examples
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            messages = json.loads(line)["messages"]
+            prompt = next(m["content"] for m in messages if m["role"] == "user")
+            label = next(m["content"] for m in messages if m["role"] == "assistant").strip()
+            key, value = FIELD_PATTERN.search(prompt), VALUE_PATTERN.search(prompt)
+            if key and value and label in ALLOWED_TYPES:
+                examples.append((json.loads(f'"{key.group(1)}"'), json.loads(value.group(1)), label))
+    return examples
+
+
+def _flatten_sample(sample):
+    if sample.get("type") == "Feature":
+        flat = dict(sample.get("properties") or {})
+        flat["geometry"] = sample.get("geometry")
+        return flat
+    return sample
+
+
+def item_examples(item) -> List[Tuple[str, object, str]]:
+    """
+    Labelled fields of one accepted catalogue item: every dataSample value whose
+    dataDescriptor entry is valid and names one of the allowed types.
+    """
+    if not isinstance(item, dict) or not isinstance(item.get("dataSample"), dict):
+        return []
+    fields = field_entries(item.get("dataDescriptor") or {})
+    invalid = validate_fields(fields)
+    examples = []
+    for key, value in _flatten_sample(item["dataSample"]).items():
+        field = fields.get(key)
+        if field is None or key in invalid or is_group(field) or value in (None, ""):
+            continue
+        if field["dataSchema"] in ALLOWED_TYPES:
+            examples.append((key, value, field["dataSchema"]))
+    return examples
+
+
+def descriptor_examples(paths: Iterable[str]) -> List[Tuple[str, object, str]]:
+    """item_examples of every item in the given catalogue files; unreadable files are skipped."""
+    examples = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        items = data.get("results", []) if isinstance(data, dict) and "results" in data else data
+        for item in items if isinstance(items, list) else [items]:
+            examples.extend(item_examples(item))
+    return examples
+
+
+def boolean_examples() -> List[Tuple[str, object, str]]:
+    """Two flag values per BOOLEAN_NAMES entry, cycling through BOOLEAN_VALUES."""
+    return [(name, BOOLEAN_VALUES[(2 * i + j) % len(BOOLEAN_VALUES)], "iudx:Boolean")
+            for i, name in enumerate(BOOLEAN_NAMES) for j in range(2)]
+
+
+def training_examples(finetune_path: str = FINETUNE_FILE, descriptor_globs=DESCRIPTOR_GLOBS):
+    """Fine-tuning examples, mined descriptor fields and boolean_examples, with duplicates removed."""
+    paths = sorted({path for pattern in descriptor_globs for path in glob.glob(pattern)})
+    seen = set()
+    examples = []
+    for key, value, label in finetune_examples(finetune_path) + descriptor_examples(paths) + boolean_examples():
+        marker = (key, json.dumps(value, sort_keys=True), label)
+        if marker not in seen:
+            seen.add(marker)
+            examples.append((key, value, label))
+    return examples
+
+
+def train(examples, C: float = 10.0):
+    """
+    Fit a multinomial logistic regression on hashed features.
+
+    Returns:
+        (weights, bias, classes): weights is (N_FEATURES, n_classes) float32.
+    """
+    from scipy.sparse import csr_matrix
+    from sklearn.linear_model import LogisticRegression
+
+    indptr, indices, data = [0], [], []
+    for key, value, _ in examples:
+        idx, vals = hashed_features(key, value)
+        indices.append(idx)
+        data.append(vals)
+        indptr.append(indptr[-1] + len(idx))
+    X = csr_matrix((np.concatenate(data), np.concatenate(indices), indptr), shape=(len(examples), N_FEATURES))
+    y = [label for _, _, label in examples]
+
+    clf = LogisticRegression(C=C, max_iter=2000)
+    clf.fit(X, y)
+    coef = clf.coef_
+    if len(clf.classes_) == 2:
+        # Binary fits come back as one row; expand to one column per class
+        coef = np.vstack([-coef[0] / 2, coef[0] / 2])
+        intercept = np.array([-clf.intercept_[0] / 2, clf.intercept_[0] / 2])
+    else:
+        intercept = clf.intercept_
+    return coef.T.astype(np.float32), intercept.astype(np.float32), list(clf.classes_)
+
+
+def save(path, weights, bias, classes, examples=0):
+    """Write the weights and their settings to one .npz (no pickle involved in loading it)."""
+    spec = {"n_features": N_FEATURES, "ngram_range": list(NGRAM_RANGE), "max_value_chars": MAX_VALUE_CHARS,
+            "classes": classes, "examples": examples}
+    np.savez_compressed(path, weights=weights, bias=bias, spec=np.array(json.dumps(spec)))
+
+
+class TypeClassifier:
+    """
+    In-process char n-gram classifier for a field's dataSchema.
+
+    Scoring a field is a hash of its tokens, a gather-and-sum over the weight rows and a
+    softmax, so there is no model server or sklearn import on the serving path. Has the
+    same predict interface as type_inference.RandomForestTypeService.
+    """
+
+    def __init__(self, weights, bias, classes):
+        self.weights = weights
+        self.bias = bias
+        self.classes = list(classes)
+
+    @classmethod
+    def load(cls, path: str = CLASSIFIER_PATH) -> "TypeClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            weights, bias = data["weights"], data["bias"]
+            spec = json.loads(str(data["spec"]))
+        if spec["n_features"] != N_FEATURES or tuple(spec["ngram_range"]) != NGRAM_RANGE \
+                or spec["max_value_chars"] != MAX_VALUE_CHARS:
+            raise ValueError(f"{path} was trained with different feature settings; retrain it")
+        return cls(weights, bias, spec["classes"])
+
+    def scores(self, key: str, value) -> np.ndarray:
+        indices, values = hashed_features(key, value)
+        logits = values @ self.weights[indices] + self.bias
+        exp = np.exp(logits - logits.max())
+        return exp / exp.sum()
+
+    def predict_proba(self, rows: List[Tuple[str, object]]) -> np.ndarray:
+        if not rows:
+            return np.zeros((0, len(self.classes)))
+        return np.vstack([self.scores(key, value) for key, value in rows])
+
+    def predict(self, rows: List[Tuple[str, object]]) -> List[Tuple[str, float]]:
+        """(type, confidence) for every (field_name, sample_value) row."""
+        results = []
+        for key, value in rows:
+            probabilities = self.scores(key, value)
+            best = int(probabilities.argmax())
+            results.append((self.classes[best], float(probabilities[best])))
+        return results
+
+    def predict_sample(self, sample: Dict) -> Dict[str, str]:
+        return {key: predicted for key, (predicted, _) in zip(sample, self.predict(list(sample.items())))}
+
+
+_classifiers = {}
+_lock = threading.Lock()
+
+
+def get_classifier(path: str = CLASSIFIER_PATH) -> Optional[TypeClassifier]:
+    """Shared classifier per artifact, loaded once; None when it has not been trained yet."""
+    with _lock:
+        if path not in _classifiers:
+            _classifiers[path] = TypeClassifier.load(path) if os.path.exists(path) else None
+        return _classifiers[path]
+
+
+def split_confident(sample: Dict, confidence: float = DEFAULT_CONFIDENCE, path: str = CLASSIFIER_PATH,
+                    allowed: Optional[Iterable[str]] = None):
+    """
+    Types the rules or the classifier are sure of, and the fields left for a slower tier.
+
+    The value-based rules go first, so e.g. a true/false value is Boolean whatever the
+    classifier would say. With `allowed`, an answer outside it is never accepted and the
+    field is left for the caller.
+
+    Returns:
+        (resolved, remaining): {field: type} at or above `confidence`, and the
+        {field: value} of everything else (all of `sample` the rules cannot settle
+        when there is no model).
+    """
+    # Imported here: type_inference imports this module
+    from type_inference import infer_type_rules
+
+    allowed = set(allowed) if allowed is not None else None
+    resolved, ambiguous = {}, {}
+    for key, value in sample.items():
+        inferred, confident = infer_type_rules(key, value)
+        if confident and (allowed is None or inferred in allowed):
+            resolved[key] = inferred
+        else:
+            ambiguous[key] = value
+
+    classifier = get_classifier(path)
+    if classifier is None:
+        return resolved, ambiguous
+    remaining = {}
+    for (key, value), (predicted, probability) in zip(ambiguous.items(), classifier.predict(list(ambiguous.items()))):
+        if probability >= confidence and (allowed is None or predicted in allowed):
+            resolved[key] = predicted
+        else:
+            remaining[key] = value
+    return {key: resolved[key] for key in sample if key in resolved}, remaining
+
+
+def main():
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Train the char n-gram field type classifier.")
+    parser.add_argument("--output", default=CLASSIFIER_PATH, help="Where to write the .npz artifact")
+    parser.add_argument("--finetune", default=FINETUNE_FILE, help="generate_training_data.py output")
+    parser.add_argument("--descriptors", nargs="*", default=DESCRIPTOR_GLOBS,
+                        help="Globs of accepted catalogue items to mine labelled fields from")
+    parser.add_argument("-C", type=float, default=10.0, help="Inverse regularisation strength")
+    args = parser.parse_args()
+
+    examples = training_examples(args.finetune, args.descriptors)
+    if len({label for _, _, label in examples}) < 2:
+        raise SystemExit("Need examples of at least two types to train.")
+    print(f"{len(examples)} examples: " + ", ".join(
+        f"{label}={sum(1 for *_, l in examples if l == label)}" for label in sorted({l for *_, l in examples})))
+
+    # Every fifth example held out for an accuracy estimate, then refit on everything
+    held_out = examples[::5]
+    if held_out:
+        model = TypeClassifier(*train([e for i, e in enumerate(examples) if i % 5], args.C))
+        correct = sum(model.predict([(k, v)])[0][0] == label for k, v, label in held_out)
+        print(f"Held-out accuracy: {correct}/{len(held_out)}")
+
+    started = time.perf_counter()
+    weights, bias, classes = train(examples, args.C)
+    print(f"Trained in {time.perf_counter() - started:.2f}s")
+    save(args.output, weights, bias, classes, examples=len(examples))
+    _classifiers.pop(args.output, None)
+
+    model = get_classifier(args.output)
+    rows = [(k, v) for k, v, _ in examples]
+    started = time.perf_counter()
+    for _ in range(20):
+        model.predict(rows)
+    per_field = (time.perf_counter() - started) / (20 * len(rows))
+    print(f"Wrote {args.output} ({os.path.getsize(args.output) / 1024:.0f} KiB), "
+          f"{per_field * 1e6:.0f}us per field")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+import os
+import re
+import json
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from column_inference import INTEGER_PATTERN, NUMBER_PATTERN, BOOLEAN_PATTERN, DATETIME_PATTERN
+from type_classifier import CLASSIFIER_PATH, get_classifier
+from model_registry import MODEL_DIR, verify, versions
+from forest_model import FOREST_SUFFIX, ForestModel, forest_path, sample_text
+
+MODEL_NAME = "iudx_type_rf"
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "iudx_random_forest.pkl")
+
+
+# "auto": the newest trained model when its sidecar shows it beats the legacy pickle on
+# the held-out fields; "latest": the newest trained model regardless; "legacy"; or a path
+TYPE_MODEL = os.getenv("IUDX_TYPE_MODEL", "auto")
+
+
+def resolve_model_path(choice: str = TYPE_MODEL) -> str:
+    """
+    The model to load for `choice` (see TYPE_MODEL). A trained model is loaded as its
+    NumPy .forest export when there is one (only the export is checked in).
+    """
+    if choice == "legacy":
+        return LEGACY_MODEL_PATH
+    if choice not in ("auto", "latest"):
+        return choice
+    existing = versions(MODEL_NAME)
+    if not existing:
+        return LEGACY_MODEL_PATH
+    metadata = existing[-1][1]
+    metrics = metadata.get("metrics", {})
+    if choice == "auto" and not (
+        "holdout_accuracy" in metrics and "legacy_holdout_accuracy" in metrics
+        and metrics["holdout_accuracy"] >= metrics["legacy_holdout_accuracy"]
+    ):
+        return LEGACY_MODEL_PATH
+    artifact = os.path.join(MODEL_DIR, metadata["artifact"])
+    for path in (forest_path(artifact), artifact):
+        if os.path.exists(path):
+            return path
+    return LEGACY_MODEL_PATH
+
+
+MODEL_PATH = resolve_model_path()
+DEFAULT_CONFIDENCE = 0.6
+
+_INTEGER = re.compile(INTEGER_PATTERN)
+_NUMBER = re.compile(NUMBER_PATTERN)
+_BOOLEAN = re.compile(BOOLEAN_PATTERN)
+_DATETIME = re.compile(DATETIME_PATTERN)
+
+
+def infer_type_rules(key: str, value) -> Tuple[Optional[str], bool]:
+    """
+    Deterministic, value-based type rules.
+
+    Returns:
+        (type, confident): `confident` is False when the value could reasonably be
+        read more than one way (numeric-looking strings, empty values, nested objects).
+    """
+    if isinstance(value, bool):
+        return "iudx:Boolean", True
+    if isinstance(value, int):
+        return "iudx:Integer", True
+    if isinstance(value, float):
+        return "iudx:Number", True
+    if isinstance(value, dict):
+        if value.get("type") == "Point":
+            return "iudx:Point", True
+        return None, False
+    if isinstance(value, list):
+        if len(value) == 2 and all(isinstance(x, float) for x in value):
+            return "iudx:Point", True
+        return None, False
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return None, False
+        if _BOOLEAN.fullmatch(text):
+            return "iudx:Boolean", True
+        if _DATETIME.fullmatch(text):
+            return "iudx:DateTime", True
+        # Codes such as "4032" or "2005" may be identifiers rather than quantities
+        if _INTEGER.fullmatch(text):
+            return "iudx:Integer", False
+        if _NUMBER.fullmatch(text):
+            return "iudx:Number", False
+        if any(c.isalpha() for c in text):
+            return "iudx:Text", True
+    return None, False
+
+
+def feature_frame(rows):
+    """The (field_name, sample_value) DataFrame the model's ColumnTransformer expects."""
+    import pandas as pd
+
+    return pd.DataFrame([[k, sample_text(v)] for k, v in rows], columns=["field_name", "sample_value"])
+
+
+class RandomForestTypeService:
+    """
+    RandomForest field-type classifier, loaded lazily exactly once.
+
+    All predictions go through one vectorised transform/predict call per batch
+    instead of one pandas DataFrame and sklearn call per field. A .forest model is
+    memory-mapped and scored with NumPy alone (forest_model.ForestModel); anything else
+    is a joblib (vectorizer, classifier) pair.
+    """
+
+    def __init__(self, model_path: str = MODEL_PATH, batch_size: int = 5000):
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    verify(self.model_path)
+                    if self.model_path.endswith(FOREST_SUFFIX):
+                        self._model = ForestModel.load(self.model_path)
+                    else:
+                        import joblib
+                        self._model = joblib.load(self.model_path)
+        return self._model
+
+    @property
+    def classes(self):
+        if isinstance(self.model, ForestModel):
+            return self.model.classes
+        return [str(c) for c in self.model[1].classes_]
+
+    def _transform(self, rows):
+        vectorizer, _ = self.model
+        return vectorizer.transform(feature_frame(rows))
+
+    def predict_proba(self, rows: List[Tuple[str, object]]):
+        """Class probabilities for a batch of (field_name, sample_value) rows."""
+        import numpy as np
+
+        if not rows:
+            return np.zeros((0, len(self.classes)))
+        if isinstance(self.model, ForestModel):
+            predict = self.model.predict_proba
+        else:
+            _, clf = self.model
+            predict = lambda chunk: clf.predict_proba(self._transform(chunk))
+        return np.vstack([predict(rows[i:i + self.batch_size]) for i in range(0, len(rows), self.batch_size)])
+
+    def predict(self, rows: List[Tuple[str, object]]) -> List[Tuple[str, float]]:
+        """(type, confidence) for every (field_name, sample_value) row."""
+        probabilities = self.predict_proba(rows)
+        classes = self.classes
+        best = probabilities.argmax(axis=1) if len(rows) else []
+        return [(classes[i], float(p[i])) for i, p in zip(best, probabilities)]
+
+    def predict_sample(self, sample: Dict) -> Dict[str, str]:
+        """Predict the type of every field of a flattened sample in one call."""
+        rows = list(sample.items())
+        return {key: predicted for (key, _), (predicted, _) in zip(rows, self.predict(rows))}
+
+    def vote_dataset(self, features: Iterable[Dict]) -> Dict[str, str]:
+        """
+        Score every feature of a dataset and take a per-field majority vote.
+
+        Null and empty values are skipped so they do not outvote real values.
+        """
+        votes = {}
+        rows = []
+
+        def flush():
+            for (key, _), (predicted, _) in zip(rows, self.predict(rows)):
+                votes.setdefault(key, Counter())[predicted] += 1
+            rows.clear()
+
+        for feature in features:
+            if feature.get("type") == "Feature":
+                record = dict(feature.get("properties") or {})
+                record["geometry"] = feature.get("geometry")
+            else:
+                record = feature
+            rows.extend((k, v) for k, v in record.items() if v not in (None, ""))
+            if len(rows) >= self.batch_size:
+                flush()
+        flush()
+        return {key: counter.most_common(1)[0][0] for key, counter in votes.items()}
+
+
+_services = {}
+
+
+def get_type_service(model_path: str = MODEL_PATH) -> RandomForestTypeService:
+    """Shared service per model path, so the model is loaded once per process."""
+    if model_path not in _services:
+        _services[model_path] = RandomForestTypeService(model_path)
+    return _services[model_path]
+
+
+class TypeInferencePipeline:
+    """
+    Cheap-first type inference: rules, then the char n-gram classifier (when trained),
+    then the RandomForest, then the LLM.
+
+    A field only moves on to the next tier when the previous one is not confident: the
+    rules say so themselves, the classifiers when their top probability is below
+    `confidence`. `counters` records how many fields each tier resolved.
+    """
+
+    def __init__(self, confidence: float = DEFAULT_CONFIDENCE, model_path: str = MODEL_PATH, use_llm: bool = True,
+                 classifier_path: str = CLASSIFIER_PATH):
+        self.confidence = confidence
+        self.model_path = model_path
+        self.use_llm = use_llm
+        self.counters = {"rules": 0, "classifier": 0, "random_forest": 0, "llm": 0, "fallback": 0}
+        self.service = get_type_service(model_path)
+        self.classifier = get_classifier(classifier_path)
+
+    def _ask_llm(self, fields: Dict) -> Dict[str, str]:
+        # Imported lazily: the module builds a Groq client at import time
+        from evaluate_descriptor_llm import infer_types_llm_batch
+        return infer_types_llm_batch(fields)
+
+    def infer_many(self, sample: Dict) -> Dict[str, str]:
+        """Infer the dataSchema of every field of a flattened sample."""
+        results = {}
+        guesses = {}
+        ambiguous = []
+
+        for key, value in sample.items():
+            inferred, confident = infer_type_rules(key, value)
+            if confident:
+                results[key] = inferred
+                self.counters["rules"] += 1
+            else:
+                guesses[key] = inferred
+                ambiguous.append((key, value))
+
+        if ambiguous and self.classifier is not None:
+            remaining = []
+            for (key, value), (predicted, probability) in zip(ambiguous, self.classifier.predict(ambiguous)):
+                if probability >= self.confidence:
+                    results[key] = predicted
+                    self.counters["classifier"] += 1
+                else:
+                    remaining.append((key, value))
+            ambiguous = remaining
+
+        escalate = {}
+        if ambiguous:
+            try:
+                predictions = self.service.predict(ambiguous)
+            except Exception as e:
+                print(f"[WARN] RandomForest type inference failed: {e}")
+                predictions = [(None, 0.0)] * len(ambiguous)
+            for (key, value), (predicted, probability) in zip(ambiguous, predictions):
+                if predicted is not None and probability >= self.confidence:
+                    results[key] = predicted
+                    self.counters["random_forest"] += 1
+                else:
+                    escalate[key] = value
+
+        if escalate and self.use_llm:
+            for key, inferred in self._ask_llm(escalate).items():
+                results[key] = inferred
+                self.counters["llm"] += 1
+        for key in escalate:
+            if key not in results:
+                results[key] = guesses.get(key) or "iudx:Text"
+                self.counters["fallback"] += 1
+
+        return {key: results[key] for key in sample}
+
+    def infer(self, key: str, value) -> str:
+        return self.infer_many({key: value})[key]
+
+    def report(self) -> str:
+        total = sum(self.counters.values()) or 1
+        return ", ".join(f"{tier}={n} ({n / total:.0%})" for tier, n in self.counters.items())
+
+
+if __name__ == "__main__":
+    import sys
+    from geojson_stream import FeatureStream
+
+    pipeline = TypeInferencePipeline(use_llm="--no-llm" not in sys.argv)
+    for path in [arg for arg in sys.argv[1:] if not arg.startswith("--")]:
+        for feature in FeatureStream(path):
+            sample = dict(feature.get("properties") or {})
+            sample["geometry"] = feature.get("geometry")
+            print(json.dumps(pipeline.infer_many(sample)))
+            break
+    print("Tier hits:", pipeline.report())